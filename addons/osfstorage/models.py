@@ -15,7 +15,7 @@ from osf.utils.datetime_aware_jsonfield import DateTimeAwareJSONField
 from osf.exceptions import InvalidTagError, NodeStateError, TagNotFoundError
 from framework.auth.core import Auth
 from osf.models.mixins import Loggable
-from osf.models import AbstractNode
+from osf.models import AbstractNode, StorageUsage
 from osf.models.files import File, FileVersion, Folder, TrashedFileNode, BaseFileNode, BaseFileNodeManager
 from osf.models.metaschema import FileMetadataSchema
 from osf.utils import permissions
@@ -44,6 +44,15 @@ class OsfStorageFileNode(BaseFileNode):
 
     @property
     def materialized_path(self):
+        """The path of this file or folder relative to the root of its target's storage,
+        e.g. ``/folder/file.txt``. Stored on save, so reading it does not hit the database.
+        """
+        if self._materialized_path:
+            return self._materialized_path
+        # Not saved since paths started being stored and not yet backfilled
+        return self._get_materialized_path_from_db()
+
+    def _get_materialized_path_from_db(self):
         sql = """
             WITH RECURSIVE materialized_path_cte(parent_id, GEN_PATH) AS (
               SELECT
@@ -75,10 +84,48 @@ class OsfStorageFileNode(BaseFileNode):
                 path = path + '/'
             return path
 
+    def _build_materialized_path(self):
+        """Build the materialized path from the parent's stored path and this node's name"""
+        if self.parent_id is None:
+            path = self.name
+        else:
+            path = '{}/{}'.format(self.parent.materialized_path.rstrip('/'), self.name)
+        return path if self.is_file else path + '/'
+
+    def _get_active_file_ids(self):
+        """Ids of this file, or of every active file below this folder"""
+        if self.is_file:
+            return [self.id]
+        sql = """
+            WITH RECURSIVE subtree_cte(id, type) AS (
+              SELECT T.id, T.type
+              FROM %s AS T
+              WHERE T.parent_id = %s
+              UNION ALL
+              SELECT T.id, T.type
+              FROM subtree_cte AS R
+                JOIN %s AS T ON T.parent_id = R.id
+              WHERE R.type = %s
+            )
+            SELECT id
+            FROM subtree_cte
+            WHERE type = %s;
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [
+                AsIs(self._meta.db_table), self.pk, AsIs(self._meta.db_table),
+                OsfStorageFolder._typedmodels_type, OsfStorageFile._typedmodels_type,
+            ])
+            return [row[0] for row in cursor.fetchall()]
+
+    def get_storage_usage(self):
+        """Bytes stored in the versions of this file, or of every active file below this folder"""
+        return StorageUsage.objects.get_file_size(self._get_active_file_ids())
+
     @materialized_path.setter
     def materialized_path(self, val):
         # raise Exception('Cannot set materialized path on OSFStorage as it is computed.')
-        logger.warn('Cannot set materialized path on OSFStorage because it\'s computed.')
+        logger.warn('Cannot set materialized path on OSFStorage because it\'s computed on save.')
 
     @classmethod
     def get(cls, _id, target):
@@ -176,7 +223,19 @@ class OsfStorageFileNode(BaseFileNode):
         if self.is_checked_out:
             raise exceptions.FileNodeCheckedOutError()
         self.update_region_from_latest_version(destination_parent)
-        return super(OsfStorageFileNode, self).move_under(destination_parent, name)
+
+        source_target = self.target
+        size = self.get_storage_usage() if source_target != destination_parent.target else 0
+        ret = super(OsfStorageFileNode, self).move_under(destination_parent, name)
+        if size:
+            StorageUsage.objects.add(source_target, -size)
+            StorageUsage.objects.add(destination_parent.target, size)
+        return ret
+
+    def copy_under(self, destination_parent, name=None):
+        cloned = super(OsfStorageFileNode, self).copy_under(destination_parent, name)
+        StorageUsage.objects.add(cloned.target, cloned.get_storage_usage())
+        return cloned
 
     def check_in_or_out(self, user, checkout, save=False):
         """
@@ -232,7 +291,9 @@ class OsfStorageFileNode(BaseFileNode):
 
     def save(self):
         self._path = ''
-        self._materialized_path = ''
+        # Recomputed on every save so that moves, renames and restores keep it current.
+        # Folder moves save each child after its parent through `_update_node`.
+        self._materialized_path = self._build_materialized_path()
         return super(OsfStorageFileNode, self).save()
 
 
@@ -316,6 +377,9 @@ class OsfStorageFile(OsfStorageFileNode, File):
         self.versions.add(version)
         self.save()
 
+        if version.size and version.size > 0:
+            StorageUsage.objects.add(self.target, version.size)
+
         return version
 
     def get_version(self, version=None, required=False):
@@ -391,7 +455,10 @@ class OsfStorageFile(OsfStorageFileNode, File):
         from website.search import search
 
         search.update_file(self, delete=True)
-        return super(OsfStorageFile, self).delete(user, parent, **kwargs)
+        size = self.get_storage_usage()
+        ret = super(OsfStorageFile, self).delete(user, parent, **kwargs)
+        StorageUsage.objects.add(self.target, -size)
+        return ret
 
     def save(self, skip_search=False, *args, **kwargs):
         from website.search import search
@@ -18,6 +18,7 @@ from osf_tests.factories import ProjectFactory, UserFactory, PreprintFactory, Re
 from addons.osfstorage.tests import factories
 from addons.osfstorage.tests.utils import StorageTestCase
 from addons.osfstorage.listeners import delete_files_task
+from osf.management.commands.populate_osfstorage_materialized_paths import populate_materialized_paths
 
 import datetime
 
@@ -296,6 +297,46 @@ class TestOsfstorageFileNode(StorageTestCase):
         child = self.node_settings.get_root().append_folder('Cloud').append_file('Carp')
         assert_equals('/Cloud/Carp', child.materialized_path)
 
+    def test_materialized_path_is_stored(self):
+        child = self.node_settings.get_root().append_folder('Cloud').append_file('Carp')
+        assert_equals('/Cloud/Carp', OsfStorageFileNode.objects.filter(id=child.id).values_list('_materialized_path', flat=True).get())
+
+    def test_materialized_path_falls_back_to_query(self):
+        child = self.node_settings.get_root().append_folder('Cloud').append_file('Carp')
+        OsfStorageFileNode.objects.filter(id=child.id).update(_materialized_path='')
+        child.reload()
+        assert_equals('/Cloud/Carp', child.materialized_path)
+
+    def test_materialized_path_updated_on_move_and_rename(self):
+        root = self.node_settings.get_root()
+        to_move = root.append_folder('Carp')
+        child = to_move.append_file('Fin')
+        move_to = root.append_folder('Cloud')
+
+        to_move.move_under(move_to, name='Tuna')
+        child.reload()
+
+        assert_equals('/Cloud/Tuna/', to_move.materialized_path)
+        assert_equals('/Cloud/Tuna/Fin', child.materialized_path)
+
+    def test_materialized_path_restored(self):
+        folder = self.node_settings.get_root().append_folder('Cloud')
+        child = folder.append_file('Carp')
+        folder.delete()
+        models.TrashedFileNode.load(folder._id).restore()
+
+        assert_equals('/Cloud/Carp', OsfStorageFileNode.load(child._id).materialized_path)
+
+    def test_populate_materialized_paths(self):
+        child = self.node_settings.get_root().append_folder('Cloud').append_file('Carp')
+        OsfStorageFileNode.objects.filter(target_object_id=self.node.id).update(_materialized_path='')
+
+        populate_materialized_paths()
+
+        child.reload()
+        assert_equals('/Cloud/Carp', child._materialized_path)
+        assert_equals('/', self.node_settings.get_root()._materialized_path)
+
     def test_copy(self):
         to_copy = self.node_settings.get_root().append_file('Carp')
         copy_to = self.node_settings.get_root().append_folder('Cloud')
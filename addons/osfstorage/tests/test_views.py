@@ -24,17 +24,15 @@ from addons.osfstorage.tests.utils import make_payload
 from framework.auth import signing
 from website.util import rubeus, api_url_for
 from framework.auth import cas
-from api.caching.utils import storage_usage_cache
 
 from osf import features
-from osf.models import Tag, QuickFilesNode
+from osf.models import Tag, QuickFilesNode, StorageUsage
 from osf.models import files as models
 from addons.osfstorage.apps import osf_storage_root
 from addons.osfstorage import utils
 from addons.base.views import make_auth
 from addons.osfstorage import settings as storage_settings
 from api_tests.utils import create_test_file
-from api.caching.settings import STORAGE_USAGE_KEY
 
 from osf_tests.factories import ProjectFactory, ApiOAuth2PersonalTokenFactory, PreprintFactory
 
@@ -436,27 +434,26 @@ class TestUploadFileHook(HookTestCase):
     # def test_upload_update_deleted(self):
     #     pass
 
-    def test_add_file_updates_cache(self):
+    def test_add_file_updates_storage_usage(self):
         name = 'ლ(ಠ益ಠლ).unicode'
         parent = self.node_settings.get_root()
-        key = STORAGE_USAGE_KEY.format(target_id=self.node._id)
-        assert storage_usage_cache.get(key) is None
+        assert not StorageUsage.objects.filter(target=self.node).exists()
 
         with override_flag(features.STORAGE_USAGE, active=True):
             self.send_upload_hook(parent, payload=self.make_payload(name=name))
-        assert storage_usage_cache.get(key) == 123
+        assert StorageUsage.objects.get(target=self.node).total == 123
 
-        # Don't update the cache for duplicate uploads
+        # Don't count duplicate uploads
         with override_flag(features.STORAGE_USAGE, active=True):
             self.send_upload_hook(parent, payload=self.make_payload(name=name))
-        assert storage_usage_cache.get(key) == 123
+        assert StorageUsage.objects.get(target=self.node).total == 123
 
-        # Do update the cache for new versions
+        # Do count new versions
         payload = self.make_payload(name=name)
         payload['metadata']['name'] = 'new hash'
         with override_flag(features.STORAGE_USAGE, active=True):
             self.send_upload_hook(parent, payload=payload)
-        assert storage_usage_cache.get(key) == 246
+        assert StorageUsage.objects.get(target=self.node).total == 246
 
 
 @pytest.mark.django_db
@@ -974,9 +971,7 @@ class TestDeleteHookNode(DeleteHook):
 @pytest.mark.django_db
 class TestDeleteHookProjectOnly(DeleteHook):
 
-    def test_delete_reduces_cache_size(self):
-        key = STORAGE_USAGE_KEY.format(target_id=self.node._id)
-
+    def test_delete_reduces_storage_usage(self):
         file = create_record_with_version('new file', self.node_settings, size=123)
         assert self.node.storage_usage == 123
 
@@ -986,7 +981,7 @@ class TestDeleteHookProjectOnly(DeleteHook):
         assert_equal(resp.status_code, 200)
         assert_equal(resp.json, {'status': 'success'})
 
-        assert storage_usage_cache.get(key) == 0
+        assert StorageUsage.objects.get(target=self.node).total == 0
         assert_is(self.node.storage_usage, 0)
 
 
@@ -1258,9 +1253,9 @@ class TestMoveHookPreprint(TestMoveHook):
 @pytest.mark.django_db
 class TestMoveHookProjectsOnly(TestMoveHook):
 
-    def test_move_hook_updates_cache_intra_target(self):
+    def test_move_hook_storage_usage_intra_target(self):
         """
-        Moving within a single target shouldn't update the cache because net storage usage hasn't changed
+        Moving within a single target shouldn't change storage usage
         """
 
         file = create_record_with_version('new file', self.node_settings, size=123)
@@ -1283,13 +1278,12 @@ class TestMoveHookProjectsOnly(TestMoveHook):
                 target=self.node,
                 method='post_json',)
 
-        # Cache should stay untouched because net storage usage hasn't changed
-        key = STORAGE_USAGE_KEY.format(target_id=self.project._id)
-        assert storage_usage_cache.get(key) is None
+        # Net storage usage hasn't changed
+        assert StorageUsage.objects.get(target=self.project).total == 123
 
         assert_equal(res.status_code, 200)
 
-    def test_move_hook_updates_cache_inter_target(self):
+    def test_move_hook_updates_storage_usage_inter_target(self):
         """
         Moving from one target to another should update both targets
         """
@@ -1320,12 +1314,9 @@ class TestMoveHookProjectsOnly(TestMoveHook):
                 target=self.node,
                 method='post_json',)
 
-        # both caches are updated
-        source_key = STORAGE_USAGE_KEY.format(target_id=self.project._id)
-        assert storage_usage_cache.get(source_key) == 0
-
-        destination = STORAGE_USAGE_KEY.format(target_id=other_target._id)
-        assert storage_usage_cache.get(destination) == 123
+        # both targets are updated
+        assert StorageUsage.objects.get(target=self.project).total == 0
+        assert StorageUsage.objects.get(target=other_target).total == 123
 
         assert_equal(res.status_code, 200)
 
@@ -1363,9 +1354,9 @@ class TestCopyHook(HookTestCase):
         assert_equal(res.status_code, 201)
 
     @pytest.mark.enable_implicit_clean
-    def test_copy_hook_updates_cache(self):
+    def test_copy_hook_updates_storage_usage(self):
         """
-        Whether intra or inter copying the storage usage cache only has to re-calculate the destination, because if it's
+        Whether intra or inter copying only the destination's storage usage grows, because if it's
         a inter-copy the source hasn't changed, but if it's a intra the source IS the destination.
        """
 
@@ -1395,12 +1386,9 @@ class TestCopyHook(HookTestCase):
                 target=self.node,
                 method='post_json',)
 
-        # both caches are updated
-        source_key = STORAGE_USAGE_KEY.format(target_id=self.project._id)
-        assert storage_usage_cache.get(source_key) == 123
-
-        destination = STORAGE_USAGE_KEY.format(target_id=other_target._id)
-        assert storage_usage_cache.get(destination) == 123
+        # only the destination grows
+        assert StorageUsage.objects.get(target=self.project).total == 123
+        assert StorageUsage.objects.get(target=other_target).total == 123
 
         assert_equal(res.status_code, 201)
 
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 import datetime
 import functools
+import hashlib
+import json
 import logging
 
 import markdown
@@ -21,9 +23,11 @@ from markdown.extensions import codehilite, fenced_code, wikilinks
 from osf.models import NodeLog, OSFUser, Comment
 from osf.models.base import BaseModel, GuidMixin, ObjectIDMixin
 from osf.models.spam import SpamStatus
+from osf.utils.cloning import bulk_clone
 from osf.utils.fields import NonNaiveDateTimeField
 from osf.utils.requests import get_request_and_user_id, string_type_request_headers
 from osf.exceptions import NodeStateError
+from addons.wiki import settings as wiki_settings
 from addons.wiki import utils as wiki_utils
 from addons.wiki.exceptions import (
     PageCannotRenameError,
@@ -94,6 +98,12 @@ def build_wiki_url(node, label, base, end):
     return '/{pid}/wiki/{wname}/'.format(pid=node._id, wname=label)
 
 
+def get_render_key():
+    """Identifies the settings wiki HTML is rendered with. Stored HTML rendered with other settings is stale."""
+    render_settings = json.dumps([wiki_settings.WIKI_RENDER_VERSION, settings.WIKI_WHITELIST], sort_keys=True)
+    return hashlib.md5(render_settings).hexdigest()
+
+
 class WikiVersionNodeManager(models.Manager):
 
     def get_for_node(self, node, name=None, version=None, id=None):
@@ -123,13 +133,17 @@ class WikiVersion(ObjectIDMixin, BaseModel):
     wiki_page = models.ForeignKey('WikiPage', null=True, blank=True, on_delete=models.CASCADE, related_name='versions')
     content = models.TextField(default='', blank=True)
     identifier = models.IntegerField(default=1)
+    # Content never changes, so its HTML is rendered once and stored along with the settings it was rendered with
+    rendered_html = models.TextField(null=True, blank=True)
+    rendered_text = models.TextField(null=True, blank=True)
+    render_key = models.CharField(max_length=32, null=True, blank=True)
 
     @property
     def is_current(self):
         return not self.wiki_page.deleted and self.id == self.wiki_page.versions.order_by('-created').first().id
 
-    def html(self, node):
-        """The cleaned HTML of the page"""
+    def render(self, node):
+        """Render the cleaned HTML of the page for `node`, bypassing the stored HTML"""
         html_output = build_html_output(self.content, node=node)
         try:
             cleaner = Cleaner(
@@ -143,10 +157,44 @@ class WikiVersion(ObjectIDMixin, BaseModel):
             logger.warning('Returning unlinkified content.')
             return render_content(self.content, node=node)
 
+    def _renders_for(self, node):
+        # Wiki links point to the node, so only HTML rendered for the page's own node is stored
+        return node is not None and self.wiki_page is not None and node.id == self.wiki_page.node_id
+
+    def _set_rendered(self, node):
+        self.rendered_html = self.render(node)
+        self.rendered_text = sanitize(self.rendered_html, tags=[], strip=True)
+        self.render_key = get_render_key()
+
+    def update_rendered(self, node=None):
+        """Re-render and store the HTML of the page if it is missing or was rendered with other settings.
+        Returns whether it was.
+        """
+        node = node or self.wiki_page.node
+        if self.render_key == get_render_key() or not self._renders_for(node):
+            return False
+        self._set_rendered(node)
+        if self.pk:
+            WikiVersion.objects.filter(pk=self.pk).update(
+                rendered_html=self.rendered_html,
+                rendered_text=self.rendered_text,
+                render_key=self.render_key,
+            )
+        return True
+
+    def html(self, node):
+        """The cleaned HTML of the page"""
+        if not self._renders_for(node):
+            return self.render(node)
+        self.update_rendered(node)
+        return self.rendered_html
+
     def raw_text(self, node):
         """ The raw text of the page, suitable for using in a test search"""
-
-        return sanitize(self.html(node), tags=[], strip=True)
+        if not self._renders_for(node):
+            return sanitize(self.render(node), tags=[], strip=True)
+        self.update_rendered(node)
+        return self.rendered_text
 
     @property
     def rendered_before_update(self):
@@ -174,6 +222,8 @@ class WikiVersion(ObjectIDMixin, BaseModel):
         return self.content
 
     def save(self, *args, **kwargs):
+        if self.wiki_page.node and self.render_key != get_render_key():
+            self._set_rendered(self.wiki_page.node)
         rv = super(WikiVersion, self).save(*args, **kwargs)
         if self.wiki_page.node:
             self.wiki_page.node.update_search()
@@ -227,6 +277,8 @@ class WikiVersion(ObjectIDMixin, BaseModel):
         clone = self.clone()
         clone.wiki_page = wiki_page
         clone.user = user
+        # Wiki links point to the clone's own node
+        clone.render_key = None
         clone.save()
         return clone
 
@@ -375,10 +427,19 @@ class WikiPage(GuidMixin, BaseModel):
         new_wiki_page.node = copy
         new_wiki_page.user = user
         new_wiki_page.save()
-        for version in self.versions.all().order_by('created'):
-            new_version = version.clone_version(new_wiki_page, user)
-            if save:
-                new_version.save()
+        # Versions keep their creation dates, which order them. Their HTML links to the
+        # original node's wiki, so it is rendered again for the copy when it is viewed.
+        bulk_clone(
+            self.versions.all(),
+            overrides={
+                'wiki_page_id': new_wiki_page.id,
+                'user_id': user.id,
+                'rendered_html': None,
+                'rendered_text': None,
+                'render_key': None,
+            },
+            keep=('created',),
+        )
         return
 
     @classmethod
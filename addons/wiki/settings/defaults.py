@@ -13,3 +13,7 @@ SHAREJS_DB_URL = os.environ.get('SHAREJS_DB_URL', 'mongodb://{}:{}/{}'.format(se
 
 # TODO: Change to release date for wiki change
 WIKI_CHANGE_DATE = datetime.datetime.utcfromtimestamp(1423760098).replace(tzinfo=pytz.utc)
+
+# Bump to re-render the stored HTML of every wiki version, e.g. after changing the Markdown extensions.
+# Changes to settings.WIKI_WHITELIST re-render them on their own.
+WIKI_RENDER_VERSION = 1
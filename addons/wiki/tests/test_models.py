@@ -3,8 +3,10 @@ import pytz
 import datetime
 from addons.wiki.exceptions import NameMaximumLengthError
 
-from addons.wiki.models import WikiPage, WikiVersion
+from addons.wiki.models import WikiPage, WikiVersion, get_render_key
 from addons.wiki.tests.factories import WikiFactory, WikiVersionFactory
+from framework.auth import Auth
+from osf.management.commands.render_wiki_versions import render_wiki_versions
 from osf_tests.factories import NodeFactory, UserFactory, ProjectFactory
 from tests.base import OsfTestCase, fake
 
@@ -49,6 +51,54 @@ class TestWikiPageModel:
         assert ver1.is_current is False
 
 
+class TestWikiVersionRendering:
+
+    @pytest.fixture()
+    def version(self):
+        node = ProjectFactory()
+        page = WikiPage.objects.create_for_node(node, 'foo', '[[bar]] and **baz**', Auth(node.creator))
+        return page.get_version()
+
+    def test_rendered_on_save(self, version, django_assert_num_queries):
+        node = version.wiki_page.node
+        assert version.render_key == get_render_key()
+        assert 'href="/{}/wiki/bar/"'.format(node._id) in version.rendered_html
+        assert version.rendered_text == 'bar and baz'
+        with django_assert_num_queries(0):
+            assert version.html(node) == version.rendered_html
+            assert version.raw_text(node) == version.rendered_text
+
+    def test_rerendered_when_settings_change(self, version):
+        WikiVersion.objects.filter(pk=version.pk).update(rendered_html='stale', render_key='old')
+        version.refresh_from_db()
+
+        assert '<strong>baz</strong>' in version.html(version.wiki_page.node)
+        version.refresh_from_db()
+        assert version.render_key == get_render_key()
+        assert '<strong>baz</strong>' in version.rendered_html
+
+    def test_other_nodes_are_not_stored(self, version):
+        other = ProjectFactory()
+        assert 'href="/{}/wiki/bar/"'.format(other._id) in version.html(other)
+        version.refresh_from_db()
+        assert 'href="/{}/wiki/bar/"'.format(version.wiki_page.node._id) in version.rendered_html
+
+    def test_clones_render_for_their_node(self, version):
+        fork = ProjectFactory()
+        page = WikiPage.objects.create(node=fork, page_name='foo', user=fork.creator)
+        clone = version.clone_version(page, fork.creator)
+        assert 'href="/{}/wiki/bar/"'.format(fork._id) in clone.rendered_html
+
+    def test_render_wiki_versions(self, version):
+        WikiVersion.objects.filter(pk=version.pk).update(rendered_html=None, rendered_text=None, render_key=None)
+
+        assert render_wiki_versions(dry_run=True) == 1
+        assert render_wiki_versions() == 1
+        assert render_wiki_versions() == 0
+        version.refresh_from_db()
+        assert version.rendered_text == 'bar and baz'
+
+
 class TestWikiPage(OsfTestCase):
 
     def setUp(self):
@@ -13,6 +13,11 @@ from framework.postcommit_tasks.handlers import (
     postcommit_after_request,
     postcommit_before_request,
 )
+from framework.instrumentation.handlers import (
+    instrumentation_before_request,
+    instrumentation_teardown_request,
+    set_view,
+)
 from framework.celery_tasks.handlers import (
     celery_before_request,
     celery_after_request,
@@ -20,6 +25,7 @@ from framework.celery_tasks.handlers import (
 )
 from .api_globals import api_globals
 from api.base import settings as api_settings
+from osf.utils.permission_cache import permission_cache_teardown_request
 
 
 class CeleryTaskMiddleware(MiddlewareMixin):
@@ -60,6 +66,33 @@ class DjangoGlobalMiddleware(MiddlewareMixin):
         return response
 
 
+class InstrumentationMiddleware(MiddlewareMixin):
+    """
+    Record query counts and timings of API requests, see `framework.instrumentation.handlers`.
+    Must come before PostcommitTaskMiddleware, so that postcommit tasks have run when it sees the response.
+    """
+    def process_request(self, request):
+        instrumentation_before_request()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        set_view(request.resolver_match.view_name, request.method)
+
+    def process_response(self, request, response):
+        set_view(None, request.method, response.status_code)
+        instrumentation_teardown_request()
+        return response
+
+
+class PermissionCacheMiddleware(MiddlewareMixin):
+    """
+    Log and drop the request's permission cache, see `osf.utils.permission_cache`.
+    Must come after DjangoGlobalMiddleware, which makes the request current.
+    """
+    def process_response(self, request, response):
+        permission_cache_teardown_request()
+        return response
+
+
 class CorsMiddleware(corsheaders.middleware.CorsMiddleware):
     """
     Augment CORS origin white list with the Institution model's domains.
@@ -1,20 +1,25 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
 from django.utils import six
 from collections import OrderedDict
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.core.urlresolvers import reverse
 from django.core.paginator import InvalidPage, Paginator as DjangoPaginator
-from django.db.models import QuerySet
+from django.db.models import Q, QuerySet
 
 from rest_framework import pagination
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
 from rest_framework.utils.urls import (
     replace_query_param, remove_query_param,
 )
 from api.base.serializers import is_anonymized
 from api.base.settings import MAX_PAGE_SIZE
-from api.base.utils import absolute_reverse
+from api.base.utils import absolute_reverse, is_truthy
 
 from osf.models import AbstractNode, Comment, Preprint, Guid
+from osf.utils.datetime_aware_jsonfield import DateTimeAwareJSONEncoder, decode_datetime_objects
 from website.search.elastic_search import DOC_TYPE_TO_MODEL
 
 
@@ -24,10 +29,20 @@ class JSONAPIPagination(pagination.PageNumberPagination):
 
     Properly handles pagination of embedded objects.
 
+    Passing `page[cursor]` switches to keyset pagination, which filters on the view's ordering
+    (plus the primary key as a tiebreaker) instead of using OFFSET, so deep pages cost the same
+    as the first. Cursor pages have opaque prev/next links, no last link, and only include a total
+    when `page[total]` is truthy.
+
     """
 
     page_size_query_param = 'page[size]'
     max_page_size = MAX_PAGE_SIZE
+    cursor_query_param = 'page[cursor]'
+    cursor_total_query_param = 'page[total]'
+    invalid_cursor_message = 'Invalid cursor'
+
+    cursor_page = None
 
     def page_number_query(self, url, page_number):
         """
@@ -41,33 +56,67 @@ class JSONAPIPagination(pagination.PageNumberPagination):
 
         return paginated_url
 
+    def cursor_query(self, url, cursor):
+        """
+        Builds uri and adds cursor param.
+        """
+        url = remove_query_param(self.request.build_absolute_uri(url), '_')
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
     def get_self_real_link(self, url):
+        if self.cursor_page:
+            return self.cursor_query(url, self.cursor_page['cursor'])
         page_number = self.page.number
         return self.page_number_query(url, page_number)
 
     def get_first_real_link(self, url):
+        if self.cursor_page:
+            if not self.cursor_page['has_previous']:
+                return None
+            return self.cursor_query(url, '')
         if not self.page.has_previous():
             return None
         return self.page_number_query(url, 1)
 
     def get_last_real_link(self, url):
+        if self.cursor_page:
+            return None
         if not self.page.has_next():
             return None
         page_number = self.page.paginator.num_pages
         return self.page_number_query(url, page_number)
 
     def get_previous_real_link(self, url):
+        if self.cursor_page:
+            if not self.cursor_page['has_previous']:
+                return None
+            return self.cursor_query(url, self.encode_cursor(True, self.cursor_page['first']))
         if not self.page.has_previous():
             return None
         page_number = self.page.previous_page_number()
         return self.page_number_query(url, page_number)
 
     def get_next_real_link(self, url):
+        if self.cursor_page:
+            if not self.cursor_page['has_next']:
+                return None
+            return self.cursor_query(url, self.encode_cursor(False, self.cursor_page['last']))
         if not self.page.has_next():
             return None
         page_number = self.page.next_page_number()
         return self.page_number_query(url, page_number)
 
+    def get_total(self):
+        if self.cursor_page:
+            return self.cursor_page['total']
+        return self.page.paginator.count
+
+    def get_per_page(self):
+        if self.cursor_page:
+            return self.cursor_page['per_page']
+        return self.page.paginator.per_page
+
     def get_response_dict_deprecated(self, data, url):
         return OrderedDict([
             ('data', data),
@@ -79,8 +128,8 @@ class JSONAPIPagination(pagination.PageNumberPagination):
                     ('next', self.get_next_real_link(url)),
                     (
                         'meta', OrderedDict([
-                            ('total', self.page.paginator.count),
-                            ('per_page', self.page.paginator.per_page),
+                            ('total', self.get_total()),
+                            ('per_page', self.get_per_page()),
                         ]),
                     ),
                 ]),
@@ -92,8 +141,8 @@ class JSONAPIPagination(pagination.PageNumberPagination):
             ('data', data),
             (
                 'meta', OrderedDict([
-                    ('total', self.page.paginator.count),
-                    ('per_page', self.page.paginator.per_page),
+                    ('total', self.get_total()),
+                    ('per_page', self.get_per_page()),
                 ]),
             ),
             (
@@ -164,9 +213,103 @@ class JSONAPIPagination(pagination.PageNumberPagination):
             self.request = request
             return list(self.page)
 
+        elif self.cursor_query_param in request.query_params:
+            return self.paginate_queryset_by_cursor(queryset, request)
+
         else:
             return super(JSONAPIPagination, self).paginate_queryset(queryset, request, view=None)
 
+    def get_cursor_ordering(self, queryset):
+        """
+        Returns the queryset's ordering as a list of (field, descending) pairs ending in the primary key,
+        so that every row has a unique position.
+        """
+        pk_name = queryset.model._meta.pk.name
+        ordering = []
+        for field in (queryset.query.order_by or queryset.model._meta.ordering):
+            if not isinstance(field, six.string_types) or '__' in field or field.lstrip('-') == '?':
+                raise ValidationError('Cursor pagination is not supported for this sort order.')
+            name = field.lstrip('-')
+            ordering.append((pk_name if name == 'pk' else name, field.startswith('-')))
+        if pk_name not in [ordered_name for ordered_name, _ in ordering]:
+            ordering.append((pk_name, ordering[0][1] if ordering else False))
+        return ordering
+
+    def encode_cursor(self, backwards, position):
+        return urlsafe_b64encode(json.dumps({
+            'backwards': backwards,
+            'position': dict(zip([name for name, _ in self.cursor_page['ordering']], position)),
+        }, cls=DateTimeAwareJSONEncoder))
+
+    def decode_cursor(self, cursor, ordering, model):
+        """
+        Returns (backwards, position) for a cursor built by `encode_cursor`, or (False, None) for an empty
+        cursor, which starts at the beginning of the list. Position values are converted by `model`'s fields,
+        so a tampered cursor is reported as invalid instead of failing the query.
+        """
+        if not cursor:
+            return False, None
+        try:
+            cursor = decode_datetime_objects(json.loads(urlsafe_b64decode(str(cursor))))
+            return bool(cursor['backwards']), [
+                model._meta.get_field(name).to_python(cursor['position'][name]) for name, _ in ordering
+            ]
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_cursor_filter(self, ordering, position):
+        """
+        Builds the `WHERE` clause for rows after `position`: rows that tie on every earlier field and sort after
+        it on the next. Postgres sorts NULLs as larger than any value.
+        """
+        cursor_filter = Q(pk__in=[])
+        ties = Q()
+        for (name, descending), value in zip(ordering, position):
+            if value is None:
+                after = Q(**{name + '__isnull': False}) if descending else Q(pk__in=[])
+                tie = Q(**{name + '__isnull': True})
+            else:
+                after = Q(**{name + ('__lt' if descending else '__gt'): value})
+                if not descending:
+                    after |= Q(**{name + '__isnull': True})
+                tie = Q(**{name: value})
+            cursor_filter |= ties & after
+            ties &= tie
+        return cursor_filter
+
+    def paginate_queryset_by_cursor(self, queryset, request):
+        if not isinstance(queryset, QuerySet):
+            raise ValidationError('Cursor pagination is not supported by this endpoint.')
+        page_size = self.get_page_size(request)
+        cursor = request.query_params[self.cursor_query_param]
+        ordering = self.get_cursor_ordering(queryset)
+        backwards, position = self.decode_cursor(cursor, ordering, queryset.model)
+        if backwards:
+            ordering = [(name, not descending) for name, descending in ordering]
+
+        page_queryset = queryset.order_by(*[('-' if descending else '') + name for name, descending in ordering])
+        if position is not None:
+            page_queryset = page_queryset.filter(self.get_cursor_filter(ordering, position))
+        # Fetch one extra row to learn whether there is another page without counting
+        results = list(page_queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if backwards:
+            results.reverse()
+
+        self.cursor_page = {
+            'cursor': cursor,
+            'ordering': ordering,
+            'per_page': page_size,
+            'total': queryset.count() if is_truthy(request.query_params.get(self.cursor_total_query_param)) else None,
+            'has_previous': has_more if backwards else position is not None,
+            'has_next': True if backwards else has_more,
+            'first': [getattr(results[0], name) for name, _ in ordering] if results else position,
+            'last': [getattr(results[-1], name) for name, _ in ordering] if results else position,
+        }
+        self.request = request
+        return results
+
 
 class MaxSizePagination(JSONAPIPagination):
     page_size = 1000
@@ -219,9 +362,14 @@ class NodeContributorPagination(JSONAPIPagination):
         """ Add number of bibliographic contributors to links.meta"""
         response = super(NodeContributorPagination, self).get_paginated_response(data)
         response_dict = response.data
-        kwargs = self.request.parser_context['kwargs'].copy()
-        node = self.get_resource(kwargs)
-        total_bibliographic = node.visible_contributors.count()
+        page = getattr(self, 'page', None)
+        if page is not None and isinstance(page.paginator.object_list, list):
+            # Contributors prefetched for an embed, all of them are in memory
+            total_bibliographic = len([contributor for contributor in page.paginator.object_list if contributor.visible])
+        else:
+            kwargs = self.request.parser_context['kwargs'].copy()
+            node = self.get_resource(kwargs)
+            total_bibliographic = node.visible_contributors.count()
         if self.request.version < '2.1':
             response_dict['links']['meta']['total_bibliographic'] = total_bibliographic
         else:
@@ -1,4 +1,6 @@
 import re
+from collections import OrderedDict
+
 from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer, StaticHTMLRenderer
 
 
@@ -13,6 +15,29 @@ class JSONRendererWithESISupport(JSONRenderer):
         augmented_rendering = re.sub(r'"<esi:include src=\\"(.*?)\\"\/>"', r'<esi:include src="\1"/>', initial_rendering)
         return augmented_rendering
 
+    def render_stream(self, data, chunks, accepted_media_type=None, renderer_context=None):
+        """
+        Renders `data` like `render`, with its `data` member replaced by the items of `chunks`, an iterable
+        of lists of items, rendering a chunk at a time rather than building the whole document in memory.
+        """
+        rest = self.render(
+            OrderedDict((key, value) for key, value in data.items() if key != 'data'),
+            accepted_media_type,
+            renderer_context,
+        ).strip()
+        yield b'{"data":['
+        separator = b''
+        for chunk in chunks:
+            if not chunk:
+                continue
+            # Render the chunk as a list, without its brackets
+            yield separator + JSONRendererWithESISupport.render(self, chunk, accepted_media_type, renderer_context).strip()[1:-1]
+            separator = b','
+        if rest[1:-1].strip():
+            yield b'],' + rest[1:]
+        else:
+            yield b']}'
+
 
 class JSONAPIRenderer(JSONRendererWithESISupport):
     format = 'jsonapi'
@@ -13,10 +13,12 @@ class EmbeddedRequest(Request):
     """
     def __init__(
         self, request, parsers=None, authenticators=None,
-        negotiator=None, parser_context=None, parents=None,
+        negotiator=None, parser_context=None, parents=None, prefetched=None,
     ):
         self.original_user = request.user
         self.parents = parents or {Node: {}, OSFUser: {}}
+        # Objects loaded in bulk for the embeds of a whole page, shared by all of its embedded requests
+        self.prefetched = prefetched if prefetched is not None else {Node: {}, OSFUser: {}}
         self.version = request.version
 
         super(EmbeddedRequest, self).__init__(
@@ -14,12 +14,14 @@ from rest_framework.fields import get_attribute as get_nested_attributes
 from rest_framework.mixins import RetrieveModelMixin
 
 from api.base import utils
+from osf.utils import permission_cache
 from osf.utils import permissions as osf_permissions
 from osf.utils import sanitize
 from osf.utils import functional
 from api.base import exceptions as api_exceptions
 from api.base.settings import BULK_SETTINGS
 from framework.auth import core as auth_core
+from framework.instrumentation import handlers as instrumentation
 from osf.models import AbstractNode, MaintenanceState, Preprint
 from website import settings
 from website.project.model import has_anonymous_link
@@ -661,11 +663,11 @@ class RelationshipField(ser.HyperlinkedIdentityField):
                 field_counts_requested = self.process_related_counts_parameters(show_related_counts, value)
 
                 if utils.is_truthy(show_related_counts):
-                    meta[key] = functional.rapply(meta_data[key], _url_val, obj=value, serializer=self.parent, request=self.context['request'])
+                    meta[key] = self.get_count_information(meta_data[key], value)
                 elif utils.is_falsy(show_related_counts):
                     continue
                 elif self.field_name in field_counts_requested:
-                    meta[key] = functional.rapply(meta_data[key], _url_val, obj=value, serializer=self.parent, request=self.context['request'])
+                    meta[key] = self.get_count_information(meta_data[key], value)
                 else:
                     continue
             elif key == 'projects_in_common':
@@ -678,6 +680,16 @@ class RelationshipField(ser.HyperlinkedIdentityField):
                 meta[key] = functional.rapply(meta_data[key], _url_val, obj=value, serializer=self.parent, request=self.context['request'])
         return meta
 
+    def get_count_information(self, count_method, value):
+        """
+        Returns the count batched for the whole page by `JSONAPISerializer.get_batched_related_counts` if there is one,
+        otherwise computes it for this object alone.
+        """
+        batched_counts = self.context.get('related_counts', {}).get(count_method, {})
+        if getattr(value, 'pk', None) in batched_counts:
+            return batched_counts[value.pk]
+        return functional.rapply(count_method, _url_val, obj=value, serializer=self.parent, request=self.context['request'])
+
     def lookup_attribute(self, obj, lookup_field):
         """
         Returns attribute from target object unless attribute surrounded in angular brackets where it returns the lookup field.
@@ -1149,6 +1161,11 @@ class NodeFileHyperLinkField(RelationshipField):
 
 
 class JSONAPIListSerializer(ser.ListSerializer):
+    @property
+    def data(self):
+        with instrumentation.timed('serializer'):
+            return super(JSONAPIListSerializer, self).data
+
     def to_representation(self, data):
         enable_esi = self.context.get('enable_esi', False)
         envelope = self.context.update({'envelope': None})
@@ -1164,6 +1181,18 @@ class JSONAPIListSerializer(ser.ListSerializer):
                 self.child.to_esi_representation(item, envelope=None) for item in data
             ]
         else:
+            data = list(data)
+            # Fields like current_user_permissions check the user's permissions on every object
+            permission_cache.prefetch_group_perms(
+                self.context['request'].user, [item for item in data if isinstance(item, (AbstractNode, Preprint))]
+            )
+            for embed in self.context.get('embed', {}).values():
+                if hasattr(embed, 'prefetch'):
+                    embed.prefetch(data)
+            related_counts = self.context.setdefault('related_counts', {})
+            for count_method, counts in self.child.get_batched_related_counts(data).items():
+                related_counts.setdefault(count_method, {}).update(counts)
+            self.child.prefetch(data)
             ret = [
                 self.child.to_representation(item, envelope=envelope) for item in data
             ]
@@ -1265,6 +1294,11 @@ class BaseAPISerializer(ser.Serializer, SparseFieldsetMixin):
             for name, field in self.fields.items()
         ]
 
+    @property
+    def data(self):
+        with instrumentation.timed('serializer'):
+            return super(BaseAPISerializer, self).data
+
 
 class JSONAPISerializer(BaseAPISerializer):
     """Base serializer. Requires that a `type_` option is set on `class Meta`. Also
@@ -1274,6 +1308,10 @@ class JSONAPISerializer(BaseAPISerializer):
     """
     writeable_method_fields = frozenset([])
 
+    # Maps `related_meta` count methods to methods computing that count for a list of objects at once, as {pk: count}.
+    # List views use these to resolve `related_counts` with one query per relationship instead of one per object.
+    batched_related_counts = {}
+
     # Don't serialize relationships that use these views
     # when viewing thru an anonymous VOL
     views_to_hide_if_anonymous = {
@@ -1318,6 +1356,36 @@ class JSONAPISerializer(BaseAPISerializer):
                 _validated_data[field] = data[field]
         return _validated_data
 
+    def prefetch(self, objs):
+        """
+        Load what serializing each of a page of objects needs in bulk, before they are serialized. Results go in
+        `self.context`, which the list serializer shares with its child.
+        """
+        pass
+
+    def get_batched_related_counts(self, objs):
+        """
+        Returns {count method: {pk: count}} for the `related_counts` requested on this page of objects that
+        have an entry in `batched_related_counts`.
+        """
+        request = self.context['request']
+        show_related_counts = request.query_params.get('related_counts', False)
+        if not self.batched_related_counts or not objs or utils.is_falsy(show_related_counts):
+            return {}
+        if (request.parser_context.get('kwargs') or {}).get('is_embedded'):
+            return {}
+
+        requested = None if utils.is_truthy(show_related_counts) else set(show_related_counts.split(','))
+        related_counts = {}
+        for field_name, field in self.fields.items():
+            if requested is not None and field_name not in requested:
+                continue
+            related_meta = getattr(self.get_unwrapped_field(field), 'related_meta', None) or {}
+            for count_method in (related_meta.get('count'), related_meta.get('unread')):
+                if count_method in self.batched_related_counts:
+                    related_counts[count_method] = getattr(self, self.batched_related_counts[count_method])(objs)
+        return related_counts
+
     def get_unwrapped_field(self, field):
         """
         Returns the lowest nested field. If no nesting, returns the original field.
@@ -132,6 +132,10 @@ BULK_SETTINGS = {
 
 MAX_PAGE_SIZE = 100
 
+# List views with StreamingListMixin render their pages to JSON as they send them, this many items at a time
+STREAM_LIST_RESPONSES = True
+STREAMING_LIST_CHUNK_SIZE = 50
+
 REST_FRAMEWORK = {
     'PAGE_SIZE': 10,
     'DEFAULT_RENDERER_CLASSES': (
@@ -209,8 +213,10 @@ ORIGINS_WHITELIST = ()
 
 MIDDLEWARE = (
     'api.base.middleware.DjangoGlobalMiddleware',
+    'api.base.middleware.InstrumentationMiddleware',
     'api.base.middleware.CeleryTaskMiddleware',
     'api.base.middleware.PostcommitTaskMiddleware',
+    'api.base.middleware.PermissionCacheMiddleware',
     # A profiling middleware. ONLY FOR DEV USE
     # Uncomment and add "prof" to url params to recieve a profile for that url
     # 'api.base.middleware.ProfileMiddleware',
@@ -311,18 +317,22 @@ ELASTICSEARCH_DSL = {
 ELASTICSEARCH_METRICS_DATE_FORMAT = '%Y'
 
 WAFFLE_CACHE_NAME = 'waffle_cache'
-STORAGE_USAGE_CACHE_NAME = 'storage_usage'
+# Flask sessions are cached in a per-process cache, in front of a cache shared by all processes if
+# CACHES has a cross-process backend (e.g. redis or memcached) named OSF_SESSION_CACHE_NAME. Without
+# one, sessions are only cached per process: a process-local "shared" cache would keep serving
+# sessions that other processes logged out.
+OSF_SESSION_LOCAL_CACHE_NAME = 'osf_session_local'
+OSF_SESSION_CACHE_NAME = 'osf_session'
 
 
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     },
-    STORAGE_USAGE_CACHE_NAME: {
-        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
-        'LOCATION': 'osf_cache_table',
-    },
     WAFFLE_CACHE_NAME: {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     },
+    OSF_SESSION_LOCAL_CACHE_NAME: {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
 }
@@ -29,17 +29,51 @@ class BaseThrottle(SimpleRateThrottle):
         if self.key is None:
             return True
 
-        self.history = self.cache.get(self.key, [])
+        # Sliding window counter: requests are counted in fixed windows of `duration` seconds and
+        # the previous window's count is weighted by how much of it still overlaps the sliding window.
+        # This keeps two integers per client instead of a timestamp per request.
         self.now = self.timer()
-
-        # Drop any requests from the history which have now passed the throttle duration
-        while self.history and self.history[-1] <= self.now - self.duration:
-            self.history.pop()
-
-        if len(self.history) >= self.num_requests:
+        window = int(self.now // self.duration)
+        self.elapsed = self.now - window * self.duration
+        current_key = '{}:{}'.format(self.key, window)
+        previous_key = '{}:{}'.format(self.key, window - 1)
+
+        self.previous_count = self.cache.get(previous_key, 0)
+        self.current_count = self.incr(current_key)
+
+        weight = 1 - self.elapsed / float(self.duration)
+        if self.previous_count * weight + self.current_count > self.num_requests:
+            # Throttled requests don't use up the allowance
+            self.cache.decr(current_key)
+            self.current_count -= 1
             return self.throttle_failure()
         return self.throttle_success()
 
+    def incr(self, key):
+        """Atomically increment the counter at `key`, creating it if it doesn't exist"""
+        # Counters have to outlive their own window to be weighted in the next one
+        self.cache.add(key, 0, self.duration * 2)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Expired or evicted between add and incr
+            self.cache.set(key, 1, self.duration * 2)
+            return 1
+
+    def throttle_success(self):
+        return True
+
+    def wait(self):
+        """
+        Returns the recommended next request time in seconds.
+        """
+        remaining = self.duration - self.elapsed
+        if self.current_count >= self.num_requests or not self.previous_count:
+            return remaining
+        # Time until enough of the previous window has slid out to make room for one more request
+        allowed = self.num_requests - self.current_count - 1
+        return max(self.duration * (1 - allowed / float(self.previous_count)) - self.elapsed, 0)
+
 
 class NonCookieAuthThrottle(BaseThrottle, AnonRateThrottle):
 
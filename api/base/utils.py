@@ -1,11 +1,14 @@
 # -*- coding: utf-8 -*-
+import re
+import threading
 import urllib
 import furl
 import urlparse
 from distutils.version import StrictVersion
 from hashids import Hashids
 
-from django.utils.http import urlquote
+from django.core.urlresolvers import NoReverseMatch, get_script_prefix, get_urlconf
+from django.utils.http import urlencode, urlquote
 from django.core.exceptions import ObjectDoesNotExist
 from django.db.models import QuerySet, F
 from rest_framework.exceptions import NotFound
@@ -73,11 +76,97 @@ def get_user_auth(request):
     return auth
 
 
+# Route templates are compiled once per process, see `_get_url_template`
+URL_TEMPLATE_VALUE_RE = re.compile(r'^[A-Za-z0-9_]+$')
+URL_TEMPLATE_PROBES = ('Zq0_{}_urltemplateprobe', 'Q{}')
+# Kwargs that the probes can't stand in for (e.g. `version`) are baked into the template,
+# so a route gets one template per set of their values. Past this many, new values go through `reverse`.
+URL_TEMPLATE_MAX_VARIANTS = 32
+_url_templates = {}
+_url_templates_lock = threading.Lock()
+
+
+def _compile_url_template(view_name, kwargs):
+    """Reverse `view_name` with a probe token in place of each kwarg and turn the resulting URL into a
+    `%`-format template. Returns `(template, pinned)`, where `pinned` are the kwargs whose routes don't
+    accept every word-character value and so have to be part of the template as-is. The template is None
+    if the probe tokens can't be told apart from the rest of the URL.
+    """
+    names = sorted(kwargs)
+    tokens = {name: URL_TEMPLATE_PROBES[0].format(i) for i, name in enumerate(names)}
+    pinned = set()
+    for name in names:
+        for probe in URL_TEMPLATE_PROBES:
+            probe_kwargs = dict(kwargs, **{name: probe.format(len(names))})
+            try:
+                reverse(view_name, kwargs=probe_kwargs)
+            except NoReverseMatch:
+                pinned.add(name)
+                break
+    probe_kwargs = dict(kwargs, **{name: tokens[name] for name in names if name not in pinned})
+    url = website_util.api_v2_url(reverse(view_name, kwargs=probe_kwargs), base_prefix='')
+    template = url.replace('%', '%%')
+    for name in names:
+        if name in pinned:
+            continue
+        if template.count(tokens[name]) != 1:
+            return None, frozenset(pinned)
+        template = template.replace(tokens[name], '%({})s'.format(name))
+    return template, frozenset(pinned)
+
+
+def _get_url_template(view_name, kwargs):
+    """Returns the cached template for reversing `view_name` with `kwargs`, compiling it on first use,
+    or None if the URL has to go through `reverse`.
+    """
+    route_key = (view_name, frozenset(kwargs), get_script_prefix(), get_urlconf())
+    route = _url_templates.get(route_key)
+    if route is None:
+        # Compiling also finds out which kwargs are pinned
+        try:
+            template, pinned = _compile_url_template(view_name, kwargs)
+        except NoReverseMatch:
+            return None
+        route = {'pinned': pinned if template is not None else None, 'templates': {}}
+        if template is not None:
+            route['templates'][tuple(sorted((name, kwargs[name]) for name in pinned))] = template
+        with _url_templates_lock:
+            route = _url_templates.setdefault(route_key, route)
+
+    pinned = route['pinned']
+    if pinned is None:
+        return None
+    variant = tuple(sorted((name, kwargs[name]) for name in pinned))
+    template = route['templates'].get(variant)
+    if template is None and len(route['templates']) < URL_TEMPLATE_MAX_VARIANTS:
+        try:
+            template, _ = _compile_url_template(view_name, kwargs)
+        except NoReverseMatch:
+            return None
+        with _url_templates_lock:
+            if template is None:
+                route['pinned'] = None
+            else:
+                route['templates'].setdefault(variant, template)
+    return template
+
+
 def absolute_reverse(view_name, query_kwargs=None, args=None, kwargs=None):
-    """Like django's `reverse`, except returns an absolute URL. Also add query parameters."""
-    relative_url = reverse(view_name, kwargs=kwargs)
+    """Like django's `reverse`, except returns an absolute URL. Also add query parameters.
 
-    url = website_util.api_v2_url(relative_url, params=query_kwargs, base_prefix='')
+    Routes are reversed once per process into a template that later calls fill in, as long as the
+    kwargs are plain word-character strings; anything else is reversed by django as usual.
+    """
+    kwargs = kwargs or {}
+    template = None
+    if all(isinstance(value, basestring) and URL_TEMPLATE_VALUE_RE.match(value) for value in kwargs.values()):
+        template = _get_url_template(view_name, kwargs)
+    if template is None:
+        return website_util.api_v2_url(reverse(view_name, kwargs=kwargs), params=query_kwargs, base_prefix='')
+
+    url = template % kwargs
+    if query_kwargs:
+        url = '{}?{}'.format(url, urlencode(query_kwargs))
     return url
 
 
@@ -163,6 +252,9 @@ def default_node_list_permission_queryset(user, model_cls):
     return qs.annotate(region=F('addons_osfstorage_node_settings__region___id'))
 
 def extend_querystring_params(url, params):
+    if params and '?' not in url and '#' not in url:
+        # Nothing to merge with, skip the round trip through urlsplit
+        return '{}?{}'.format(url, urllib.urlencode(dict(params), True))
     scheme, netloc, path, query, _ = urlparse.urlsplit(url)
     orig_params = urlparse.parse_qs(query)
     orig_params.update(params)
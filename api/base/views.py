@@ -5,7 +5,7 @@ from django_bulk_update.helper import bulk_update
 from django.conf import settings as django_settings
 from django.db import transaction
 from django.db.models import F, Q
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.contrib.contenttypes.models import ContentType
 from rest_framework import generics
 from rest_framework import permissions as drf_permissions
@@ -16,6 +16,7 @@ from rest_framework.mixins import ListModelMixin
 from rest_framework.response import Response
 
 from api.base import permissions as base_permissions
+from api.base import settings as api_settings
 from api.base import utils
 from api.base.exceptions import RelationshipPostMakesNoChanges, InvalidFilterValue, InvalidFilterOperator
 from api.base.filters import ListFilterMixin
@@ -38,7 +39,7 @@ from api.nodes.permissions import ReadOnlyIfRegistration
 from api.nodes.permissions import ExcludeWithdrawals
 from api.users.serializers import UserSerializer
 from framework.auth.oauth_scopes import CoreScopes
-from osf.models import Contributor, MaintenanceState, BaseFileNode
+from osf.models import Contributor, MaintenanceState, BaseFileNode, Node, OSFUser
 from osf.utils.permissions import API_CONTRIBUTOR_PERMISSIONS, READ, WRITE, ADMIN
 from waffle.models import Flag, Switch, Sample
 from waffle import flag_is_active, sample_is_active
@@ -62,13 +63,27 @@ class JSONAPIBaseView(generics.GenericAPIView):
         if getattr(field, 'field', None):
             field = field.field
 
+        def prefetch(items):
+            """Let the embedded views load what they need for a whole page of items in bulk"""
+            view_kwargs_by_view = defaultdict(list)
+            for item in items:
+                try:
+                    v, view_args, view_kwargs = field.resolve(item, field_name, self.request)
+                except Exception:
+                    # Best effort, the embed itself reports the error if there is one
+                    continue
+                if v and hasattr(v.cls, 'prefetch_embeds'):
+                    view_kwargs_by_view[v.cls].append(view_kwargs)
+            for view_cls, view_kwargs_list in view_kwargs_by_view.items():
+                view_cls.prefetch_embeds(self._get_embed_prefetched(), view_kwargs_list)
+
         def partial(item):
             # resolve must be implemented on the field
             v, view_args, view_kwargs = field.resolve(item, field_name, self.request)
             if not v:
                 return None
 
-            request = EmbeddedRequest(self.request)
+            request = EmbeddedRequest(self.request, prefetched=self._get_embed_prefetched())
 
             if not hasattr(request._request, '_embed_cache'):
                 request._request._embed_cache = {}
@@ -134,8 +149,14 @@ class JSONAPIBaseView(generics.GenericAPIView):
 
             return ret
 
+        partial.prefetch = prefetch
         return partial
 
+    def _get_embed_prefetched(self):
+        if not hasattr(self.request._request, '_embed_prefetched'):
+            self.request._request._embed_prefetched = {Node: {}, OSFUser: {}}
+        return self.request._request._embed_prefetched
+
     def get_serializer_context(self):
         """Inject request into the serializer context. Additionally, inject partial functions
         (request, object -> embed items) if the query string contains embeds.  Allows
@@ -181,6 +202,59 @@ class JSONAPIBaseView(generics.GenericAPIView):
         return context
 
 
+class StreamingListMixin(object):
+    """
+    Streams paginated list responses, for views with large pages. Items are rendered to JSON
+    `STREAMING_LIST_CHUNK_SIZE` at a time as the response is sent, so the whole page never has to be
+    in memory as one JSON string.
+
+    The page is serialized before the response is returned, like any other list: queries and permission
+    lookups run within the request's transaction, permission cache and instrumentation, and errors get
+    the usual error responses instead of a truncated body.
+
+    Embedded lists, ESI and the browsable API are not streamed.
+    """
+
+    def should_stream(self, context):
+        return (
+            api_settings.STREAM_LIST_RESPONSES and
+            not self.kwargs.get('is_embedded') and
+            not context['enable_esi'] and
+            hasattr(self.request.accepted_renderer, 'render_stream')
+        )
+
+    def get_chunks(self, data):
+        chunk_size = api_settings.STREAMING_LIST_CHUNK_SIZE
+        for start in range(0, len(data), chunk_size):
+            yield data[start:start + chunk_size]
+
+    # overrides ListModelMixin
+    def list(self, request, *args, **kwargs):
+        if not self.should_stream(self.get_serializer_context()):
+            return super(StreamingListMixin, self).list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(self.get_serializer(queryset, many=True).data)
+        data = self.get_serializer(page, many=True).data
+        envelope = self.get_paginated_response([]).data
+
+        renderer = request.accepted_renderer
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = '{}; charset={}'.format(content_type, renderer.charset)
+        return StreamingHttpResponse(
+            renderer.render_stream(
+                envelope,
+                self.get_chunks(data),
+                request.accepted_media_type,
+                self.get_renderer_context(),
+            ),
+            content_type=content_type,
+        )
+
+
 class LinkedNodesRelationship(JSONAPIBaseView, generics.RetrieveUpdateDestroyAPIView, generics.CreateAPIView):
     """ Relationship Endpoint for Linked Node relationships
 
@@ -499,7 +573,7 @@ class BaseContributorDetail(JSONAPIBaseView, generics.RetrieveAPIView):
             raise NotFound('{} cannot be found in the list of contributors.'.format(user))
 
 
-class BaseContributorList(JSONAPIBaseView, generics.ListAPIView, ListFilterMixin):
+class BaseContributorList(StreamingListMixin, JSONAPIBaseView, generics.ListAPIView, ListFilterMixin):
 
     ordering = ('-modified',)
 
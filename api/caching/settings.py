@@ -1,4 +1,6 @@
 NEVER_TIMEOUT = None  # for django caches setting None as a timeout value means the cache never times out.
 FIVE_MIN_TIMEOUT = 60 * 5
 
-STORAGE_USAGE_KEY = 'storage_usage:{target_id}'
+BAN_TIMEOUT = 0.3  # 300ms timeout for bans
+BAN_CONCURRENCY = 10  # Varnish servers banned at once
+BAN_MAX_PATTERN_LENGTH = 2000  # Keep BAN urls well under Varnish's request line limit
@@ -1,12 +1,12 @@
+import os
+import re
 import urlparse
+from multiprocessing.pool import ThreadPool
 
 import requests
 import logging
 
-from django.apps import apps
-from api.caching.utils import storage_usage_cache
-from django.db import models
-from framework.postcommit_tasks.handlers import enqueue_postcommit_task
+from framework.postcommit_tasks.handlers import postcommit_queue
 
 from api.caching import settings as cache_settings
 from framework.celery_tasks import app
@@ -14,108 +14,210 @@ from website import settings
 
 logger = logging.getLogger(__name__)
 
+BAN_AGGREGATOR_KEY = 'varnish_ban_aggregator'
+BAN_REGEX_SPECIAL_CHARS = re.compile(r'([.^$*+?{}\[\]\\|()])')
+
+# Shared so BAN requests reuse connections to the Varnish servers
+ban_session = requests.Session()
+ban_session.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=cache_settings.BAN_CONCURRENCY))
+ban_session.mount('https://', requests.adapters.HTTPAdapter(pool_maxsize=cache_settings.BAN_CONCURRENCY))
+
 
 def get_varnish_servers():
     #  TODO: this should get the varnish servers from HAProxy or a setting
     return settings.VARNISH_SERVERS
 
 
-def get_bannable_urls(instance):
+def get_bannable_paths(instance):
+    """Returns the API paths that have to be banned when `instance` changes, and the
+    hostname the API is served from.
+    """
     from osf.models import Comment
-    bannable_urls = []
-    parsed_absolute_url = {}
 
     if not hasattr(instance, 'absolute_api_v2_url'):
         logger.warning('Tried to ban {}:{} but it didn\'t have a absolute_api_v2_url method'.format(instance.__class__, instance))
         return [], ''
 
+    parsed_absolute_url = urlparse.urlparse(instance.absolute_api_v2_url)
+    bannable_paths = [parsed_absolute_url.path]
+    if isinstance(instance, Comment):
+        try:
+            bannable_paths.append(urlparse.urlparse(instance.target.referent.absolute_api_v2_url).path)
+        except AttributeError:
+            # some referents don't have an absolute_api_v2_url
+            # I'm looking at you NodeWikiPage
+            # Note: NodeWikiPage has been deprecated. Is this an issue with WikiPage/WikiVersion?
+            pass
+
+        try:
+            bannable_paths.append(urlparse.urlparse(instance.root_target.referent.absolute_api_v2_url).path)
+        except AttributeError:
+            # some root_targets don't have an absolute_api_v2_url
+            pass
+
+    return bannable_paths, parsed_absolute_url.hostname
+
+
+def get_bannable_urls(instance):
+    bannable_paths, hostname = get_bannable_paths(instance)
+    bannable_urls = []
     for host in get_varnish_servers():
-        # add instance url
         varnish_parsed_url = urlparse.urlparse(host)
-        parsed_absolute_url = urlparse.urlparse(instance.absolute_api_v2_url)
-        url_string = '{scheme}://{netloc}{path}.*'.format(
-            scheme=varnish_parsed_url.scheme,
-            netloc=varnish_parsed_url.netloc,
-            path=parsed_absolute_url.path,
-        )
-        bannable_urls.append(url_string)
-        if isinstance(instance, Comment):
-            try:
-                parsed_target_url = urlparse.urlparse(instance.target.referent.absolute_api_v2_url)
-            except AttributeError:
-                # some referents don't have an absolute_api_v2_url
-                # I'm looking at you NodeWikiPage
-                # Note: NodeWikiPage has been deprecated. Is this an issue with WikiPage/WikiVersion?
-                pass
-            else:
-                url_string = '{scheme}://{netloc}{path}.*'.format(
+        for path in bannable_paths:
+            bannable_urls.append('{scheme}://{netloc}{path}.*'.format(
+                scheme=varnish_parsed_url.scheme,
+                netloc=varnish_parsed_url.netloc,
+                path=path,
+            ))
+    return bannable_urls, hostname
+
+
+def merge_ban_paths(paths):
+    """Drops every path already covered by a shorter path's ban (bans match by prefix),
+    and returns the rest sorted.
+    """
+    merged = []
+    for path in sorted(set(paths)):
+        if not merged or not path.startswith(merged[-1]):
+            merged.append(path)
+    return merged
+
+
+def build_ban_patterns(paths, max_length=cache_settings.BAN_MAX_PATTERN_LENGTH):
+    """Combines prefix-merged paths into as few ban regexes as fit in `max_length`,
+    e.g. ``/v2/nodes/(abcd1/|efgh2/).*`` for two nodes.
+    """
+    patterns = []
+    chunk = []
+    for path in merge_ban_paths(paths):
+        if chunk and len(_ban_pattern(chunk + [path])) > max_length:
+            patterns.append(_ban_pattern(chunk))
+            chunk = []
+        chunk.append(path)
+    if chunk:
+        patterns.append(_ban_pattern(chunk))
+    return patterns
+
+
+def _ban_pattern(paths):
+    if len(paths) == 1:
+        return '{}.*'.format(_escape_ban_path(paths[0]))
+    prefix = os.path.commonprefix(paths)
+    prefix = prefix[:prefix.rfind('/') + 1]
+    return '{}({}).*'.format(
+        _escape_ban_path(prefix),
+        '|'.join(_escape_ban_path(path[len(prefix):]) for path in paths),
+    )
+
+
+def _escape_ban_path(path):
+    # Varnish treats the banned url as a regex; API paths should never need this
+    return BAN_REGEX_SPECIAL_CHARS.sub(r'\\\1', path)
+
+
+def _send_ban(ban):
+    """Sends one BAN request. The url is sent as built, so requests doesn't percent-encode the regex."""
+    url, hostname = ban
+    request = requests.Request('BAN', url, headers={'Host': hostname}).prepare()
+    request.url = url
+    try:
+        response = ban_session.send(request, timeout=cache_settings.BAN_TIMEOUT)
+    except Exception as ex:
+        logger.error('Banning {} failed: {}'.format(
+            url,
+            ex.message,
+        ))
+        return False
+    if not response.ok:
+        logger.error('Banning {} failed: {}'.format(
+            url,
+            response.text,
+        ))
+        return False
+    logger.info('Banning {} succeeded'.format(
+        url,
+    ))
+    return True
+
+
+class BanAggregator(object):
+    """Collects the bannable paths of every object changed in a request or a batch, then bans
+    them all at once: overlapping paths are merged into one regex per Varnish server and the
+    servers are banned concurrently.
+
+    Outside of a request, use it as a context manager to flush when the batch is done::
+
+        with BanAggregator() as bans:
+            for node in nodes:
+                bans.add(node)
+    """
+    def __init__(self):
+        self.paths = set()
+        self.hostname = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.flush()
+
+    def __call__(self):
+        # Lets the aggregator sit in the postcommit queue like any other task
+        return self.flush()
+
+    def add(self, instance):
+        paths, hostname = get_bannable_paths(instance)
+        self.paths.update(paths)
+        self.hostname = self.hostname or hostname
+
+    def get_bans(self):
+        """Returns a list of (url, hostname) pairs, one per server and pattern"""
+        patterns = build_ban_patterns(self.paths)
+        bans = []
+        for host in get_varnish_servers():
+            varnish_parsed_url = urlparse.urlparse(host)
+            for pattern in patterns:
+                url = '{scheme}://{netloc}{pattern}'.format(
                     scheme=varnish_parsed_url.scheme,
                     netloc=varnish_parsed_url.netloc,
-                    path=parsed_target_url.path,
+                    pattern=pattern,
                 )
-                bannable_urls.append(url_string)
-
-            try:
-                parsed_root_target_url = urlparse.urlparse(instance.root_target.referent.absolute_api_v2_url)
-            except AttributeError:
-                # some root_targets don't have an absolute_api_v2_url
-                pass
-            else:
-                url_string = '{scheme}://{netloc}{path}.*'.format(
-                    scheme=varnish_parsed_url.scheme,
-                    netloc=varnish_parsed_url.netloc,
-                    path=parsed_root_target_url.path,
-                )
-                bannable_urls.append(url_string)
-
-    return bannable_urls, parsed_absolute_url.hostname
+                bans.append((url, self.hostname))
+        return bans
+
+    def flush(self):
+        """Sends all collected bans. Returns the number of successful BAN requests."""
+        if not settings.ENABLE_VARNISH or not self.paths:
+            self.paths = set()
+            return 0
+        bans = self.get_bans()
+        self.paths = set()
+        if len(bans) == 1:
+            return int(_send_ban(bans[0]))
+        pool = ThreadPool(min(len(bans), cache_settings.BAN_CONCURRENCY))
+        try:
+            return sum(pool.map(_send_ban, bans))
+        finally:
+            pool.close()
+            pool.join()
+
+
+def enqueue_ban(instance):
+    """Queues `instance` to be banned from Varnish after the current request, together with
+    every other object banned during the request.
+    """
+    if not settings.ENABLE_VARNISH:
+        return
+    queue = postcommit_queue()
+    if BAN_AGGREGATOR_KEY not in queue:
+        queue[BAN_AGGREGATOR_KEY] = BanAggregator()
+    queue[BAN_AGGREGATOR_KEY].add(instance)
 
 
 @app.task(max_retries=5, default_retry_delay=60)
 def ban_url(instance):
-    # TODO: Refactor; Pull url generation into postcommit_task handling so we only ban urls once per request
-    timeout = 0.3  # 300ms timeout for bans
     if settings.ENABLE_VARNISH:
-        bannable_urls, hostname = get_bannable_urls(instance)
-
-        for url_to_ban in set(bannable_urls):
-            try:
-                response = requests.request(
-                    'BAN', url_to_ban, timeout=timeout, headers=dict(
-                        Host=hostname,
-                    ),
-                )
-            except Exception as ex:
-                logger.error('Banning {} failed: {}'.format(
-                    url_to_ban,
-                    ex.message,
-                ))
-            else:
-                if not response.ok:
-                    logger.error('Banning {} failed: {}'.format(
-                        url_to_ban,
-                        response.text,
-                    ))
-                else:
-                    logger.info('Banning {} succeeded'.format(
-                        url_to_ban,
-                    ))
-
-
-@app.task(max_retries=5, default_retry_delay=10)
-def update_storage_usage_cache(target_id):
-    AbstractNode = apps.get_model('osf.AbstractNode')
-
-    storage_usage_total = AbstractNode.objects.get(
-        guids___id=target_id,
-    ).files.aggregate(sum=models.Sum('versions__size'))['sum'] or 0
-
-    key = cache_settings.STORAGE_USAGE_KEY.format(target_id=target_id)
-    storage_usage_cache.set(key, storage_usage_total, cache_settings.FIVE_MIN_TIMEOUT)
-
-
-def update_storage_usage(target):
-    Preprint = apps.get_model('osf.preprint')
-
-    if not isinstance(target, Preprint) and not target.is_quickfiles:
-        enqueue_postcommit_task(update_storage_usage_cache, (target._id,), {}, celery=True)
+        bans = BanAggregator()
+        bans.add(instance)
+        bans.flush()
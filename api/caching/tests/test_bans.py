@@ -0,0 +1,92 @@
+from __future__ import unicode_literals
+
+import threading
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+import mock
+import pytest
+
+from api.caching.tasks import BanAggregator, build_ban_patterns, merge_ban_paths
+
+
+class StubVarnishHandler(BaseHTTPRequestHandler):
+
+    def do_BAN(self):
+        self.server.bans.append((self.path, self.headers.get('Host')))
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def varnish_servers():
+    servers = []
+    for _ in range(2):
+        server = HTTPServer(('127.0.0.1', 0), StubVarnishHandler)
+        server.bans = []
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        servers.append(server)
+    yield servers
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+class FakeObject(object):
+
+    def __init__(self, path):
+        self.absolute_api_v2_url = 'http://localhost:8000{}'.format(path)
+
+
+class TestBanPatterns:
+
+    def test_merge_drops_covered_paths(self):
+        paths = ['/v2/nodes/abcd1/', '/v2/nodes/abcd1/contributors/', '/v2/users/me/', '/v2/nodes/abcd1/']
+        assert merge_ban_paths(paths) == ['/v2/nodes/abcd1/', '/v2/users/me/']
+
+    def test_single_path(self):
+        assert build_ban_patterns(['/v2/nodes/abcd1/']) == ['/v2/nodes/abcd1/.*']
+
+    def test_paths_share_prefix(self):
+        patterns = build_ban_patterns(['/v2/nodes/abcd1/', '/v2/nodes/efgh2/', '/v2/users/ijkl3/'])
+        assert patterns == ['/v2/(nodes/abcd1/|nodes/efgh2/|users/ijkl3/).*']
+
+    def test_patterns_split_at_max_length(self):
+        paths = ['/v2/nodes/node{}/'.format(i) for i in range(100)]
+        patterns = build_ban_patterns(paths, max_length=200)
+        assert len(patterns) > 1
+        assert all(len(pattern) <= 200 for pattern in patterns)
+        assert sum(pattern.count('|') + 1 for pattern in patterns) == 100
+
+
+class TestBanAggregator:
+
+    def test_flush_sends_one_ban_per_server(self, varnish_servers):
+        hosts = ['http://127.0.0.1:{}'.format(server.server_port) for server in varnish_servers]
+        with mock.patch('api.caching.tasks.settings.ENABLE_VARNISH', True), \
+                mock.patch('api.caching.tasks.get_varnish_servers', return_value=hosts):
+            with BanAggregator() as bans:
+                for i in range(50):
+                    bans.add(FakeObject('/v2/nodes/node{}/'.format(i)))
+                bans.add(FakeObject('/v2/nodes/node1/files/'))
+
+        for server in varnish_servers:
+            assert len(server.bans) == 1
+            path, host = server.bans[0]
+            assert path.startswith('/v2/nodes/(')
+            assert path.count('|') == 49
+            assert host == 'localhost'
+
+    def test_flush_does_nothing_when_varnish_disabled(self, varnish_servers):
+        hosts = ['http://127.0.0.1:{}'.format(server.server_port) for server in varnish_servers]
+        with mock.patch('api.caching.tasks.settings.ENABLE_VARNISH', False), \
+                mock.patch('api.caching.tasks.get_varnish_servers', return_value=hosts):
+            bans = BanAggregator()
+            bans.add(FakeObject('/v2/nodes/abcd1/'))
+            assert bans.flush() == 0
+
+        assert all(not server.bans for server in varnish_servers)
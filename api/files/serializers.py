@@ -283,9 +283,16 @@ class BaseFileSerializer(JSONAPISerializer):
             'sha256': metadata.get('sha256', None),
         }
         if obj.provider == 'osfstorage' and obj.is_file:
-            extras['downloads'] = obj.get_download_count()
+            download_counts = self.context.get('download_counts', {})
+            extras['downloads'] = download_counts[obj.pk] if obj.pk in download_counts else obj.get_download_count()
         return extras
 
+    def prefetch(self, objs):
+        # Download counts of a whole page of files at once, for `extra`
+        files = [obj for obj in objs if obj.provider == 'osfstorage' and obj.is_file]
+        if files:
+            self.context.setdefault('download_counts', {}).update(BaseFileNode.get_download_counts(files))
+
     def get_current_user_can_comment(self, obj):
         user = self.context['request'].user
         auth = Auth(user if not user.is_anonymous else None)
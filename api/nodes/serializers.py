@@ -1,4 +1,5 @@
 from django.db import connection
+from django.db.models import Count
 from distutils.version import StrictVersion
 
 from api.base.exceptions import (
@@ -36,7 +37,7 @@ from osf.exceptions import NodeStateError
 from osf.models import (
     Comment, DraftRegistration, Institution,
     RegistrationSchema, AbstractNode, PrivateLink,
-    RegistrationProvider, OSFGroup,
+    RegistrationProvider, OSFGroup, NodeCounters, NodeRelation,
 )
 from osf.models.external import ExternalAccount
 from osf.models.licenses import NodeLicense
@@ -569,7 +570,7 @@ class NodeSerializer(TaxonomizableSerializerMixin, JSONAPISerializer):
             user_perms = obj.get_permissions(user)[::-1]
 
         user_perms = user_perms or default_perm
-        if not user_perms and user in obj.parent_admin_users:
+        if not user_perms and not user.is_anonymous and user._id in obj.parent_admin_user_ids:
             user_perms = [osf_permissions.READ]
         return user_perms
 
@@ -616,6 +617,17 @@ class NodeSerializer(TaxonomizableSerializerMixin, JSONAPISerializer):
             return False
         return obj.is_contributor_or_group_member(user)
 
+    batched_related_counts = {
+        'get_logs_count': 'get_logs_counts',
+        'get_node_count': 'get_node_counts',
+        'get_wiki_page_count': 'get_wiki_page_counts',
+        'get_node_links_count': 'get_node_links_counts',
+        'get_forks_count': 'get_forks_counts',
+        'get_contrib_count': 'get_contrib_counts',
+        'get_pointers_count': 'get_pointers_counts',
+        'get_unread_comments_count': 'get_unread_comments_counts',
+    }
+
     class Meta:
         type_ = 'nodes'
 
@@ -624,8 +636,113 @@ class NodeSerializer(TaxonomizableSerializerMixin, JSONAPISerializer):
 
     # TODO: See if we can get the count filters into the filter rather than the serializer.
 
+    def count_by_node(self, queryset, node_field, nodes):
+        """
+        Returns {node pk: count} of `queryset` grouped by `node_field`, including zeros for nodes with no rows.
+        """
+        counts = {node.pk: 0 for node in nodes}
+        counts.update(
+            queryset.order_by().values(node_field).annotate(count=Count('pk', distinct=True)).values_list(node_field, 'count'),
+        )
+        return counts
+
+    def get_counters(self, nodes):
+        """
+        Returns {node pk: NodeCounters} for `nodes`, loading each node's counters once per request.
+        """
+        counters = self.context.setdefault('node_counters', {})
+        missing = [node for node in nodes if node.pk not in counters]
+        if missing:
+            counters.update(NodeCounters.objects.get_for_nodes(missing))
+        return counters
+
+    def get_counter(self, nodes, counter):
+        counters = self.get_counters(nodes)
+        return {node.pk: getattr(counters[node.pk], counter) for node in nodes}
+
+    def get_logs_counts(self, nodes):
+        return self.get_counter(nodes, 'log_count')
+
+    def get_contrib_counts(self, nodes):
+        return self.get_counter(nodes, 'contributor_count')
+
+    def get_pointers_counts(self, nodes):
+        return self.get_counter(nodes, 'node_link_count')
+
+    def get_node_counts(self, nodes):
+        """
+        Batched `get_node_count`: counts the direct children of each node that the user has permission to view,
+        checking implicit admin on every node's ancestors through osf_nodeclosure in the same query.
+        """
+        auth = get_user_auth(self.context['request'])
+        user_id = getattr(auth.user, 'id', None)
+        node_ids = [node.pk for node in nodes]
+        counts = dict.fromkeys(node_ids, 0)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                WITH has_admin AS (
+                    SELECT DISTINCT ancestors.node_id
+                    FROM (
+                      SELECT node_id, node_id AS ancestor_id
+                      FROM unnest(%s::int[]) AS nodes (node_id)
+                    UNION ALL
+                      SELECT descendant_id AS node_id, ancestor_id
+                      FROM osf_nodeclosure
+                      WHERE descendant_id = ANY(%s)
+                    ) AS ancestors
+                    INNER JOIN osf_nodegroupobjectpermission AS G ON (G.content_object_id = ancestors.ancestor_id)
+                    INNER JOIN auth_permission AS P ON (P.id = G.permission_id)
+                    INNER JOIN osf_osfuser_groups AS UG ON (G.group_id = UG.group_id)
+                    WHERE P.codename = 'admin_node' AND UG.osfuser_id = %s
+                )
+                SELECT parent_id, COUNT(DISTINCT child_id)
+                FROM
+                  osf_noderelation
+                JOIN osf_abstractnode ON osf_noderelation.child_id = osf_abstractnode.id
+                LEFT JOIN osf_privatelink_nodes ON osf_abstractnode.id = osf_privatelink_nodes.abstractnode_id
+                LEFT JOIN osf_privatelink ON osf_privatelink_nodes.privatelink_id = osf_privatelink.id
+                WHERE parent_id = ANY(%s) AND is_node_link IS FALSE
+                AND osf_abstractnode.is_deleted IS FALSE
+                AND (
+                  osf_abstractnode.is_public
+                  OR parent_id IN (SELECT node_id FROM has_admin)
+                  OR (SELECT EXISTS(
+                      SELECT P.codename
+                      FROM auth_permission AS P
+                      INNER JOIN osf_nodegroupobjectpermission AS G ON (P.id = G.permission_id)
+                      INNER JOIN osf_osfuser_groups AS UG ON (G.group_id = UG.group_id)
+                      WHERE (P.codename = 'read_node'
+                             AND G.content_object_id = osf_abstractnode.id
+                             AND UG.osfuser_id = %s)
+                      )
+                  )
+                  OR (osf_privatelink.key = %s AND osf_privatelink.is_deleted = FALSE)
+                )
+                GROUP BY parent_id;
+            """, [node_ids, node_ids, user_id, node_ids, user_id, auth.private_key],
+            )
+            counts.update(cursor.fetchall())
+        return counts
+
+    def get_wiki_page_counts(self, nodes):
+        return self.get_counter(nodes, 'wiki_page_count')
+
+    def get_node_links_counts(self, nodes):
+        auth = get_user_auth(self.context['request'])
+        linked_nodes = AbstractNode.objects.filter(is_deleted=False).exclude(type='osf.collection').exclude(type='osf.registration')
+        node_links = NodeRelation.objects.filter(
+            parent__in=nodes,
+            is_node_link=True,
+            child__in=linked_nodes.can_view(auth.user, auth.private_link),
+        )
+        return self.count_by_node(node_links, 'parent', nodes)
+
+    def get_forks_counts(self, nodes):
+        return self.get_counter(nodes, 'fork_count')
+
     def get_logs_count(self, obj):
-        return obj.logs.count()
+        return self.get_counters([obj])[obj.pk].log_count
 
     def get_node_count(self, obj):
         """
@@ -686,7 +803,7 @@ class NodeSerializer(TaxonomizableSerializerMixin, JSONAPISerializer):
             return int(cursor.fetchone()[0])
 
     def get_contrib_count(self, obj):
-        return len(obj.contributors)
+        return self.get_counters([obj])[obj.pk].contributor_count
 
     def get_registration_count(self, obj):
         auth = get_user_auth(self.context['request'])
@@ -699,10 +816,10 @@ class NodeSerializer(TaxonomizableSerializerMixin, JSONAPISerializer):
             return obj.draft_registrations_active.count()
 
     def get_pointers_count(self, obj):
-        return obj.linked_nodes.count()
+        return self.get_counters([obj])[obj.pk].node_link_count
 
     def get_wiki_page_count(self, obj):
-        return obj.wikis.filter(deleted__isnull=True).count()
+        return self.get_counters([obj])[obj.pk].wiki_page_count
 
     def get_node_links_count(self, obj):
         auth = get_user_auth(self.context['request'])
@@ -721,7 +838,7 @@ class NodeSerializer(TaxonomizableSerializerMixin, JSONAPISerializer):
         return obj._parents.filter(is_node_link=True, parent__type='osf.registration', parent__retraction__isnull=True).count()
 
     def get_forks_count(self, obj):
-        return obj.forks.exclude(type='osf.registration').exclude(is_deleted=True).count()
+        return self.get_counters([obj])[obj.pk].fork_count
 
     def get_unread_comments_count(self, obj):
         user = get_user_auth(self.context['request']).user
@@ -731,6 +848,13 @@ class NodeSerializer(TaxonomizableSerializerMixin, JSONAPISerializer):
             'node': node_comments,
         }
 
+    def get_unread_comments_counts(self, nodes):
+        user = get_user_auth(self.context['request']).user
+        return {
+            node_id: {'node': count}
+            for node_id, count in Comment.find_n_unread_for_nodes(user, nodes).items()
+        }
+
     def get_region_id(self, obj):
         try:
             # use the annotated value if possible
@@ -49,6 +49,7 @@ from api.base.views import (
     BaseNodeLinksList,
     LinkedNodesRelationship,
     LinkedRegistrationsRelationship,
+    StreamingListMixin,
     WaterButlerMixin,
 )
 from api.base.waffle_decorators import require_flag
@@ -125,7 +126,7 @@ from osf.models import AbstractNode
 from osf.models import (Node, PrivateLink, Institution, Comment, DraftRegistration, Registration, )
 from osf.models import OSFUser
 from osf.models import OSFGroup
-from osf.models import NodeRelation, Guid
+from osf.models import Contributor, NodeRelation, Guid
 from osf.models import BaseFileNode
 from osf.models.files import File, Folder
 from addons.osfstorage.models import Region
@@ -149,12 +150,23 @@ class NodeMixin(object):
     serializer_class = NodeSerializer
     node_lookup_url_kwarg = 'node_id'
 
+    @classmethod
+    def prefetch_embeds(cls, prefetched, view_kwargs_list):
+        """Load the nodes of a page of embedded requests in one query, for `get_node` to find"""
+        node_ids = {kwargs[cls.node_lookup_url_kwarg] for kwargs in view_kwargs_list} - set(prefetched[Node])
+        if node_ids:
+            nodes = Node.objects.filter(guids___id__in=node_ids, is_deleted=False).annotate(
+                region=F('addons_osfstorage_node_settings__region___id'),
+            ).exclude(region=None)
+            prefetched[Node].update((node._id, node) for node in nodes)
+
     def get_node(self, check_object_permissions=True):
         node = None
 
         if self.kwargs.get('is_embedded') is True:
             # If this is an embedded request, the node might be cached somewhere
-            node = self.request.parents[Node].get(self.kwargs[self.node_lookup_url_kwarg])
+            node_id = self.kwargs[self.node_lookup_url_kwarg]
+            node = self.request.parents[Node].get(node_id) or self.request.prefetched[Node].get(node_id)
 
         node_id = self.kwargs[self.node_lookup_url_kwarg]
         if node is None:
@@ -410,8 +422,44 @@ class NodeContributorsList(BaseContributorList, bulk_views.BulkUpdateJSONAPIView
         else:
             return NodeContributorsSerializer
 
+    @classmethod
+    def prefetch_embeds(cls, prefetched, view_kwargs_list):
+        """Load the contributors, and their users, of every node on a page that embeds its contributors"""
+        super(NodeContributorsList, cls).prefetch_embeds(prefetched, view_kwargs_list)
+        contributors = prefetched.setdefault(Contributor, {})
+        node_ids = {
+            prefetched[Node][kwargs[cls.node_lookup_url_kwarg]].id: kwargs[cls.node_lookup_url_kwarg]
+            for kwargs in view_kwargs_list
+            if kwargs[cls.node_lookup_url_kwarg] in prefetched[Node] and kwargs[cls.node_lookup_url_kwarg] not in contributors
+        }
+        if not node_ids:
+            return
+        for node_id in node_ids.values():
+            contributors[node_id] = []
+        for contributor in Contributor.objects.filter(node_id__in=node_ids).select_related('user').include('user__guids').order_by('_order'):
+            contributors[node_ids[contributor.node_id]].append(contributor)
+        prefetched[OSFUser].update(
+            (user._id, user) for user in UserMixin.get_embeddable_users().filter(contributor__node_id__in=node_ids)
+        )
+
+    def get_prefetched_contributors(self):
+        """
+        Contributors loaded by `prefetch_embeds`, or None if this request is not embedded, they weren't
+        prefetched, or the query string filters or sorts them.
+        """
+        if not self.kwargs.get('is_embedded'):
+            return None
+        if any(key.startswith('filter[') or key == 'sort' for key in self.request.query_params):
+            return None
+        return self.request.prefetched.get(Contributor, {}).get(self.kwargs[self.node_lookup_url_kwarg])
+
     # overrides ListBulkCreateJSONAPIView, BulkUpdateJSONAPIView
     def get_queryset(self):
+        contributors = self.get_prefetched_contributors()
+        if contributors is not None:
+            # May raise a permission denied
+            self.get_node()
+            return contributors
         queryset = self.get_queryset_from_request()
         # If bulk request, queryset only contains contributors in request
         if is_bulk_request(self.request):
@@ -1039,7 +1087,7 @@ class NodeLinkedByRegistrationsList(JSONAPIBaseView, generics.ListAPIView, NodeM
         return Registration.objects.filter(id__in=Subquery(node_relation_subquery), retraction__isnull=True).can_view(user=auth.user, private_link=auth.private_link)
 
 
-class NodeFilesList(JSONAPIBaseView, generics.ListAPIView, WaterButlerMixin, ListFilterMixin, NodeMixin):
+class NodeFilesList(StreamingListMixin, JSONAPIBaseView, generics.ListAPIView, WaterButlerMixin, ListFilterMixin, NodeMixin):
     """The documentation for this endpoint can be found [here](https://developer.osf.io/#operation/nodes_files_list).
 
     """
@@ -1467,7 +1515,7 @@ class NodeStorageProviderDetail(JSONAPIBaseView, generics.RetrieveAPIView, NodeM
         return NodeStorageProvider(self.kwargs['provider'], self.get_node())
 
 
-class NodeLogList(JSONAPIBaseView, generics.ListAPIView, NodeMixin, ListFilterMixin):
+class NodeLogList(StreamingListMixin, JSONAPIBaseView, generics.ListAPIView, NodeMixin, ListFilterMixin):
     """The documentation for this endpoint can be found [here](https://developer.osf.io/#operation/nodes_logs_list).
     """
 
@@ -95,8 +95,27 @@ class UserMixin(object):
     serializer_class = UserSerializer
     user_lookup_url_kwarg = 'user_id'
 
+    @classmethod
+    def get_embeddable_users(cls):
+        """Users that embedded requests may be served from `request.prefetched` without further checks"""
+        return OSFUser.objects.filter(date_disabled__isnull=True).annotate(
+            default_region=F('addons_osfstorage_user_settings__default_region___id'),
+        ).exclude(default_region=None)
+
+    @classmethod
+    def prefetch_embeds(cls, prefetched, view_kwargs_list):
+        """Load the users of a page of embedded requests in one query, for `get_user` to find"""
+        user_ids = {kwargs[cls.user_lookup_url_kwarg] for kwargs in view_kwargs_list} - set(prefetched[OSFUser])
+        if user_ids:
+            prefetched[OSFUser].update(
+                (user._id, user) for user in cls.get_embeddable_users().filter(guids___id__in=user_ids)
+            )
+
     def get_user(self, check_permissions=True):
         key = self.kwargs[self.user_lookup_url_kwarg]
+        if self.kwargs.get('is_embedded') is True and key in self.request.prefetched[OSFUser]:
+            return self.request.prefetched[OSFUser][key]
+
         # If Contributor is in self.request.parents,
         # then this view is getting called due to an embedded request (contributor embedding user)
         # We prefer to access the user from the contributor object and take advantage
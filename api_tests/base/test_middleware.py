@@ -1,4 +1,7 @@
 # -*- coding: utf-8 -*-
+import json
+
+from django.db import connection
 from django.http import HttpResponse
 
 from urlparse import urlparse
@@ -9,7 +12,10 @@ from django.test.utils import override_settings
 
 from website.util import api_v2_url
 from api.base import settings
-from api.base.middleware import CorsMiddleware
+from api.base.middleware import CorsMiddleware, InstrumentationMiddleware
+from framework.instrumentation.handlers import QueryBudgetExceeded
+from osf.models import OSFUser
+from website import settings as website_settings
 from tests.base import ApiTestCase
 from osf_tests import factories
 
@@ -113,3 +119,67 @@ class TestCorsMiddleware(MiddlewareTestCase):
         self.middleware.process_request(request)
         self.middleware.process_response(request, response)
         assert_equal(response['Access-Control-Allow-Origin'], domain.geturl())
+
+
+class TestInstrumentationMiddleware(MiddlewareTestCase):
+    MIDDLEWARE = InstrumentationMiddleware
+
+    def request(self, queries):
+        request = self.request_factory.get(api_v2_url('nodes/'))
+        request.resolver_match = mock.Mock(view_name='nodes:node-list')
+        self.middleware.process_request(request)
+        self.middleware.process_view(request, None, (), {})
+        for _ in range(queries):
+            OSFUser.objects.count()
+        return request
+
+    @mock.patch('framework.instrumentation.handlers.logger')
+    def test_sampled_requests_are_logged(self, mock_logger):
+        with mock.patch.object(website_settings, 'INSTRUMENTATION_SAMPLE_RATE', 1):
+            request = self.request(queries=2)
+            self.middleware.process_response(request, HttpResponse(status=200))
+        logged = json.loads(mock_logger.info.call_args[0][0])
+        assert_equal(logged['view'], 'nodes:node-list')
+        assert_equal(logged['method'], 'GET')
+        assert_equal(logged['status'], 200)
+        assert_equal(logged['queries'], 2)
+
+    @mock.patch('framework.instrumentation.handlers.logger')
+    def test_queries_are_counted_without_the_debug_cursor(self, mock_logger):
+        queries_logged = len(connection.queries_log)
+        with mock.patch.object(website_settings, 'INSTRUMENTATION_SAMPLE_RATE', 1):
+            request = self.request(queries=1)
+            assert_false(connection.queries_logged)
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            self.middleware.process_response(request, HttpResponse(status=200))
+        logged = json.loads(mock_logger.info.call_args[0][0])
+        assert_equal(logged['queries'], 2)
+        assert_equal(len(connection.queries_log), queries_logged)
+        # Cursors made after the request are no longer counted
+        assert_not_in('make_cursor', connection.__dict__)
+
+    @mock.patch('framework.instrumentation.handlers.logger')
+    def test_unsampled_requests_are_not_logged(self, mock_logger):
+        with mock.patch.object(website_settings, 'INSTRUMENTATION_SAMPLE_RATE', 0):
+            request = self.request(queries=2)
+            self.middleware.process_response(request, HttpResponse(status=200))
+        assert_false(mock_logger.info.called)
+
+    def test_query_budget_exceeded(self):
+        with mock.patch.object(website_settings, 'QUERY_BUDGETS', {'nodes:node-list': 1}), \
+                mock.patch.object(website_settings, 'QUERY_BUDGET_RAISE', True):
+            request = self.request(queries=1)
+            self.middleware.process_response(request, HttpResponse(status=200))
+            request = self.request(queries=2)
+            with assert_raises(QueryBudgetExceeded):
+                self.middleware.process_response(request, HttpResponse(status=200))
+
+    @mock.patch('framework.instrumentation.handlers.logger')
+    def test_query_budget_exceeded_warning(self, mock_logger):
+        with mock.patch.object(website_settings, 'QUERY_BUDGETS', {'nodes:node-list': 1}), \
+                mock.patch.object(website_settings, 'QUERY_BUDGET_RAISE', False):
+            request = self.request(queries=2)
+            self.middleware.process_response(request, HttpResponse(status=200))
+        assert_true(mock_logger.warning.called)
+        assert_true(mock_logger.info.called)
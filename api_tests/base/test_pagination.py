@@ -1,4 +1,7 @@
 # -*- coding: utf-8 -*-
+import json
+from base64 import urlsafe_b64encode
+
 from nose.tools import *  # noqa:
 
 from osf_tests import factories
@@ -6,6 +9,7 @@ from tests.base import ApiTestCase
 
 from api.base import settings
 from api.base.pagination import MaxSizePagination
+from osf.models import AbstractNode
 
 
 class TestMaxPagination(ApiTestCase):
@@ -54,3 +58,68 @@ class TestJSONAPIPagination(ApiTestCase):
         assert_not_in('meta', links)
         assert_in('total', meta)
         assert_in('per_page', meta)
+
+
+class TestJSONAPICursorPagination(ApiTestCase):
+
+    def setUp(self):
+        super(TestJSONAPICursorPagination, self).setUp()
+        self.user = factories.AuthUserFactory()
+        self.projects = [factories.ProjectFactory(creator=self.user) for _ in range(0, 5)]
+        # Share a modified date so the primary key has to break ties
+        AbstractNode.objects.filter(id__in=[self.projects[1].id, self.projects[2].id]).update(
+            modified=self.projects[1].modified
+        )
+        self.url = '/{}nodes/?version=2.1&page[size]=2&page[cursor]='.format(settings.API_BASE)
+
+    def expected_ids(self):
+        return list(
+            AbstractNode.objects.filter(id__in=[project.id for project in self.projects])
+            .order_by('-modified', '-id').values_list('guids___id', flat=True)
+        )
+
+    def walk(self, url, link):
+        pages = []
+        while url:
+            res = self.app.get(url, auth=self.user.auth)
+            assert_equal(res.status_code, 200)
+            pages.append([each['id'] for each in res.json['data']])
+            url = res.json['links'][link]
+        return pages
+
+    def test_walks_forward_through_every_node(self):
+        res = self.app.get(self.url, auth=self.user.auth)
+        assert_is_none(res.json['links']['first'])
+        assert_is_none(res.json['links']['prev'])
+        assert_is_none(res.json['links']['last'])
+        assert_is_none(res.json['meta']['total'])
+        assert_equal(res.json['meta']['per_page'], 2)
+
+        pages = self.walk(self.url, 'next')
+        assert_equal([len(page) for page in pages], [2, 2, 1])
+        assert_equal(sum(pages, []), self.expected_ids())
+
+    def test_walks_backward_from_the_last_page(self):
+        url = self.url
+        while url:
+            res = self.app.get(url, auth=self.user.auth)
+            url = res.json['links']['next']
+        assert_is_not_none(res.json['links']['first'])
+        last_page = [each['id'] for each in res.json['data']]
+
+        pages = self.walk(res.json['links']['prev'], 'prev')
+        assert_equal(sum(reversed(pages), []) + last_page, self.expected_ids())
+
+    def test_total_is_opt_in(self):
+        res = self.app.get(self.url + '&page[total]=true', auth=self.user.auth)
+        assert_equal(res.json['meta']['total'], 5)
+
+    def test_invalid_cursor(self):
+        res = self.app.get(self.url + 'notacursor', auth=self.user.auth, expect_errors=True)
+        assert_equal(res.status_code, 404)
+
+    def test_cursor_with_invalid_position(self):
+        for position in ({'modified': '2019-01-01T00:00:00', 'id': 'x'}, {'modified': 'yesterday', 'id': 1}):
+            cursor = urlsafe_b64encode(json.dumps({'backwards': False, 'position': position}))
+            res = self.app.get(self.url + cursor, auth=self.user.auth, expect_errors=True)
+            assert_equal(res.status_code, 404)
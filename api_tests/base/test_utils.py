@@ -3,11 +3,13 @@ from nose.tools import *  # noqa:
 import mock  # noqa
 import unittest
 
+from django.core.urlresolvers import NoReverseMatch
 from rest_framework import fields
 from rest_framework.exceptions import ValidationError
 from api.base import utils as api_utils
 
 from framework.status import push_status_message
+from website import util as website_util
 
 
 class TestTruthyFalsy:
@@ -22,6 +24,65 @@ class TestTruthyFalsy:
         assert_equal(api_utils.FALSY, fields.BooleanField.FALSE_VALUES)
 
 
+class TestAbsoluteReverse(unittest.TestCase):
+
+    def setUp(self):
+        super(TestAbsoluteReverse, self).setUp()
+        api_utils._url_templates.clear()
+
+    def reverse(self, view_name, kwargs, query_kwargs=None):
+        return website_util.api_v2_url(api_utils.reverse(view_name, kwargs=kwargs), params=query_kwargs, base_prefix='')
+
+    def test_matches_reverse(self):
+        for kwargs in ({'node_id': 'abc12', 'version': 'v2'}, {'node_id': 'def34', 'version': 'v2'}):
+            for _ in range(2):
+                assert_equal(
+                    api_utils.absolute_reverse('nodes:node-detail', kwargs=kwargs),
+                    self.reverse('nodes:node-detail', kwargs)
+                )
+        assert_equal(
+            api_utils.absolute_reverse('nodes:node-contributor-detail', kwargs={'node_id': 'abc12', 'user_id': 'xyz98', 'version': 'v2'}),
+            self.reverse('nodes:node-contributor-detail', {'node_id': 'abc12', 'user_id': 'xyz98', 'version': 'v2'})
+        )
+
+    def test_query_kwargs(self):
+        query_kwargs = {'view_only': 'key', 'filter[name]': 'a b'}
+        kwargs = {'node_id': 'abc12', 'version': 'v2'}
+        api_utils.absolute_reverse('nodes:node-detail', kwargs=kwargs)
+        assert_equal(
+            api_utils.absolute_reverse('nodes:node-detail', kwargs=kwargs, query_kwargs=query_kwargs),
+            self.reverse('nodes:node-detail', kwargs, query_kwargs=query_kwargs)
+        )
+
+    def test_version_is_part_of_template(self):
+        api_utils.absolute_reverse('nodes:node-detail', kwargs={'node_id': 'abc12', 'version': 'v2'})
+        with assert_raises(NoReverseMatch):
+            api_utils.absolute_reverse('nodes:node-detail', kwargs={'node_id': 'abc12', 'version': 'v3'})
+
+    def test_falls_back_to_reverse(self):
+        kwargs = {'node_id': 'abc12', 'provider': 'osfstorage', 'path': '/a b/c%d', 'version': 'v2'}
+        assert_equal(
+            api_utils.absolute_reverse('nodes:node-storage-provider-detail', kwargs={'node_id': 'abc12', 'provider': 'osfstorage', 'version': 'v2'}),
+            self.reverse('nodes:node-storage-provider-detail', {'node_id': 'abc12', 'provider': 'osfstorage', 'version': 'v2'})
+        )
+        assert_equal(
+            api_utils.absolute_reverse('nodes:node-files', kwargs=kwargs),
+            self.reverse('nodes:node-files', kwargs)
+        )
+        with assert_raises(NoReverseMatch):
+            api_utils.absolute_reverse('nodes:node-detail', kwargs={'node_id': 'not-a-guid', 'version': 'v2'})
+
+    def test_extend_querystring_params(self):
+        assert_equal(
+            api_utils.extend_querystring_params('http://localhost:8000/v2/nodes/abc12/', {'view_only': 'key'}),
+            'http://localhost:8000/v2/nodes/abc12/?view_only=key'
+        )
+        assert_equal(
+            api_utils.extend_querystring_params('http://localhost:8000/v2/nodes/abc12/?view_only=key', {'view_only': 'other'}),
+            'http://localhost:8000/v2/nodes/abc12/?view_only=other'
+        )
+
+
 class TestIsDeprecated(unittest.TestCase):
 
     def setUp(self):
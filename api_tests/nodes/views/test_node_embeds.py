@@ -156,3 +156,28 @@ class TestNodeEmbeds:
         res = app.get(url, auth=write_contrib_one.auth)
         assert res.status_code == 200
         assert res.json['data']['embeds']['contributors']['meta']['total_bibliographic'] == 3
+
+    def test_node_list_embeds(
+            self, app, user, write_contrib_one,
+            write_contribs, subchild, root_node,
+            child_one, child_two):
+
+        #   test_embed_parent_and_contributors_on_list
+        url = '/{}users/{}/nodes/?embed=parent&embed=contributors'.format(API_BASE, write_contrib_one._id)
+        res = app.get(url, auth=write_contrib_one.auth)
+        assert res.status_code == 200
+        nodes = {node['id']: node for node in res.json['data']}
+        assert set(nodes) == {root_node._id, child_one._id, subchild._id}
+
+        assert 'parent' not in nodes[root_node._id]['embeds']
+        assert nodes[child_one._id]['embeds']['parent']['data']['id'] == root_node._id
+        # child_two is private and write_contrib_one isn't a contributor on it
+        assert nodes[subchild._id]['embeds']['parent']['errors'][0]['detail'] == exceptions.PermissionDenied.default_detail
+
+        contributors = nodes[child_one._id]['embeds']['contributors']
+        assert [contrib['id'] for contrib in contributors['data']] == [
+            '{}-{}'.format(child_one._id, contrib._id) for contrib in child_one.contributors
+        ]
+        assert contributors['links']['meta']['total_bibliographic'] == 3
+        assert contributors['data'][0]['embeds']['users']['data']['id'] == user._id
+        assert nodes[subchild._id]['embeds']['contributors']['links']['meta']['total'] == 1
@@ -12,6 +12,7 @@ from osf.utils.sanitize import strip_html
 from osf.utils import permissions
 from osf_tests.factories import (
     CollectionFactory,
+    CommentFactory,
     ProjectFactory,
     NodeFactory,
     RegistrationFactory,
@@ -308,6 +309,33 @@ class TestNodeList:
         assert res.json['data'][0]['attributes']['current_user_is_contributor'] is False
         assert res.json['data'][0]['attributes']['current_user_is_contributor_or_group_member'] is False
 
+    def test_related_counts_are_batched(self, app, user, non_contrib, public_project, url):
+        other_project = ProjectFactory(is_public=True, creator=user)
+        NodeFactory(parent=public_project, is_public=True)
+        NodeFactory(parent=public_project, is_public=False)
+        NodeFactory(parent=public_project, is_public=False, creator=non_contrib)
+        public_project.add_node_link(other_project, auth=Auth(user), save=True)
+        public_project.add_node_link(ProjectFactory(), auth=Auth(user), save=True)
+        public_project.fork_node(auth=Auth(user))
+        CommentFactory(node=public_project, user=non_contrib)
+
+        counted = ['children', 'forks', 'logs', 'wikis', 'linked_nodes', 'comments']
+        query = '?related_counts={}&filter[id]={},{}'.format(
+            ','.join(counted), public_project._id, other_project._id
+        )
+        for auth in (user.auth, non_contrib.auth, None):
+            res = app.get(url + query, auth=auth)
+            assert res.status_code == 200
+            assert len(res.json['data']) == 2
+            for node in res.json['data']:
+                # The detail view computes each count for its node alone
+                detail = app.get('{}{}/?related_counts={}'.format(url, node['id'], ','.join(counted)), auth=auth)
+                for field in counted:
+                    assert (
+                        node['relationships'][field]['links']['related']['meta'] ==
+                        detail.json['data']['relationships'][field]['links']['related']['meta']
+                    ), field
+
 
 @pytest.mark.django_db
 @pytest.mark.enable_quickfiles_creation
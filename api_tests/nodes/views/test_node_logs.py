@@ -1,9 +1,17 @@
+import json
+
+import mock
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from dateutil.parser import parse as parse_date
 
+from api.base import settings as api_settings
 from api.base.settings.defaults import API_BASE
+from api.logs.serializers import NodeLogSerializer
 from framework.auth.core import Auth
+from framework.instrumentation.handlers import current_metrics
 from osf_tests.factories import (
     AuthUserFactory,
     ProjectFactory,
@@ -11,9 +19,11 @@ from osf_tests.factories import (
     RegistrationFactory,
     EmbargoFactory,
 )
+from osf.utils import permission_cache
 from osf.utils.permissions import READ
 from tests.base import assert_datetime_equal
 from api_tests.utils import disconnected_from_listeners
+from website import settings as website_settings
 from website.project.signals import contributor_removed
 
 API_LATEST = 0
@@ -334,3 +344,72 @@ class TestNodeLogFiltering(TestNodeLogList):
         assert res.status_code == 200
         assert len(res.json['data']) == 1
         assert res.json['data'][API_LATEST]['attributes']['action'] == 'project_created'
+
+
+@pytest.mark.django_db
+class TestNodeLogListStreaming:
+
+    @pytest.fixture()
+    def public_project(self, user):
+        project = ProjectFactory(is_public=True, creator=user)
+        for tag in ('one', 'two', 'three', 'four'):
+            project.add_tag(tag, auth=Auth(user))
+        return project
+
+    @pytest.fixture()
+    def url(self, public_project):
+        return '/{}nodes/{}/logs/?page[size]=4&version=2.2'.format(API_BASE, public_project._id)
+
+    def test_streamed_in_chunks(self, app, user, url):
+        with mock.patch.object(api_settings, 'STREAM_LIST_RESPONSES', False):
+            rendered = app.get(url, auth=user.auth)
+
+        with mock.patch.object(api_settings, 'STREAMING_LIST_CHUNK_SIZE', 3):
+            streamed = app.get(url, auth=user.auth)
+
+        assert streamed.status_code == 200
+        assert streamed.content_type == 'application/vnd.api+json'
+        assert len(streamed.json['data']) == 4
+        assert streamed.json == rendered.json
+        assert streamed.json['meta']['total'] == 5
+        assert streamed.json['links']['next']
+
+    def test_chunks_are_serialized_within_the_request(self, app, user, url):
+        chunk_contexts = []
+        get_params = NodeLogSerializer.get_params
+
+        def get_params_with_context(serializer, obj):
+            # Every log checks the same node, so all but the first lookup should hit the cache
+            obj.node.has_permission(serializer.context['request'].user, READ)
+            chunk_contexts.append((permission_cache.get_cache() is not None, current_metrics() is not None))
+            return get_params(serializer, obj)
+
+        teardown_stats = []
+        teardown = permission_cache.permission_cache_teardown_request
+
+        def permission_cache_teardown_request(error=None):
+            teardown_stats.append(permission_cache.stats())
+            teardown(error)
+
+        with mock.patch.object(api_settings, 'STREAMING_LIST_CHUNK_SIZE', 1), \
+                mock.patch.object(NodeLogSerializer, 'get_params', get_params_with_context), \
+                mock.patch('api.base.middleware.permission_cache_teardown_request', permission_cache_teardown_request), \
+                mock.patch.object(website_settings, 'INSTRUMENTATION_SAMPLE_RATE', 1), \
+                mock.patch('framework.instrumentation.handlers.logger') as mock_logger, \
+                CaptureQueriesContext(connection) as queries:
+            res = app.get(url, auth=user.auth)
+
+        assert res.status_code == 200
+        assert len(res.json['data']) == 4
+        assert chunk_contexts == [(True, True)] * 4
+        assert teardown_stats[0]['hits'] >= 3
+        logged = json.loads(mock_logger.info.call_args[0][0])
+        assert logged['queries'] == len(queries)
+
+    def test_embedded_lists_are_not_streamed(self, app, user, public_project):
+        url = '/{}nodes/{}/?embed=logs'.format(API_BASE, public_project._id)
+        with mock.patch.object(api_settings, 'STREAMING_LIST_CHUNK_SIZE', 1):
+            res = app.get(url, auth=user.auth)
+
+        assert res.status_code == 200
+        assert len(res.json['data']['embeds']['logs']['data']) == 5
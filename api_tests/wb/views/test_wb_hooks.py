@@ -5,7 +5,6 @@ import pytest
 from addons.osfstorage.models import OsfStorageFolder
 from framework.auth import signing
 
-from api.caching.tasks import update_storage_usage_cache
 
 from osf_tests.factories import (
     AuthUserFactory,
@@ -330,14 +329,14 @@ class TestMove():
 
     def test_storage_usage_move_within_node(self, app, node, signed_payload, move_url):
         """
-        Checking moves within a node, since the net value hasn't changed the cache will remain expired at None.
+        Checking moves within a node, since the net value hasn't changed the storage usage stays the same.
         """
-        assert node.storage_usage is None
+        assert node.storage_usage == 1337
 
         res = app.post_json(move_url, signed_payload)
 
         assert res.status_code == 200
-        assert node.storage_usage is None  # this is intentional, the cache shouldn't be touched
+        assert node.storage_usage == 1337
 
     def test_storage_usage_move_between_nodes(self, app, node, node_two, file, root_node, user, node_two_root_node, move_url):
         """
@@ -345,8 +344,8 @@ class TestMove():
         changed.
         """
 
-        assert node.storage_usage is None  # the cache starts expired, but there is 1337 bytes in there
-        assert node_two.storage_usage is None  # zero bytes here
+        assert node.storage_usage == 1337
+        assert node_two.storage_usage == 0
 
         signed_payload = sign_payload(
             {
@@ -363,7 +362,7 @@ class TestMove():
         res = app.post_json(move_url, signed_payload)
         assert res.status_code == 200
 
-        assert node.storage_usage is None
+        assert node.storage_usage == 0
         assert node_two.storage_usage == 1337
 
 
@@ -846,7 +845,7 @@ class TestCopy():
         """
         Checking copys within a node, since the net size will double the storage usage should be the file size * 2
         """
-        assert node.storage_usage is None
+        assert node.storage_usage == 1337
 
         res = app.post_json(copy_url, signed_payload)
 
@@ -858,8 +857,8 @@ class TestCopy():
         Checking storage usage when copying files to outside a node means only the destination should be recalculated.
         """
 
-        assert node.storage_usage is None  # The node cache starts expired, but there is 1337 bytes in there
-        assert node_two.storage_usage is None  # There are zero bytes in node_two
+        assert node.storage_usage == 1337
+        assert node_two.storage_usage == 0
 
         signed_payload = sign_payload(
             {
@@ -876,11 +875,7 @@ class TestCopy():
         res = app.post_json(copy_url, signed_payload)
         assert res.status_code == 201
 
-        # The node cache is None because it's value should be unchanged --
-        assert node.storage_usage is None
-
-        # But there's really 1337 bytes in the node
-        update_storage_usage_cache(node._id)
+        # The source is unchanged
         assert node.storage_usage == 1337
 
         # And we have exactly 1337 bytes copied in node_two
@@ -49,11 +49,25 @@ def override_settings():
     website_settings.BCRYPT_LOG_ROUNDS = 1
     # Make sure we don't accidentally send any emails
     website_settings.SENDGRID_API_KEY = None
+    # Search migration and digest workers can't see data in the test's transaction
+    website_settings.SEARCH_MIGRATION_PROCESSES = 1
+    website_settings.NOTIFICATION_DIGEST_WORKERS = 1
+    # Fail tests of views that go over their query budget
+    website_settings.QUERY_BUDGET_RAISE = True
     # Set this here instead of in SILENT_LOGGERS, in case developers
     # call setLevel in local.py
     logging.getLogger('website.mails.mails').setLevel(logging.CRITICAL)
 
 
+@pytest.fixture(autouse=True)
+def _clear_session_caches():
+    """Sessions are cached outside of the database, so don't let them outlive the test's transaction"""
+    yield
+    from osf.models.session import _caches
+    for cache, _ in _caches():
+        cache.clear()
+
+
 @pytest.fixture()
 def fake():
     return Factory.create()
@@ -2,15 +2,13 @@
 
 import logging
 
-from framework.celery_tasks import app
-from framework.postcommit_tasks.handlers import run_postcommit
-
 logger = logging.getLogger(__name__)
 
 
-@run_postcommit(once_per_request=False, celery=True)
-@app.task(max_retries=5, default_retry_delay=60)
 def increment_user_activity_counters(user_id, action, date_string):
+    """Count an action by the user. Counts are buffered and added up by
+    `framework.analytics.tasks.flush_user_activity_counters`.
+    """
     from osf.models import UserActivityCounter
     return UserActivityCounter.increment(user_id, action, date_string)
 
@@ -32,3 +30,8 @@ def update_counter(page, node_info=None):
 def get_basic_counters(page):
     from osf.models import PageCounter
     return PageCounter.get_basic_counters(page)
+
+
+def get_page_totals(pages):
+    from osf.models import PageCounter
+    return PageCounter.get_page_totals(pages)
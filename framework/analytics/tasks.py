@@ -0,0 +1,37 @@
+# encoding: utf-8
+
+import logging
+
+from framework.celery_tasks import app
+
+logger = logging.getLogger(__name__)
+
+
+def _flush(flush_increments, batch_size, max_batches):
+    flushed = 0
+    for _ in range(max_batches):
+        batch = flush_increments(batch_size=batch_size)
+        flushed += batch
+        if batch < batch_size:
+            break
+    return flushed
+
+
+@app.task(name='framework.analytics.tasks.flush_page_counters')
+def flush_page_counters(batch_size=10000, max_batches=100):
+    """Add the visits buffered in PageCounterIncrement to their page counters"""
+    from osf.models import PageCounter
+    flushed = _flush(PageCounter.flush_increments, batch_size, max_batches)
+    if flushed:
+        logger.info('Flushed {} page counter increments'.format(flushed))
+    return flushed
+
+
+@app.task(name='framework.analytics.tasks.flush_user_activity_counters')
+def flush_user_activity_counters(batch_size=10000, max_batches=100):
+    """Add the actions buffered in UserActivityIncrement to their users' activity counters"""
+    from osf.models import UserActivityCounter
+    flushed = _flush(UserActivityCounter.flush_increments, batch_size, max_batches)
+    if flushed:
+        logger.info('Flushed {} user activity increments'.format(flushed))
+    return flushed
@@ -1,5 +1,6 @@
 import smtplib
 import logging
+import collections
 from email.mime.text import MIMEText
 
 from framework.celery_tasks import app
@@ -58,7 +59,7 @@ def send_email(from_addr, to_addr, subject, message, mimetype='html', ttls=True,
         )
 
 
-def _send_with_smtp(from_addr, to_addr, subject, message, mimetype='html', ttls=True, login=True, username=None, password=None):
+def _send_with_smtp(from_addr, to_addr, subject, message, mimetype='html', ttls=True, login=True, username=None, password=None, smtp=None):
     username = username or settings.MAIL_USERNAME
     password = password or settings.MAIL_PASSWORD
 
@@ -71,6 +72,18 @@ def _send_with_smtp(from_addr, to_addr, subject, message, mimetype='html', ttls=
     msg['From'] = from_addr
     msg['To'] = to_addr
 
+    s = smtp or _smtp_connect(ttls=ttls, login=login, username=username, password=password)
+    s.sendmail(
+        from_addr=from_addr,
+        to_addrs=[to_addr],
+        msg=msg.as_string()
+    )
+    if smtp is None:
+        s.quit()
+    return True
+
+
+def _smtp_connect(ttls=True, login=True, username=None, password=None):
     s = smtplib.SMTP(settings.MAIL_SERVER)
     s.ehlo()
     if ttls:
@@ -78,13 +91,81 @@ def _send_with_smtp(from_addr, to_addr, subject, message, mimetype='html', ttls=
         s.ehlo()
     if login:
         s.login(username, password)
-    s.sendmail(
-        from_addr=from_addr,
-        to_addrs=[to_addr],
-        msg=msg.as_string()
-    )
-    s.quit()
-    return True
+    return s
+
+
+class MailConnectionPool(object):
+    """Keeps mail connections open across sends, for sending many emails at once (e.g. digests).
+
+    `send_email` takes the same arguments as the `send_email` task, so it can be passed to
+    `website.mails.send_mail` as the mailer. It is safe to call from several threads; every call uses
+    an SMTP connection no other thread is using. Call `close` when done.
+    """
+
+    def __init__(self):
+        self._sendgrid_client = None
+        self._idle_smtp = collections.defaultdict(list)
+
+    def send_email(self, from_addr, to_addr, subject, message, mimetype='html', ttls=True, login=True,
+                   username=None, password=None, categories=None, attachment_name=None, attachment_content=None):
+        if not settings.USE_EMAIL:
+            return
+        if settings.SENDGRID_API_KEY:
+            if self._sendgrid_client is None:
+                self._sendgrid_client = sendgrid.SendGridClient(settings.SENDGRID_API_KEY)
+            return _send_with_sendgrid(
+                from_addr=from_addr,
+                to_addr=to_addr,
+                subject=subject,
+                message=message,
+                mimetype=mimetype,
+                categories=categories,
+                attachment_name=attachment_name,
+                attachment_content=attachment_content,
+                client=self._sendgrid_client,
+            )
+
+        username = username or settings.MAIL_USERNAME
+        password = password or settings.MAIL_PASSWORD
+        key = (ttls, login, username, password)
+        kwargs = dict(
+            from_addr=from_addr,
+            to_addr=to_addr,
+            subject=subject,
+            message=message,
+            mimetype=mimetype,
+            ttls=ttls,
+            login=login,
+            username=username,
+            password=password,
+        )
+        if login and (username is None or password is None):
+            return _send_with_smtp(**kwargs)
+
+        try:
+            smtp = self._idle_smtp[key].pop()
+        except IndexError:
+            smtp = _smtp_connect(ttls=ttls, login=login, username=username, password=password)
+        try:
+            try:
+                ret = _send_with_smtp(smtp=smtp, **kwargs)
+            except smtplib.SMTPServerDisconnected:
+                # Idle connections get closed by the server, reconnect once
+                smtp = _smtp_connect(ttls=ttls, login=login, username=username, password=password)
+                ret = _send_with_smtp(smtp=smtp, **kwargs)
+        except Exception:
+            smtp.close()
+            raise
+        self._idle_smtp[key].append(smtp)
+        return ret
+
+    def close(self):
+        for connections in self._idle_smtp.values():
+            while connections:
+                try:
+                    connections.pop().quit()
+                except smtplib.SMTPException:
+                    pass
 
 
 def _send_with_sendgrid(from_addr, to_addr, subject, message, mimetype='html', categories=None, attachment_name=None, attachment_content=None, client=None):
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""Per-request instrumentation for both the API and the Flask app.
+
+Every request records its view, status, duration, SQL query count and time, time spent serializing
+and time spent in postcommit tasks. A sample of requests (plus every slow or over-budget request)
+is logged as one JSON line to the ``framework.instrumentation`` logger, ready for log-based metrics.
+
+Views can have query budgets in ``settings.QUERY_BUDGETS``. Going over budget is logged as a warning,
+or raises `QueryBudgetExceeded` if ``settings.QUERY_BUDGET_RAISE`` is set, as it is in tests.
+"""
+import contextlib
+import json
+import logging
+import random
+import threading
+import time
+
+from django.db import connections
+from flask import request
+
+from framework.postcommit_tasks.handlers import postcommit_stats
+from website import settings
+
+_local = threading.local()
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def current_metrics():
+    """The metrics of the request being handled, or None outside of requests."""
+    return getattr(_local, 'metrics', None)
+
+
+class CountingCursorWrapper(object):
+    """Wraps a cursor to add the number and duration of the queries it runs to `metrics`. Unlike
+    django's debug cursor it keeps no SQL around, so it is cheap enough for every request.
+    """
+
+    def __init__(self, cursor, metrics):
+        # Not `cursor`, which callers use to get at the underlying DB-API cursor
+        self.wrapped = cursor
+        self.metrics = metrics
+
+    def __getattr__(self, attr):
+        return getattr(self.wrapped, attr)
+
+    def __iter__(self):
+        return iter(self.wrapped)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        return self.wrapped.__exit__(type, value, traceback)
+
+    @contextlib.contextmanager
+    def _counted(self):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.metrics['queries'] += 1
+            self.metrics['db_time'] += time.time() - start
+
+    def execute(self, sql, params=None):
+        with self._counted():
+            return self.wrapped.execute(sql, params)
+
+    def executemany(self, sql, param_list):
+        with self._counted():
+            return self.wrapped.executemany(sql, param_list)
+
+    def callproc(self, procname, params=None):
+        with self._counted():
+            return self.wrapped.callproc(procname, params)
+
+
+# The DatabaseWrapper methods that wrap new cursors, for plain and debug (DEBUG = True) cursors
+CURSOR_FACTORIES = ('make_cursor', 'make_debug_cursor')
+
+
+def _count_queries(connection, metrics):
+    """Have every cursor `connection` makes count its queries into `metrics` until `_stop_counting_queries`."""
+    originals = {}
+    for name in CURSOR_FACTORIES:
+        originals[name] = connection.__dict__.get(name)
+        make_cursor = getattr(connection, name)
+        setattr(connection, name, lambda cursor, make_cursor=make_cursor: CountingCursorWrapper(make_cursor(cursor), metrics))
+    return originals
+
+
+def _stop_counting_queries(connection, originals):
+    for name, original in originals.items():
+        if original is None:
+            connection.__dict__.pop(name, None)
+        else:
+            setattr(connection, name, original)
+
+
+def instrumentation_before_request():
+    if not settings.INSTRUMENTATION_ENABLED:
+        _local.metrics = None
+        return
+    metrics = {
+        'start': time.time(),
+        'view': None,
+        'method': None,
+        'status': None,
+        'timings': {},
+        'active': set(),
+        'queries': 0,
+        'db_time': 0.0,
+        'cursor_factories': {},
+    }
+    for connection in connections.all():
+        metrics['cursor_factories'][connection.alias] = _count_queries(connection, metrics)
+    _local.metrics = metrics
+
+
+@contextlib.contextmanager
+def timed(name):
+    """Add the time spent in the block to the request's `name` timing. Nested blocks with the
+    same name (e.g. an embedded view serializing within a serializer) are only counted once.
+    """
+    metrics = current_metrics()
+    if metrics is None or name in metrics['active']:
+        yield
+        return
+    metrics['active'].add(name)
+    start = time.time()
+    try:
+        yield
+    finally:
+        metrics['active'].discard(name)
+        metrics['timings'][name] = metrics['timings'].get(name, 0) + time.time() - start
+
+
+def set_view(view, method=None, status=None):
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics['view'] = view or metrics['view']
+        metrics['method'] = method or metrics['method']
+        metrics['status'] = status or metrics['status']
+
+
+def _collect_queries(metrics):
+    for connection in connections.all():
+        if connection.alias in metrics['cursor_factories']:
+            _stop_counting_queries(connection, metrics['cursor_factories'][connection.alias])
+    return metrics['queries'], metrics['db_time']
+
+
+def get_query_budget(view):
+    return settings.QUERY_BUDGETS.get(view, settings.QUERY_BUDGET_DEFAULT)
+
+
+def instrumentation_teardown_request(error=None):
+    metrics = current_metrics()
+    if metrics is None:
+        return
+    _local.metrics = None
+    queries, db_time = _collect_queries(metrics)
+    duration = time.time() - metrics['start']
+    budget = get_query_budget(metrics['view'])
+    over_budget = budget is not None and queries > budget
+
+    if over_budget or duration > settings.INSTRUMENTATION_SLOW_REQUEST_THRESHOLD or random.random() < settings.INSTRUMENTATION_SAMPLE_RATE:
+        logger.info(json.dumps({
+            'view': metrics['view'],
+            'method': metrics['method'],
+            'status': metrics['status'],
+            'duration': round(duration, 4),
+            'queries': queries,
+            'db_time': round(db_time, 4),
+            'serializer_time': round(metrics['timings'].get('serializer', 0), 4),
+            'postcommit_time': round(sum(task_duration for _, task_duration in postcommit_stats()['timings']), 4),
+            'query_budget': budget,
+        }, sort_keys=True))
+
+    if over_budget:
+        message = '{} ran {} queries, over its budget of {}'.format(metrics['view'], queries, budget)
+        if settings.QUERY_BUDGET_RAISE:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+def instrumentation_after_request(response):
+    set_view(request.url_rule.endpoint if request.url_rule else None, request.method, response.status_code)
+    return response
+
+
+handlers = {
+    'before_request': instrumentation_before_request,
+    'after_request': instrumentation_after_request,
+    'teardown_request': instrumentation_teardown_request,
+}
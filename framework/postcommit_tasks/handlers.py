@@ -3,13 +3,16 @@ import functools
 import hashlib
 import logging
 import threading
+import time
 
 import binascii
 from collections import OrderedDict
 import os
 
+from celery import group
 from celery.canvas import Signature
 from celery.local import PromiseProxy
+import gevent
 from gevent.pool import Pool
 from flask import _app_ctx_stack as context_stack
 
@@ -18,6 +21,25 @@ from website import settings
 _local = threading.local()
 logger = logging.getLogger(__name__)
 
+_pool = None
+
+def postcommit_pool():
+    """The greenlet pool shared by every request's postcommit tasks, so the number of
+    concurrent tasks (and db connections) is bounded per process rather than per request.
+    """
+    global _pool
+    if _pool is None:
+        _pool = Pool(settings.POSTCOMMIT_POOL_SIZE)
+    return _pool
+
+def postcommit_stats():
+    """Per-request counters: tasks deduplicated by key at enqueue time and the
+    duration in seconds of each task run.
+    """
+    if not hasattr(_local, 'postcommit_stats'):
+        _local.postcommit_stats = {'deduplicated': 0, 'timings': []}
+    return _local.postcommit_stats
+
 def postcommit_queue():
     if not hasattr(_local, 'postcommit_queue'):
         _local.postcommit_queue = OrderedDict()
@@ -31,6 +53,38 @@ def postcommit_celery_queue():
 def postcommit_before_request():
     _local.postcommit_queue = OrderedDict()
     _local.postcommit_celery_queue = OrderedDict()
+    _local.postcommit_stats = {'deduplicated': 0, 'timings': []}
+
+def _task_name(func):
+    if isinstance(func, Signature):
+        return func.task
+    func = getattr(func, 'func', func)  # unwrap functools.partial
+    return '{}.{}'.format(func.__module__, getattr(func, '__name__', type(func).__name__))
+
+def _run_timed(func, timings):
+    start = time.time()
+    try:
+        return func()
+    finally:
+        duration = time.time() - start
+        timings.append((_task_name(func), duration))
+        if duration > settings.POSTCOMMIT_SLOW_TASK_THRESHOLD:
+            logger.warning('Postcommit task {} took {:.3f}s'.format(_task_name(func), duration))
+
+def _publish_celery_tasks(signatures):
+    chunk_size = settings.POSTCOMMIT_CELERY_CHUNK_SIZE
+    for i in range(0, len(signatures), chunk_size):
+        group(signatures[i:i + chunk_size]).apply_async()
+
+def _log_stats(stats, celery_count):
+    timings = stats['timings']
+    logger.debug('Ran {} postcommit tasks in {:.3f}s ({} deduplicated), published {} celery tasks: {}'.format(
+        len(timings),
+        sum(duration for _, duration in timings),
+        stats['deduplicated'],
+        celery_count,
+        ', '.join('{}={:.3f}s'.format(name, duration) for name, duration in timings),
+    ))
 
 def postcommit_after_request(response, base_status_error_code=500):
     if response.status_code >= base_status_error_code:
@@ -38,21 +92,26 @@ def postcommit_after_request(response, base_status_error_code=500):
         _local.postcommit_celery_queue = OrderedDict()
         return response
     try:
-        if postcommit_queue():
-            number_of_threads = 30  # one db connection per greenlet, let's share
-            pool = Pool(number_of_threads)
-            for func in postcommit_queue().values():
-                pool.spawn(func)
-            pool.join(timeout=5.0, raise_error=True)  # 5 second timeout and reraise exceptions
-
-        if postcommit_celery_queue():
+        stats = postcommit_stats()
+        queue = postcommit_queue()
+        if queue:
+            if len(queue) > settings.POSTCOMMIT_QUEUE_WARNING_DEPTH:
+                logger.warning('{} postcommit tasks queued by one request'.format(len(queue)))
+            pool = postcommit_pool()
+            # Spawning blocks while the shared pool is full
+            greenlets = [pool.spawn(_run_timed, func, stats['timings']) for func in queue.values()]
+            gevent.joinall(greenlets, timeout=settings.POSTCOMMIT_TIMEOUT, raise_error=True)
+
+        celery_queue = postcommit_celery_queue()
+        if celery_queue:
             if settings.USE_CELERY:
-                for task_dict in postcommit_celery_queue().values():
-                    task = Signature.from_dict(task_dict)
-                    task.apply_async()
+                _publish_celery_tasks([Signature.from_dict(task_dict) for task_dict in celery_queue.values()])
             else:
-                for task in postcommit_celery_queue().values():
-                    task()
+                for task in celery_queue.values():
+                    _run_timed(task, stats['timings'])
+
+        if queue or celery_queue:
+            _log_stats(stats, len(celery_queue) if settings.USE_CELERY else 0)
 
     except AttributeError as ex:
         if not settings.DEBUG_MODE:
@@ -87,9 +146,12 @@ def enqueue_postcommit_task(fn, args, kwargs, celery=False, once_per_request=Tru
             key = '{}:{}'.format(key, binascii.hexlify(os.urandom(8)))
 
         if celery and isinstance(fn, PromiseProxy):
-            postcommit_celery_queue().update({key: fn.si(*args, **kwargs)})
+            queue, task = postcommit_celery_queue(), fn.si(*args, **kwargs)
         else:
-            postcommit_queue().update({key: functools.partial(fn, *args, **kwargs)})
+            queue, task = postcommit_queue(), functools.partial(fn, *args, **kwargs)
+        if key in queue:
+            postcommit_stats()['deduplicated'] += 1
+        queue.update({key: task})
 
 handlers = {
     'before_request': postcommit_before_request,
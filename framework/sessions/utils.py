@@ -11,7 +11,9 @@ def remove_sessions_for_user(user):
     from osf.models import Session
 
     if user._id:
-        Session.objects.filter(data__auth_user_id=user._id).delete()
+        sessions = Session.objects.filter(data__auth_user_id=user._id)
+        Session.invalidate(sessions.values_list('_id', flat=True))
+        sessions.delete()
 
 
 def remove_session(session):
@@ -22,4 +24,5 @@ def remove_session(session):
     :return:
     """
     from osf.models import Session
+    Session.invalidate([session._id])
     Session.objects.filter(id=session.id).delete()
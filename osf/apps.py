@@ -1,7 +1,7 @@
 from __future__ import unicode_literals
 
-from django.apps import AppConfig as BaseAppConfig
-from django.db.models.signals import post_migrate
+from django.apps import AppConfig as BaseAppConfig, apps
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save
 from osf.migrations import update_permission_groups
 
 
@@ -16,3 +16,37 @@ class AppConfig(BaseAppConfig):
             update_permission_groups,
             dispatch_uid='osf.apps.update_permissions_groups'
         )
+
+        from osf.models import node_counters
+        from osf.utils import permission_cache
+
+        # Permissions cached for the request are stale once any of these change
+        for model_name in ('NodeGroupObjectPermission', 'PreprintGroupObjectPermission', 'NodeRelation'):
+            model = self.get_model(model_name)
+            for signal_name, signal in (('post_save', post_save), ('post_delete', post_delete)):
+                signal.connect(
+                    permission_cache.clear_on_change,
+                    sender=model,
+                    dispatch_uid='osf.apps.clear_permission_cache.{}.{}'.format(model_name, signal_name)
+                )
+        m2m_changed.connect(
+            permission_cache.clear_on_change,
+            sender=self.get_model('OSFUser').groups.through,
+            dispatch_uid='osf.apps.clear_permission_cache.groups'
+        )
+
+        # Node counters are adjusted as the rows they count are created and deleted
+        for model, receiver in (
+            (self.get_model('NodeLog'), node_counters.count_logs),
+            (self.get_model('Contributor'), node_counters.count_contributors),
+            (self.get_model('Comment'), node_counters.count_comments),
+            (self.get_model('NodeRelation'), node_counters.count_node_links),
+            (self.get_model('Node'), node_counters.recount_forks),
+            (apps.get_model('addons_wiki', 'WikiPage'), node_counters.recount_wiki_pages),
+        ):
+            for signal_name, signal in (('post_save', post_save), ('post_delete', post_delete)):
+                signal.connect(
+                    receiver,
+                    sender=model,
+                    dispatch_uid='osf.apps.{}.{}.{}'.format(receiver.__name__, model.__name__, signal_name)
+                )
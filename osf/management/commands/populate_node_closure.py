@@ -0,0 +1,67 @@
+from __future__ import unicode_literals
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+# Walk every component relation downwards, recording how far each descendant is from each ancestor
+FORWARD_SQL = '''
+    INSERT INTO osf_nodeclosure (ancestor_id, descendant_id, depth)
+    WITH RECURSIVE closure AS (
+        SELECT parent_id AS ancestor_id, child_id AS descendant_id, 1 AS depth
+        FROM osf_noderelation
+        WHERE is_node_link IS FALSE
+    UNION ALL
+        SELECT C.ancestor_id, R.child_id, C.depth + 1
+        FROM closure AS C
+            JOIN osf_noderelation AS R ON R.parent_id = C.descendant_id
+        WHERE R.is_node_link IS FALSE
+    ) SELECT ancestor_id, descendant_id, MIN(depth)
+    FROM closure
+    GROUP BY ancestor_id, descendant_id
+    ON CONFLICT (ancestor_id, descendant_id) DO NOTHING;
+'''
+
+REVERSE_SQL = 'DELETE FROM osf_nodeclosure;'
+
+
+def populate_node_closure(dry_run=False, rebuild=False):
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            if rebuild:
+                cursor.execute(REVERSE_SQL)
+                logger.info('Removed {} closure rows'.format(cursor.rowcount))
+            cursor.execute(FORWARD_SQL)
+            logger.info('Inserted {} closure rows'.format(cursor.rowcount))
+        if dry_run:
+            transaction.set_rollback(True)
+
+
+class Command(BaseCommand):
+    """Fills osf_nodeclosure from osf_noderelation.
+
+    The table is kept up to date by NodeRelation signal handlers; this only needs to run once
+    after the table is created, or with --rebuild if the two are suspected to have drifted.
+    """
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument(
+            '--dry',
+            action='store_true',
+            dest='dry_run',
+            help='Run the queries, then roll back',
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            dest='rebuild',
+            help='Delete all existing closure rows before repopulating',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options.get('dry_run', False)
+        if dry_run:
+            logger.info('DRY RUN')
+        populate_node_closure(dry_run=dry_run, rebuild=options.get('rebuild', False))
@@ -0,0 +1,92 @@
+from __future__ import unicode_literals
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_OSFSTORAGE_TYPES = ('osf.osfstoragefile', 'osf.osfstoragefolder')
+
+NEXT_ROOTS_SQL = '''
+    SELECT id FROM osf_basefilenode
+    WHERE provider = 'osfstorage'
+        AND parent_id IS NULL
+        AND id > %(last_id)s
+    ORDER BY id
+    LIMIT %(batch_size)s;
+'''
+
+# Build every path down from a batch of root folders, then store it on the active
+# osfstorage nodes. Trashed nodes already store the path they had when deleted.
+FORWARD_SQL = '''
+    WITH RECURSIVE paths(id, path) AS (
+        SELECT id, name :: TEXT
+        FROM osf_basefilenode
+        WHERE id = ANY(%(root_ids)s)
+    UNION ALL
+        SELECT C.id, P.path || '/' || C.name
+        FROM paths AS P
+            JOIN osf_basefilenode AS C ON C.parent_id = P.id
+    )
+    UPDATE osf_basefilenode AS F
+    SET _materialized_path = CASE
+        WHEN F.type = 'osf.osfstoragefile' THEN paths.path
+        ELSE paths.path || '/'
+    END
+    FROM paths
+    WHERE F.id = paths.id
+        AND F.type IN %(types)s;
+'''
+
+REVERSE_SQL = '''
+    UPDATE osf_basefilenode SET _materialized_path = '' WHERE type IN ('osf.osfstoragefile', 'osf.osfstoragefolder');
+'''
+
+
+def populate_materialized_paths(batch_size=1000, dry_run=False):
+    last_id = 0
+    updated = 0
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            while True:
+                cursor.execute(NEXT_ROOTS_SQL, {'last_id': last_id, 'batch_size': batch_size})
+                root_ids = [row[0] for row in cursor.fetchall()]
+                if not root_ids:
+                    break
+                cursor.execute(FORWARD_SQL, {'root_ids': root_ids, 'types': ACTIVE_OSFSTORAGE_TYPES})
+                updated += cursor.rowcount
+                last_id = root_ids[-1]
+                logger.info('Stored materialized paths up to root {} ({} file nodes so far)'.format(last_id, updated))
+        if dry_run:
+            transaction.set_rollback(True)
+    return updated
+
+
+class Command(BaseCommand):
+    """Stores the materialized path of every active OSFStorage file and folder.
+
+    OsfStorageFileNode computes its path on save; this backfills nodes saved before that.
+    Nodes without a stored path fall back to a recursive query, so this can run at any time.
+    """
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument(
+            '--batch_size',
+            type=int,
+            default=1000,
+            help='How many root folders to process per query',
+        )
+        parser.add_argument(
+            '--dry',
+            action='store_true',
+            dest='dry_run',
+            help='Run the queries, then roll back',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options.get('dry_run', False)
+        if dry_run:
+            logger.info('DRY RUN')
+        updated = populate_materialized_paths(batch_size=options['batch_size'], dry_run=dry_run)
+        logger.info('Stored {} materialized paths'.format(updated))
@@ -0,0 +1,106 @@
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from framework.celery_tasks import app as celery_app
+from website.app import setup_django
+setup_django()
+from osf.models import AbstractNode, NodeCounters
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+def backfill_node_counters(batch_size=1000, dry_run=False):
+    """Give the nodes created before counters were stored their counters, in batches of `batch_size` nodes."""
+    created_count = 0
+    last_node_id = 0
+    while True:
+        node_ids = list(
+            AbstractNode.objects.filter(id__gt=last_node_id, _counters__isnull=True)
+            .order_by('id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not node_ids:
+            break
+        last_node_id = node_ids[-1]
+        if dry_run:
+            created_count += len(node_ids)
+            continue
+
+        # Commit zeroed counters before counting, so a row created meanwhile is either counted
+        # or added to the new counters by the signal receivers
+        with transaction.atomic():
+            created = NodeCounters.objects.create_missing(node_ids)
+        with transaction.atomic():
+            NodeCounters.objects.reconcile(created)
+        created_count += len(created)
+
+    logger.info('Counters of {} nodes {}backfilled'.format(created_count, 'would be ' if dry_run else ''))
+    return created_count
+
+
+def reconcile_node_counters(batch_size=1000, dry_run=False):
+    """Recompute the stored counters of every node in batches of `batch_size` nodes and
+    fix the ones that drifted from the rows they count.
+    """
+    drifted_count = 0
+    last_node_id = 0
+    while True:
+        node_ids = list(
+            NodeCounters.objects.filter(node_id__gt=last_node_id)
+            .order_by('node_id')
+            .values_list('node_id', flat=True)[:batch_size]
+        )
+        if not node_ids:
+            break
+        last_node_id = node_ids[-1]
+
+        with transaction.atomic():
+            drifted = NodeCounters.objects.reconcile(node_ids)
+            if dry_run:
+                transaction.set_rollback(True)
+        for node_id in drifted:
+            logger.info('Counters for node {} had drifted'.format(node_id))
+        drifted_count += len(drifted)
+
+    logger.info('Counters of {} nodes {}corrected'.format(drifted_count, 'would be ' if dry_run else ''))
+    return drifted_count
+
+
+@celery_app.task(name='management.commands.reconcile_node_counters')
+def main(batch_size=1000, dry_run=False):
+    """
+    Node counters are kept up to date incrementally by signal receivers, this task runs nightly to correct any
+    that missed a change, e.g. from bulk updates, and to backfill the counters of nodes created before them.
+    """
+    if dry_run:
+        logger.info('This is a dry run; no changes will be saved.')
+    backfill_node_counters(batch_size=batch_size, dry_run=dry_run)
+    reconcile_node_counters(batch_size=batch_size, dry_run=dry_run)
+
+
+class Command(BaseCommand):
+    help = '''
+    Backfill the counters of nodes without them, then recompute the counters of every node and fix any that drifted.
+    '''
+
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument(
+            '--dry',
+            action='store_true',
+            dest='dry_run',
+            help='Dry run',
+        )
+        parser.add_argument(
+            '--batch_size',
+            type=int,
+            default=1000,
+            help='Number of nodes to recompute at once',
+        )
+
+    # Management command handler
+    def handle(self, *args, **options):
+        main(batch_size=options['batch_size'], dry_run=options.get('dry_run', False))
@@ -0,0 +1,76 @@
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from framework.celery_tasks import app as celery_app
+from website.app import setup_django
+setup_django()
+from osf.models import StorageUsage
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+def reconcile_storage_usage(batch_size=1000, dry_run=False):
+    """Recompute every stored storage usage counter in batches of `batch_size` nodes and
+    fix the ones that drifted from the sum of their file versions.
+    """
+    drifted_count = 0
+    last_target_id = 0
+    while True:
+        target_ids = list(
+            StorageUsage.objects.filter(target_id__gt=last_target_id)
+            .order_by('target_id')
+            .values_list('target_id', flat=True)[:batch_size]
+        )
+        if not target_ids:
+            break
+        last_target_id = target_ids[-1]
+
+        with transaction.atomic():
+            drifted = StorageUsage.objects.reconcile(target_ids)
+            if dry_run:
+                transaction.set_rollback(True)
+        for target_id in drifted:
+            logger.info('Storage usage for node {} had drifted'.format(target_id))
+        drifted_count += len(drifted)
+
+    logger.info('{} storage usage counters {}corrected'.format(drifted_count, 'would be ' if dry_run else ''))
+    return drifted_count
+
+
+@celery_app.task(name='management.commands.reconcile_storage_usage')
+def main(batch_size=1000, dry_run=False):
+    """
+    Storage usage is kept up to date incrementally as files change, this task runs nightly to correct any
+    counters that missed a change.
+    """
+    if dry_run:
+        logger.info('This is a dry run; no changes will be saved.')
+    reconcile_storage_usage(batch_size=batch_size, dry_run=dry_run)
+
+
+class Command(BaseCommand):
+    help = '''
+    Recompute the storage usage of every node with a counter and fix any that drifted.
+    '''
+
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument(
+            '--dry',
+            action='store_true',
+            dest='dry_run',
+            help='Dry run',
+        )
+        parser.add_argument(
+            '--batch_size',
+            type=int,
+            default=1000,
+            help='Number of nodes to recompute at once',
+        )
+
+    # Management command handler
+    def handle(self, *args, **options):
+        main(batch_size=options['batch_size'], dry_run=options.get('dry_run', False))
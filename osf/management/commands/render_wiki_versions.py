@@ -0,0 +1,69 @@
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from website.app import setup_django
+setup_django()
+from addons.wiki.models import WikiVersion, get_render_key
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+def render_wiki_versions(batch_size=500, dry_run=False):
+    """Render and store the HTML of every wiki version that has none yet, or was rendered with
+    other settings, in batches of `batch_size` versions.
+    """
+    render_key = get_render_key()
+    stale = WikiVersion.objects.filter(Q(render_key__isnull=True) | ~Q(render_key=render_key))
+    rendered_count = 0
+    last_id = 0
+    while True:
+        versions = list(
+            stale.filter(id__gt=last_id)
+            .select_related('wiki_page__node')
+            .order_by('id')[:batch_size]
+        )
+        if not versions:
+            break
+        last_id = versions[-1].id
+
+        for version in versions:
+            if dry_run:
+                rendered_count += 1
+            elif version.update_rendered():
+                rendered_count += 1
+        logger.info('Rendered wiki versions up to id {}'.format(last_id))
+
+    logger.info('{} wiki versions {}rendered'.format(rendered_count, 'would be ' if dry_run else ''))
+    return rendered_count
+
+
+class Command(BaseCommand):
+    help = '''
+    Render and store the HTML of wiki versions that have none, e.g. after the wiki whitelist or
+    WIKI_RENDER_VERSION changed.
+    '''
+
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument(
+            '--dry',
+            action='store_true',
+            dest='dry_run',
+            help='Dry run',
+        )
+        parser.add_argument(
+            '--batch_size',
+            type=int,
+            default=500,
+            help='Number of wiki versions to render at once',
+        )
+
+    # Management command handler
+    def handle(self, *args, **options):
+        dry_run = options.get('dry_run', False)
+        if dry_run:
+            logger.info('This is a dry run; no changes will be saved.')
+        render_wiki_versions(batch_size=options['batch_size'], dry_run=dry_run)
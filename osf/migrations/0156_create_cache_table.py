@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 from django.db import migrations
-from django.conf import settings
 
 
 class Migration(migrations.Migration):
@@ -11,13 +10,13 @@ class Migration(migrations.Migration):
     operations = [
         migrations.RunSQL([
             """
-            CREATE TABLE "{}" (
+            CREATE TABLE "osf_cache_table" (
                 "cache_key" varchar(255) NOT NULL PRIMARY KEY,
                 "value" text NOT NULL,
                 "expires" timestamp with time zone NOT NULL
             );
-            """.format(settings.CACHES[settings.STORAGE_USAGE_CACHE_NAME]['LOCATION'])
+            """
         ], [
-            """DROP TABLE "{}"; """.format(settings.CACHES[settings.STORAGE_USAGE_CACHE_NAME]['LOCATION'])
+            """DROP TABLE "osf_cache_table"; """
         ])
     ]
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.15 on 2019-06-20 14:02
+from __future__ import unicode_literals
+
+import logging
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from osf.management.commands.populate_node_closure import FORWARD_SQL, REVERSE_SQL
+from website.settings import DEBUG_MODE
+
+logger = logging.getLogger(__name__)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0181_osfuser_contacted_deactivation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NodeClosure',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='_descendant_closures', to='osf.AbstractNode')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='_ancestor_closures', to='osf.AbstractNode')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='nodeclosure',
+            unique_together=set([('ancestor', 'descendant')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='nodeclosure',
+            index_together=set([('descendant', 'ancestor', 'depth')]),
+        ),
+    ]
+
+    if DEBUG_MODE:
+        operations.append(migrations.RunSQL(FORWARD_SQL, REVERSE_SQL))
+    else:
+        logger.info(
+            'The node closure backfill only runs in DEBUG_MODE. Use management command populate_node_closure instead'
+        )
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.15 on 2019-06-21 10:12
+from __future__ import unicode_literals
+
+import logging
+
+from django.db import migrations
+
+from osf.management.commands.populate_osfstorage_materialized_paths import REVERSE_SQL, populate_materialized_paths
+from website.settings import DEBUG_MODE
+
+logger = logging.getLogger(__name__)
+
+
+def populate(*args):
+    populate_materialized_paths()
+
+
+def unpopulate(state, schema):
+    with schema.connection.cursor() as cursor:
+        cursor.execute(REVERSE_SQL)
+
+
+class Migration(migrations.Migration):
+    atomic = False  # CREATE INDEX CONCURRENTLY cannot be run in a txn
+
+    dependencies = [
+        ('osf', '0182_nodeclosure'),
+    ]
+
+    operations = [
+        migrations.RunSQL([
+            """
+            CREATE INDEX CONCURRENTLY basefilenode_materialized_path_idx
+            ON osf_basefilenode (target_content_type_id, target_object_id, _materialized_path text_pattern_ops);
+            """
+        ], [
+            'DROP INDEX IF EXISTS basefilenode_materialized_path_idx, RESTRICT;'
+        ])
+    ]
+
+    if DEBUG_MODE:
+        operations.append(migrations.RunPython(populate, unpopulate))
+    else:
+        logger.info(
+            'The materialized path backfill only runs in DEBUG_MODE. Use management command populate_osfstorage_materialized_paths instead'
+        )
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.15 on 2019-06-26 14:02
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    atomic = False  # CREATE INDEX CONCURRENTLY cannot be run in a txn
+
+    dependencies = [
+        ('osf', '0184_storageusage'),
+    ]
+
+    operations = [
+        migrations.RunSQL([
+            # Backs cursor pagination of node lists, which are sorted by (-modified, -id)
+            'CREATE INDEX CONCURRENTLY abstractnode_modified_id_idx ON osf_abstractnode (modified, id);',
+        ], [
+            'DROP INDEX IF EXISTS abstractnode_modified_id_idx, RESTRICT;'
+        ])
+    ]
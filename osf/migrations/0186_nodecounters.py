@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.15 on 2019-06-28 13:47
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0185_abstractnode_modified_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NodeCounters',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('log_count', models.IntegerField(default=0)),
+                ('contributor_count', models.IntegerField(default=0)),
+                ('fork_count', models.IntegerField(default=0)),
+                ('wiki_page_count', models.IntegerField(default=0)),
+                ('comment_count', models.IntegerField(default=0)),
+                ('node_link_count', models.IntegerField(default=0)),
+                ('node', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='_counters', to='osf.AbstractNode')),
+            ],
+        ),
+    ]
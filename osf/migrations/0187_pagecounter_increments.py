@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.15 on 2019-07-02 15:12
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0186_nodecounters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageCounterDay',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('unique', models.PositiveIntegerField(default=0)),
+                ('page_counter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='days', to='osf.PageCounter')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PageCounterIncrement',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('_id', models.CharField(db_index=True, max_length=300)),
+                ('date', models.DateField()),
+                ('total', models.PositiveSmallIntegerField(default=0)),
+                ('unique', models.PositiveSmallIntegerField(default=0)),
+                ('day_total', models.PositiveSmallIntegerField(default=0)),
+                ('day_unique', models.PositiveSmallIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='pagecounterday',
+            unique_together=set([('page_counter', 'date')]),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.15 on 2019-07-03 10:41
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0187_pagecounter_increments'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserActivityDay',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(max_length=255)),
+                ('date', models.DateField()),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('counter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='days', to='osf.UserActivityCounter')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UserActivityIncrement',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('_id', models.CharField(db_index=True, max_length=5)),
+                ('action', models.CharField(max_length=255)),
+                ('date', models.DateField()),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='useractivityday',
+            unique_together=set([('counter', 'action', 'date')]),
+        ),
+    ]
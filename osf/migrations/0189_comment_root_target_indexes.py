@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.15 on 2019-07-08 11:26
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    atomic = False  # CREATE INDEX CONCURRENTLY cannot be run in a txn
+
+    dependencies = [
+        ('osf', '0188_useractivity_increments'),
+    ]
+
+    operations = [
+        migrations.RunSQL([
+            # Back counting the comments on a page created or modified since the user last viewed it
+            'CREATE INDEX CONCURRENTLY comment_root_target_created_idx ON osf_comment (root_target_id, created);',
+            'CREATE INDEX CONCURRENTLY comment_root_target_modified_idx ON osf_comment (root_target_id, modified);',
+        ], [
+            'DROP INDEX IF EXISTS comment_root_target_created_idx, RESTRICT;',
+            'DROP INDEX IF EXISTS comment_root_target_modified_idx, RESTRICT;',
+        ])
+    ]
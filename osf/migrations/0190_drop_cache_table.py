@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0189_comment_root_target_indexes'),
+    ]
+
+    operations = [
+        # The storage usage cache was replaced by StorageUsage counters
+        migrations.RunSQL([
+            'DROP TABLE IF EXISTS "osf_cache_table";',
+        ], [
+            """
+            CREATE TABLE "osf_cache_table" (
+                "cache_key" varchar(255) NOT NULL PRIMARY KEY,
+                "value" text NOT NULL,
+                "expires" timestamp with time zone NOT NULL
+            );
+            """,
+        ]),
+    ]
@@ -1,10 +1,13 @@
+import collections
+import datetime
 import logging
 
 from dateutil import parser
-from django.db import models, transaction
+from django.db import connection, models, transaction
 from django.db.models import Sum
 from django.db.models.expressions import RawSQL
 from django.utils import timezone
+from psycopg2.extras import execute_values
 
 from framework.sessions import session
 from osf.models.base import BaseModel, Guid
@@ -25,36 +28,65 @@ class UserActivityCounter(BaseModel):
 
     @classmethod
     def get_total_activity_count(cls, user_id):
+        """Number of actions by `user_id`, including actions that have not been flushed yet"""
+        pending = UserActivityIncrement.objects.filter(_id=user_id).count()
         try:
-            return cls.objects.get(_id=user_id).total
+            return cls.objects.get(_id=user_id).total + pending
         except cls.DoesNotExist:
-            return 0
+            return pending
 
     @classmethod
     def increment(cls, user_id, action, date_string):
-        date = parser.parse(date_string).strftime('%Y/%m/%d')
-        with transaction.atomic():
-            # select_for_update locks the row but only inside a transaction
-            uac, created = cls.objects.select_for_update().get_or_create(_id=user_id)
-            if uac.total > 0:
-                uac.total += 1
-            else:
-                uac.total = 1
-            if action in uac.action:
-                uac.action[action]['total'] += 1
-                if date in uac.action[action]['date']:
-                    uac.action[action]['date'][date] += 1
-                else:
-                    uac.action[action]['date'][date] = 1
-            else:
-                uac.action[action] = dict(total=1, date={date: 1})
-            if date in uac.date:
-                uac.date[date]['total'] += 1
-            else:
-                uac.date[date] = dict(total=1)
-            uac.save()
+        """
+        Counts an action by `user_id`. Actions are appended to UserActivityIncrement, without locking
+        the user's counter, and added to it by `flush_increments`.
+        """
+        date = parser.parse(date_string).date()
+        UserActivityIncrement.objects.create(_id=user_id, action=action, date=date)
         return True
 
+    @classmethod
+    def flush_increments(cls, batch_size=10000):
+        """
+        Adds up to `batch_size` pending increments to their users' counters and per day counts, with one
+        UPSERT of each. Returns the number of increments flushed.
+        """
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(FLUSH_USER_ACTIVITY_INCREMENTS_SQL, [batch_size])
+                flushed = cursor.fetchall()
+                if not flushed:
+                    return 0
+                totals = collections.Counter()
+                for user_id, action, date, count in flushed:
+                    totals[user_id] += count
+                execute_values(cursor.cursor, UPSERT_USER_ACTIVITY_COUNTERS_SQL, totals.items())
+                execute_values(cursor.cursor, UPSERT_USER_ACTIVITY_DAYS_SQL, flushed)
+        return sum(totals.values())
+
+
+class UserActivityIncrement(models.Model):
+    """
+    An action by a user that has not been added to their UserActivityCounter yet.
+    """
+    _id = models.CharField(max_length=5, db_index=True)
+    action = models.CharField(max_length=255)
+    date = models.DateField()
+
+
+class UserActivityDay(models.Model):
+    """
+    How many times a user took an action on one day. Replaces UserActivityCounter.action and
+    UserActivityCounter.date, which hold the days counted before these.
+    """
+    counter = models.ForeignKey(UserActivityCounter, related_name='days', on_delete=models.CASCADE)
+    action = models.CharField(max_length=255)
+    date = models.DateField()
+    total = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('counter', 'action', 'date')
+
 
 class PageCounter(BaseModel):
     primary_identifier_name = '_id'
@@ -89,7 +121,17 @@ class PageCounter(BaseModel):
         # aggregating the sum.
         daily_total = page_counters.annotate(daily_total=RawSQL("((date->%s->>'total')::int)", (formatted_date,))).aggregate(sum=Sum('daily_total'))['sum']
 
-        return daily_total
+        # Days counted since PageCounterDay replaced the nested dict
+        if isinstance(date, datetime.datetime):
+            date = date.date()
+        day_total = PageCounterDay.objects.filter(
+            date=date,
+            page_counter___id__regex=cls.DOWNLOAD_ALL_VERSIONS_ID_PATTERN,
+        ).aggregate(sum=Sum('total'))['sum']
+
+        if daily_total is None and day_total is None:
+            return None
+        return (daily_total or 0) + (day_total or 0)
 
     @staticmethod
     def clean_page(page):
@@ -117,80 +159,204 @@ class PageCounter(BaseModel):
 
     @classmethod
     def update_counter(cls, page, node_info):
+        """
+        Counts a visit to `page`. Visits are appended to PageCounterIncrement, without locking the
+        page's counter, and added to it by `flush_increments`.
+        """
         cleaned_page = cls.clean_page(page)
         date = timezone.now()
         date_string = date.strftime('%Y/%m/%d')
         visited_by_date = session.data.get('visited_by_date', {'date': date_string, 'pages': []})
-        with transaction.atomic():
-            # Temporary backwards compat - when creating new PageCounters, temporarily keep writing to _id field.
-            # After we're sure this is stable, we can stop writing to the _id field, and query on
-            # resource/file/action/version
-            resource, file, action, version = cls.deconstruct_id(cleaned_page)
-            model_instance, created = PageCounter.objects.select_for_update().get_or_create(_id=cleaned_page)
-
-            model_instance.resource = resource
-            model_instance.file = file
-            model_instance.action = action
-            model_instance.version = version
-
-            # if they visited something today
-            if date_string == visited_by_date['date']:
-                # if they haven't visited this page today
-                if cleaned_page not in visited_by_date['pages']:
-                    # if the model_instance has today in it
-                    if date_string in model_instance.date.keys():
-                        # increment the number of unique visitors for today
-                        model_instance.date[date_string]['unique'] += 1
-                    else:
-                        # set the number of unique visitors for today to 1
-                        model_instance.date[date_string] = dict(unique=1)
-            # if they haven't visited something today
-            else:
-                # set their visited by date to blank
-                visited_by_date['date'] = date_string
-                visited_by_date['pages'] = []
-                # if the model_instance has today in it
-                if date_string in model_instance.date.keys():
-                    # increment the number of unique visitors for today
-                    model_instance.date[date_string]['unique'] += 1
-                else:
-                    # set the number of unique visitors to 1
-                    model_instance.date[date_string] = dict(unique=1)
-
-            # update their sessions
+        increment = PageCounterIncrement(_id=cleaned_page, date=date.date(), day_total=1)
+
+        # if they haven't visited something today, start over
+        if date_string != visited_by_date['date']:
+            visited_by_date['date'] = date_string
+            visited_by_date['pages'] = []
+        # if they haven't visited this page today, they are a unique visitor for today
+        if cleaned_page not in visited_by_date['pages']:
+            increment.day_unique = 1
             visited_by_date['pages'].append(cleaned_page)
-            session.data['visited_by_date'] = visited_by_date
-
-            if date_string in model_instance.date.keys():
-                if 'total' not in model_instance.date[date_string].keys():
-                    model_instance.date[date_string].update(total=0)
-                model_instance.date[date_string]['total'] += 1
-            else:
-                model_instance.date[date_string] = dict(total=1)
-
-            # if a download counter is being updated, only perform the update
-            # if the user who is downloading isn't a contributor to the project
-            page_type = cleaned_page.split(':')[0]
-            if page_type in ('download', 'view') and node_info:
-                if node_info['contributors'].filter(guids___id__isnull=False, guids___id=session.data.get('auth_user_id')).exists():
-                    model_instance.save()
-                    return
-
-            visited = session.data.get('visited', [])
-            if page not in visited:
-                model_instance.unique += 1
-                visited.append(page)
-                session.data['visited'] = visited
-
-            session.save()
-            model_instance.total += 1
-
-            model_instance.save()
+        # update their sessions
+        session.data['visited_by_date'] = visited_by_date
+
+        # if a download counter is being updated, only count it towards the totals
+        # if the user who is downloading isn't a contributor to the project
+        page_type = cleaned_page.split(':')[0]
+        if page_type in ('download', 'view') and node_info:
+            if node_info['contributors'].filter(guids___id__isnull=False, guids___id=session.data.get('auth_user_id')).exists():
+                increment.save()
+                return
+
+        visited = session.data.get('visited', [])
+        if page not in visited:
+            increment.unique = 1
+            visited.append(page)
+            session.data['visited'] = visited
+
+        session.save()
+        increment.total = 1
+        increment.save()
+
+    @classmethod
+    def flush_increments(cls, batch_size=10000):
+        """
+        Adds up to `batch_size` pending increments to their page counters and per day counts, with one
+        UPSERT of each. Counters for new pages get their action, resource, file and version from their id.
+        Returns the number of increments flushed.
+        """
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(FLUSH_PAGE_COUNTER_INCREMENTS_SQL, [batch_size])
+                flushed = cursor.fetchall()
+                if not flushed:
+                    return 0
+                totals = collections.defaultdict(lambda: [0, 0])
+                for page, date, total, unique, day_total, day_unique, count in flushed:
+                    totals[page][0] += total
+                    totals[page][1] += unique
+                execute_values(
+                    cursor.cursor,
+                    UPSERT_PAGE_COUNTERS_SQL,
+                    [(page, total, unique) for page, (total, unique) in totals.items()],
+                )
+                execute_values(
+                    cursor.cursor,
+                    UPSERT_PAGE_COUNTER_DAYS_SQL,
+                    [(page, date, day_total, day_unique) for page, date, _, _, day_total, day_unique, _ in flushed],
+                )
+        return sum(row[-1] for row in flushed)
 
     @classmethod
     def get_basic_counters(cls, page):
+        """Unique visitors and total visits of `page`, including visits that have not been flushed yet"""
+        cleaned_page = cls.clean_page(page)
+        pending = PageCounterIncrement.objects.filter(_id=cleaned_page).aggregate(total=Sum('total'), unique=Sum('unique'))
         try:
-            counter = cls.objects.get(_id=cls.clean_page(page))
-            return (counter.unique, counter.total)
+            counter = cls.objects.get(_id=cleaned_page)
         except cls.DoesNotExist:
-            return (None, None)
+            if pending['total'] is None:
+                return (None, None)
+            return (pending['unique'], pending['total'])
+        return (counter.unique + (pending['unique'] or 0), counter.total + (pending['total'] or 0))
+
+    @classmethod
+    def get_page_totals(cls, pages):
+        """Total visits of each of `pages`, including visits that have not been flushed yet.
+        Pages without visits are left out.
+        """
+        cleaned_pages = {page: cls.clean_page(page) for page in pages}
+        totals = collections.Counter(dict(
+            cls.objects.filter(_id__in=cleaned_pages.values()).values_list('_id', 'total')
+        ))
+        totals.update(dict(
+            PageCounterIncrement.objects.filter(_id__in=cleaned_pages.values())
+            .values('_id').annotate(pending=Sum('total')).values_list('_id', 'pending')
+        ))
+        return {page: totals[cleaned_page] for page, cleaned_page in cleaned_pages.items() if cleaned_page in totals}
+
+    @classmethod
+    def get_totals(cls, prefix):
+        """Total visits of every page whose id starts with `prefix`, including visits that have not been flushed yet"""
+        totals = collections.Counter(dict(cls.objects.filter(_id__startswith=prefix).values_list('_id', 'total')))
+        totals.update(dict(
+            PageCounterIncrement.objects.filter(_id__startswith=prefix)
+            .values('_id').annotate(pending=Sum('total')).values_list('_id', 'pending')
+        ))
+        return dict(totals)
+
+
+class PageCounterIncrement(models.Model):
+    """
+    A visit to a page that has not been added to its PageCounter yet. Appending these instead of
+    updating the counter means concurrent visits never wait on its row lock.
+    """
+    _id = models.CharField(max_length=300, db_index=True)
+    date = models.DateField()
+    total = models.PositiveSmallIntegerField(default=0)
+    unique = models.PositiveSmallIntegerField(default=0)
+    day_total = models.PositiveSmallIntegerField(default=0)
+    day_unique = models.PositiveSmallIntegerField(default=0)
+
+
+class PageCounterDay(models.Model):
+    """
+    A page's visits on one day. Replaces PageCounter.date, which holds the days counted before these.
+    """
+    page_counter = models.ForeignKey(PageCounter, related_name='days', on_delete=models.CASCADE)
+    date = models.DateField()
+    total = models.PositiveIntegerField(default=0)
+    unique = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('page_counter', 'date')
+
+
+FLUSH_PAGE_COUNTER_INCREMENTS_SQL = """
+    WITH flushed AS (
+        DELETE FROM osf_pagecounterincrement
+        WHERE id IN (
+            SELECT id FROM osf_pagecounterincrement ORDER BY id LIMIT %s FOR UPDATE SKIP LOCKED
+        )
+        RETURNING _id, date, total, "unique", day_total, day_unique
+    )
+    SELECT _id, date, SUM(total), SUM("unique"), SUM(day_total), SUM(day_unique), COUNT(*)
+    FROM flushed
+    GROUP BY _id, date;
+"""
+
+UPSERT_PAGE_COUNTERS_SQL = """
+    INSERT INTO osf_pagecounter (_id, created, modified, date, total, "unique", action, resource_id, file_id, version)
+    SELECT
+        V._id, now(), now(), '{}', V.total, V."unique",
+        split_part(V._id, ':', 1),
+        (SELECT id FROM osf_guid WHERE _id = split_part(V._id, ':', 2) LIMIT 1),
+        (SELECT id FROM osf_basefilenode WHERE _id = split_part(V._id, ':', 3) LIMIT 1),
+        NULLIF(split_part(V._id, ':', 4), '')::int
+    FROM (VALUES %s) AS V (_id, total, "unique")
+    ON CONFLICT (_id) DO UPDATE SET
+        total = osf_pagecounter.total + EXCLUDED.total,
+        "unique" = osf_pagecounter."unique" + EXCLUDED."unique",
+        modified = EXCLUDED.modified;
+"""
+
+UPSERT_PAGE_COUNTER_DAYS_SQL = """
+    INSERT INTO osf_pagecounterday (page_counter_id, date, total, "unique")
+    SELECT PC.id, V.date, V.total, V."unique"
+    FROM (VALUES %s) AS V (_id, date, total, "unique")
+    JOIN osf_pagecounter AS PC ON PC._id = V._id
+    ON CONFLICT (page_counter_id, date) DO UPDATE SET
+        total = osf_pagecounterday.total + EXCLUDED.total,
+        "unique" = osf_pagecounterday."unique" + EXCLUDED."unique";
+"""
+
+FLUSH_USER_ACTIVITY_INCREMENTS_SQL = """
+    WITH flushed AS (
+        DELETE FROM osf_useractivityincrement
+        WHERE id IN (
+            SELECT id FROM osf_useractivityincrement ORDER BY id LIMIT %s FOR UPDATE SKIP LOCKED
+        )
+        RETURNING _id, action, date
+    )
+    SELECT _id, action, date, COUNT(*)
+    FROM flushed
+    GROUP BY _id, action, date;
+"""
+
+UPSERT_USER_ACTIVITY_COUNTERS_SQL = """
+    INSERT INTO osf_useractivitycounter (_id, created, modified, action, date, total)
+    SELECT V._id, now(), now(), '{}', '{}', V.total
+    FROM (VALUES %s) AS V (_id, total)
+    ON CONFLICT (_id) DO UPDATE SET
+        total = osf_useractivitycounter.total + EXCLUDED.total,
+        modified = EXCLUDED.modified;
+"""
+
+UPSERT_USER_ACTIVITY_DAYS_SQL = """
+    INSERT INTO osf_useractivityday (counter_id, action, date, total)
+    SELECT UAC.id, V.action, V.date, V.total
+    FROM (VALUES %s) AS V (_id, action, date, total)
+    JOIN osf_useractivitycounter AS UAC ON UAC._id = V._id
+    ON CONFLICT (counter_id, action, date) DO UPDATE SET
+        total = osf_useractivityday.total + EXCLUDED.total;
+"""
@@ -1,7 +1,6 @@
 
 import pytz
-from django.db import models
-from django.db.models import Q
+from django.db import connection, models
 from django.utils import timezone
 from osf.models import Node
 from osf.models import NodeLog
@@ -111,24 +110,57 @@ class Comment(GuidMixin, SpamMixin, CommentableMixin, BaseModel):
     def find_n_unread(cls, user, node, page, root_id=None):
         if node.is_contributor_or_group_member(user):
             if page == Comment.OVERVIEW:
-                view_timestamp = user.get_node_comment_timestamps(target_id=node._id)
-                root_target = Guid.load(node._id)
-            elif page == Comment.FILES or page == Comment.WIKI:
-                view_timestamp = user.get_node_comment_timestamps(target_id=root_id)
-                root_target = Guid.load(root_id)
-            else:
+                root_id = node._id
+            elif page != Comment.FILES and page != Comment.WIKI:
                 raise ValueError('Invalid page')
+            return cls._count_unread(user, [(node.id, root_id)])[node.id]
 
-            if not view_timestamp.tzinfo:
-                view_timestamp = view_timestamp.replace(tzinfo=pytz.utc)
+        return 0
 
-            return cls.objects.filter(
-                Q(node=node) & ~Q(user=user) & Q(is_deleted=False) &
-                (Q(created__gt=view_timestamp) | Q(modified__gt=view_timestamp)) &
-                Q(root_target=root_target)
-            ).count()
+    @classmethod
+    def find_n_unread_for_nodes(cls, user, nodes):
+        """Returns {node pk: number of unread comments on the node's overview page} for many nodes at once.
+        Nodes `user` isn't a contributor or group member on have none.
+        """
+        unread = dict.fromkeys([node.pk for node in nodes], 0)
+        unread.update(cls._count_unread(user, [
+            (node.pk, node._id) for node in nodes if node.is_contributor_or_group_member(user)
+        ]))
+        return unread
 
-        return 0
+    @classmethod
+    def _count_unread(cls, user, targets):
+        """Counts, with one query, the comments by others on each of `targets`, (node id, root target guid)
+        pairs, created or modified since `user` last viewed it. Returns {node id: count}.
+        """
+        if not targets:
+            return {}
+        node_ids, root_ids, view_timestamps = [], [], []
+        for node_id, root_id in targets:
+            view_timestamp = user.get_node_comment_timestamps(target_id=root_id)
+            if not view_timestamp.tzinfo:
+                view_timestamp = view_timestamp.replace(tzinfo=pytz.utc)
+            node_ids.append(node_id)
+            root_ids.append(root_id)
+            view_timestamps.append(view_timestamp)
+
+        counts = dict.fromkeys(node_ids, 0)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT C.node_id, COUNT(*)
+                FROM unnest(%s::int[], %s::text[], %s::timestamptz[]) AS T (node_id, root_id, viewed)
+                JOIN osf_guid AS G ON G._id = T.root_id
+                JOIN osf_comment AS C ON C.root_target_id = G.id AND C.node_id = T.node_id
+                WHERE C.user_id IS DISTINCT FROM %s
+                  AND C.is_deleted = FALSE
+                  AND (C.created > T.viewed OR C.modified > T.viewed)
+                GROUP BY C.node_id;
+                """,
+                [node_ids, root_ids, view_timestamps, user.id],
+            )
+            counts.update(cursor.fetchall())
+        return counts
 
     @classmethod
     def create(cls, auth, **kwargs):
@@ -15,7 +15,7 @@ from django.contrib.contenttypes.fields import GenericForeignKey
 from typedmodels.models import TypedModel, TypedModelManager
 from include import IncludeManager
 
-from framework.analytics import get_basic_counters
+from framework.analytics import get_basic_counters, get_page_totals
 from framework import sentry
 from osf.models.base import BaseModel, OptionalGuidMixin, ObjectIDMixin
 from osf.models.comment import CommentableMixin
@@ -335,15 +335,18 @@ class BaseFileNode(TypedModel, CommentableMixin, OptionalGuidMixin, Taggable, Ob
         # TODO Switch back to head requests
         # return self.update(revision, json.loads(resp.headers['x-waterbutler-metadata']))
 
+    def get_page_counter_id(self, count_type, version=None):
+        """The id of this file's `count_type` page counter, limited to `version` if specified"""
+        parts = [count_type, self.target._id, self._id]
+        if version is not None:
+            parts.append(version)
+        return ':'.join([format(part) for part in parts])
+
     def get_page_counter_count(self, count_type, version=None):
         """Assembles a string to retrieve the correct file data from the pagecounter collection,
         then calls get_basic_counters to retrieve the total count. Limit to version if specified.
         """
-        parts = [count_type, self.target._id, self._id]
-        if version is not None:
-            parts.append(version)
-        page = ':'.join([format(part) for part in parts])
-        _, count = get_basic_counters(page)
+        _, count = get_basic_counters(self.get_page_counter_id(count_type, version=version))
 
         return count or 0
 
@@ -351,6 +354,13 @@ class BaseFileNode(TypedModel, CommentableMixin, OptionalGuidMixin, Taggable, Ob
         """Pull the download count from the pagecounter collection"""
         return self.get_page_counter_count('download', version=version)
 
+    @classmethod
+    def get_download_counts(cls, files):
+        """Batched `get_download_count` of every version, as {file pk: count}"""
+        pages = {file.pk: file.get_page_counter_id('download') for file in files}
+        totals = get_page_totals(pages.values())
+        return {pk: totals.get(page, 0) for pk, page in pages.items()}
+
     def get_view_count(self, version=None):
         """Pull the mfr view count from the pagecounter collection"""
         return self.get_page_counter_count('view', version=version)
@@ -639,6 +649,10 @@ class TrashedFileNode(BaseFileNode):
         if save:
             self.save()
 
+        if self.is_file and self.provider == 'osfstorage':
+            StorageUsage = apps.get_model('osf.StorageUsage')
+            StorageUsage.objects.add(self.target, StorageUsage.objects.get_file_size([self.id]))
+
         return self
 
 
@@ -8,7 +8,7 @@ from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.db import models, transaction
 from django.utils import timezone
 from django.utils.functional import cached_property
-from guardian.shortcuts import assign_perm, get_perms, remove_perm, get_group_perms
+from guardian.shortcuts import assign_perm, get_perms, remove_perm
 
 from include import IncludeQuerySet
 
@@ -34,6 +34,7 @@ from osf.utils.machines import ReviewsMachine, NodeRequestMachine, PreprintReque
 from osf.utils.permissions import ADMIN, REVIEW_GROUPS, READ, WRITE
 from osf.utils.workflows import DefaultStates, DefaultTriggers, ReviewStates, ReviewTriggers
 from osf.utils.requests import get_request_and_user_id
+from osf.utils import permission_cache
 from website.project import signals as project_signals
 from website import settings, mails, language
 
@@ -920,7 +921,9 @@ class ContributorMixin(models.Model):
     @property
     def admin_contributor_or_group_member_ids(self):
         # Admin contributors or group members on parent, or current resource
-        return self._get_admin_user_ids(include_self=True)
+        return permission_cache.cached(
+            permission_cache.NO_USER, self, 'admin_user_ids', lambda: frozenset(self._get_admin_user_ids(include_self=True))
+        )
 
     def is_contributor_or_group_member(self, user):
         """
@@ -1530,7 +1533,7 @@ class ContributorMixin(models.Model):
         perm = '{}_{}'.format(permission, object_type)
         # Using get_group_perms to get permissions that are inferred through
         # group membership - not inherited from superuser status
-        has_permission = perm in get_group_perms(user, self)
+        has_permission = perm in permission_cache.get_group_perms(user, self)
         if object_type == 'node':
             if not has_permission and permission == READ and check_parent:
                 return self.is_admin_parent(user)
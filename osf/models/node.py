@@ -6,14 +6,12 @@ import urlparse
 import warnings
 import httplib
 
-import bson
 from django.db.models import Q
 from dirtyfields import DirtyFieldsMixin
 from django.apps import apps
 from django_bulk_update.helper import bulk_update
 from django.contrib.auth.models import AnonymousUser, Permission
 from django.contrib.contenttypes.fields import GenericRelation
-from django.core.paginator import Paginator
 from django.core.urlresolvers import reverse
 from django.db import models, connection
 from django.db.models.signals import post_save
@@ -28,7 +26,7 @@ from guardian.models import (
     GroupObjectPermissionBase,
     UserObjectPermissionBase,
 )
-from guardian.shortcuts import get_objects_for_user, get_groups_with_perms, get_group_perms
+from guardian.shortcuts import get_groups_with_perms
 
 from framework import status
 from framework.auth import oauth_scopes
@@ -44,10 +42,12 @@ from osf.models.identifiers import Identifier, IdentifierMixin
 from osf.models.licenses import NodeLicenseRecord
 from osf.models.mixins import (AddonModelMixin, CommentableMixin, Loggable, ContributorMixin, GuardianMixin,
                                NodeLinkMixin, Taggable, TaxonomizableMixin, SpamOverrideMixin)
-from osf.models.node_relation import NodeRelation
+from osf.models.node_counters import NodeCounters
+from osf.models.node_relation import NodeRelation, NodeClosure
 from osf.models.nodelog import NodeLog
 from osf.models.sanctions import RegistrationApproval
 from osf.models.private_link import PrivateLink
+from osf.models.storage_usage import StorageUsage
 from osf.models.tag import Tag
 from osf.models.user import OSFUser
 from osf.models.validators import validate_title, validate_doi
@@ -55,6 +55,8 @@ from framework.auth.core import Auth
 from osf.utils.datetime_aware_jsonfield import DateTimeAwareJSONField
 from osf.utils.fields import NonNaiveDateTimeField
 from osf.utils.requests import get_request_and_user_id, string_type_request_headers
+from osf.utils import permission_cache
+from osf.utils.cloning import bulk_clone
 from osf.utils import sanitize
 from website import language, settings
 from website.citations.utils import datetime_to_csl
@@ -76,9 +78,6 @@ from osf.utils.permissions import (
 )
 from website.util import api_url_for, api_v2_url, web_url_for
 from .base import BaseModel, GuidMixin, GuidMixinQuerySet
-from api.caching.tasks import update_storage_usage
-from api.caching import settings as cache_settings
-from api.caching.utils import storage_usage_cache
 
 
 logger = logging.getLogger(__name__)
@@ -98,49 +97,20 @@ class AbstractNodeQuerySet(GuidMixinQuerySet):
                 query = query.filter(is_deleted=False)
             return query
         else:
-            sql = """
-                WITH RECURSIVE descendants AS (
-                SELECT
-                    parent_id,
-                    child_id,
-                    1 AS LEVEL,
-                    ARRAY[parent_id] as pids
-                FROM %s
-                %s
-                WHERE is_node_link IS FALSE AND parent_id = %s %s
-                UNION ALL
-                SELECT
-                    d.parent_id,
-                    s.child_id,
-                    d.level + 1,
-                    d.pids || s.parent_id
-                FROM descendants AS d
-                    JOIN %s AS s
-                    ON d.child_id = s.parent_id
-                WHERE s.is_node_link IS FALSE AND %s = ANY(pids)
-                ) SELECT array_agg(DISTINCT child_id)
-                FROM descendants
-                WHERE parent_id = %s;
-            """
-            with connection.cursor() as cursor:
-                node_relation_table = AsIs(NodeRelation._meta.db_table)
-                cursor.execute(sql, [
-                    node_relation_table,
-                    AsIs('LEFT JOIN osf_abstractnode ON {}.child_id = osf_abstractnode.id'.format(node_relation_table) if active else ''),
-                    root.pk,
-                    AsIs('AND osf_abstractnode.is_deleted IS FALSE' if active else ''),
-                    node_relation_table,
-                    root.pk,
-                    root.pk])
-                row = cursor.fetchone()[0]
-                if not row:
-                    return AbstractNode.objects.filter(id=root.pk) if include_root else AbstractNode.objects.none()
-                if include_root:
-                    row.append(root.pk)
-                return AbstractNode.objects.filter(id__in=row)
+            # Otherwise, look the descendants up in the precomputed closure table
+            descendant_ids = NodeClosure.objects.filter(ancestor_id=root.id).values('descendant_id')
+            query = Q(id__in=descendant_ids)
+            if include_root:
+                query |= Q(id=root.id)
+            query = AbstractNode.objects.filter(query)
+            if active:
+                query = query.filter(is_deleted=False)
+            return query
 
     def can_view(self, user=None, private_link=None):
-        qs = self.filter(is_public=True)
+        # Filter on one subquery of ids instead of ORing querysets together, which makes postgres
+        # join everything and DISTINCT the result
+        query = Q(is_public=True)
 
         if private_link is not None:
             if isinstance(private_link, PrivateLink):
@@ -148,31 +118,11 @@ class AbstractNodeQuerySet(GuidMixinQuerySet):
             if not isinstance(private_link, basestring):
                 raise TypeError('"private_link" must be either {} or {}. Got {!r}'.format(str, PrivateLink, private_link))
 
-            qs |= self.filter(private_links__is_deleted=False, private_links__key=private_link)
+            query |= Q(id__in=PrivateLink.objects.filter(is_deleted=False, key=private_link).values('nodes'))
 
         if user is not None and not isinstance(user, AnonymousUser):
-            read_user_query = get_objects_for_user(user, READ_NODE, self, with_superuser=False)
-            qs |= read_user_query
-            qs |= self.extra(where=["""
-                "osf_abstractnode".id in (
-                    WITH RECURSIVE implicit_read AS (
-                        SELECT N.id as node_id
-                        FROM osf_abstractnode as N, auth_permission as P, osf_nodegroupobjectpermission as G, osf_osfuser_groups as UG
-                        WHERE P.codename = 'admin_node'
-                        AND G.permission_id = P.id
-                        AND UG.osfuser_id = %s
-                        AND G.group_id = UG.group_id
-                        AND G.content_object_id = N.id
-                        AND N.type = 'osf.node'
-                    UNION ALL
-                        SELECT "osf_noderelation"."child_id"
-                        FROM "implicit_read"
-                        LEFT JOIN "osf_noderelation" ON "osf_noderelation"."parent_id" = "implicit_read"."node_id"
-                        WHERE "osf_noderelation"."is_node_link" IS FALSE
-                    ) SELECT * FROM implicit_read
-                )
-            """], params=(user.id, ))
-        return qs.filter(is_deleted=False)
+            query |= Q(id__in=permission_cache.get_readable_node_ids(user))
+        return self.filter(query, is_deleted=False)
 
 
 class AbstractNodeManager(TypedModelManager, IncludeManager):
@@ -713,6 +663,9 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
     @classmethod
     def bulk_update_search(cls, nodes, index=None):
         from website import search
+        from website.search.elastic_search import prefetch_nodes_for_search
+        if isinstance(nodes, models.QuerySet):
+            nodes = prefetch_nodes_for_search(nodes)
         try:
             serialize = functools.partial(search.search.update_node, index=index, bulk=True, async_update=False)
             search.search.bulk_update_nodes(serialize, nodes, index=index)
@@ -892,7 +845,7 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
         if isinstance(user, AnonymousUser):
             return []
         # Returns perms either through contributorship or group membership
-        user_perms = sorted(set(get_group_perms(user, self)).intersection(PERMISSIONS), key=PERMISSIONS.index)
+        user_perms = sorted(set(permission_cache.get_group_perms(user, self)).intersection(PERMISSIONS), key=PERMISSIONS.index)
         return [CONTRIB_PERMISSIONS[perm] for perm in user_perms]
 
     def has_permission_on_children(self, user, permission):
@@ -918,6 +871,15 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
             if not include_group_admin and not self.is_contributor(user):
                 ret = False
             return ret
+        if include_group_admin:
+            if not user or user.is_anonymous:
+                return False
+            # Any admin permission on any ancestor will do, so check them all at once
+            return permission_cache.cached(user.id, self, 'admin_parent', lambda: NodeGroupObjectPermission.objects.filter(
+                content_object_id__in=NodeClosure.objects.filter(descendant_id=self.id).values('ancestor_id'),
+                permission__codename=ADMIN_NODE,
+                group__user=user,
+            ).exists())
         parent = self.parent_node
         if parent:
             return parent.is_admin_parent(user, include_group_admin=include_group_admin)
@@ -966,15 +928,30 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
         return self._get_admin_contributor_ids()
 
     def _get_admin_contributor_ids(self, include_self=False):
-        def get_admin_contributor_ids(node):
-            return node.get_group(ADMIN).user_set.filter(is_active=True).values_list('guids___id', flat=True)
         contributor_ids = set(self.contributors.values_list('guids___id', flat=True))
-        admin_ids = set(get_admin_contributor_ids(self)) if include_self else set()
-        for parent in self.parents:
-            admins = get_admin_contributor_ids(parent)
-            admin_ids.update(set(admins).difference(contributor_ids))
+        admin_ids = set(
+            self.get_group(ADMIN).user_set.filter(is_active=True).values_list('guids___id', flat=True)
+        ) if include_self else set()
+        parent_admin_ids = self._get_ancestor_admin_users(include_osf_groups=False).filter(
+            is_active=True
+        ).values_list('guids___id', flat=True)
+        admin_ids.update(set(parent_admin_ids).difference(contributor_ids))
         return admin_ids
 
+    def _get_ancestor_admin_users(self, include_osf_groups=True):
+        """Users with admin permissions on any ancestor of this node, found with one query
+        through the node closure table.
+
+        :param bool include_osf_groups: Include users who are admins through OSF Group membership
+        """
+        admin_groups = NodeGroupObjectPermission.objects.filter(
+            content_object_id__in=NodeClosure.objects.filter(descendant_id=self.id).values('ancestor_id'),
+            permission__codename=ADMIN_NODE,
+        )
+        if not include_osf_groups:
+            admin_groups = admin_groups.exclude(group__name__icontains='osfgroup')
+        return OSFUser.objects.filter(groups__id__in=admin_groups.values('group_id')).distinct()
+
     @property
     def parent_admin_contributors(self):
         """
@@ -987,17 +964,15 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
 
     @property
     def parent_admin_user_ids(self):
-        return self._get_admin_user_ids()
+        return permission_cache.cached(
+            permission_cache.NO_USER, self, 'parent_admin_user_ids', lambda: frozenset(self._get_admin_user_ids())
+        )
 
     def _get_admin_user_ids(self, include_self=False):
-        def get_admin_user_ids(node):
-            return node.get_users_with_perm(ADMIN).values_list('guids___id', flat=True)
-
         contributor_ids = set(self.get_users_with_perm(READ).values_list('guids___id', flat=True))
-        admin_ids = set(get_admin_user_ids(self)) if include_self else set()
-        for parent in self.parents:
-            admins = get_admin_user_ids(parent)
-            admin_ids.update(set(admins).difference(contributor_ids))
+        admin_ids = set(self.get_users_with_perm(ADMIN).values_list('guids___id', flat=True)) if include_self else set()
+        parent_admin_ids = self._get_ancestor_admin_users().values_list('guids___id', flat=True)
+        admin_ids.update(set(parent_admin_ids).difference(contributor_ids))
         return admin_ids
 
     @property
@@ -1402,14 +1377,15 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
 
     def copy_contributors_from(self, node):
         """Copies the contibutors from node (including permissions and visibility) into this node."""
-        contribs = []
-        for contrib in node.contributor_set.all():
-            permission = contrib.permission
-            contrib.id = None
-            contrib.node = self
-            contribs.append(contrib)
-            self.add_permission(contrib.user, permission, save=True)
-        Contributor.objects.bulk_create(contribs)
+        copied = bulk_clone(node.contributor_set.all(), overrides={'node_id': self.id})
+        if not copied:
+            return
+        contributor_ids = node.contributor_set.values('user_id')
+        for permission in (READ, WRITE, ADMIN):
+            user_ids = node.get_group(permission).user_set.filter(id__in=contributor_ids).values_list('id', flat=True)
+            self.get_group(permission).user_set.add(*user_ids)
+        NodeCounters.objects.add(self.id, 'contributor_count', copied)
+        self.save()
 
     def register_node(self, schema, auth, data, parent=None, child_ids=None, provider=None):
         """Make a frozen copy of a node.
@@ -1744,29 +1720,10 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
 
         return forked
 
-    def clone_logs(self, node, page_size=100):
-        paginator = Paginator(self.logs.order_by('pk').all(), page_size)
-        for page_num in paginator.page_range:
-            page = paginator.page(page_num)
-            # Instantiate NodeLogs "manually"
-            # because BaseModel#clone() is too slow for large projects
-            logs_to_create = [
-                NodeLog(
-                    _id=bson.ObjectId(),
-                    action=log.action,
-                    date=log.date,
-                    params=log.params,
-                    should_hide=log.should_hide,
-                    foreign_user=log.foreign_user,
-                    # Set foreign keys, not their objects
-                    # to speed things up
-                    node_id=node.pk,
-                    user_id=log.user_id,
-                    original_node_id=log.original_node_id
-                )
-                for log in page
-            ]
-            NodeLog.objects.bulk_create(logs_to_create)
+    def clone_logs(self, node):
+        # Copied in SQL, without loading them, because projects can have tens of thousands of logs
+        cloned = bulk_clone(self.logs.all(), overrides={'node_id': node.pk})
+        NodeCounters.objects.add(node.pk, 'log_count', cloned)
 
     def use_as_template(self, auth, changes=None, top_level=True, parent=None):
         """Create a new project, using an existing project as a template.
@@ -1990,6 +1947,8 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
                 children = children[99:]
 
         if first_save:
+            # Before anything that counts, e.g. the creator's contributorship
+            NodeCounters.objects.create(node=self)
             self.update_group_permissions()
             if not isinstance(self, Registration):
                 Contributor.objects.get_or_create(
@@ -2424,14 +2383,11 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
 
     @property
     def storage_usage(self):
-        key = cache_settings.STORAGE_USAGE_KEY.format(target_id=self._id)
+        return StorageUsage.objects.get_for_target(self)
 
-        storage_usage_total = storage_usage_cache.get(key)
-        if storage_usage_total:
-            return storage_usage_total
-        else:
-            update_storage_usage(self)  # sets cache
-            return storage_usage_cache.get(key)
+    @property
+    def counters(self):
+        return NodeCounters.objects.get_for_node(self)
 
 
 class NodeUserObjectPermission(UserObjectPermissionBase):
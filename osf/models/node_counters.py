@@ -0,0 +1,156 @@
+from django.apps import apps
+from django.db import connection, models
+from django.db.models import Count, F
+from django.db.models.signals import post_delete
+
+
+class NodeCountersManager(models.Manager):
+
+    COUNTERS = ('log_count', 'contributor_count', 'fork_count', 'wiki_page_count', 'comment_count', 'node_link_count')
+
+    def _counted(self, counter, node_ids):
+        """The rows `counter` counts for `node_ids`, and the field that points to their node"""
+        if counter == 'log_count':
+            return apps.get_model('osf.NodeLog').objects.filter(node_id__in=node_ids), 'node_id'
+        if counter == 'contributor_count':
+            return apps.get_model('osf.Contributor').objects.filter(node_id__in=node_ids), 'node_id'
+        if counter == 'fork_count':
+            return apps.get_model('osf.AbstractNode').objects.filter(
+                forked_from_id__in=node_ids,
+                is_deleted=False,
+            ).exclude(type='osf.registration'), 'forked_from_id'
+        if counter == 'wiki_page_count':
+            return apps.get_model('addons_wiki.WikiPage').objects.filter(node_id__in=node_ids, deleted__isnull=True), 'node_id'
+        if counter == 'comment_count':
+            return apps.get_model('osf.Comment').objects.filter(node_id__in=node_ids), 'node_id'
+        if counter == 'node_link_count':
+            return apps.get_model('osf.NodeRelation').objects.filter(parent_id__in=node_ids, is_node_link=True), 'parent_id'
+        raise ValueError('Unknown counter {}'.format(counter))
+
+    def compute(self, node_ids, counters=COUNTERS):
+        """Counts `counters` from scratch for each of `node_ids`, with one grouped query per counter.
+        Returns a dict of {node_id: {counter: count}}.
+        """
+        node_ids = list(node_ids)
+        computed = {node_id: dict.fromkeys(counters, 0) for node_id in node_ids}
+        for counter in counters:
+            queryset, node_field = self._counted(counter, node_ids)
+            counts = queryset.order_by().values(node_field).annotate(count=Count('pk')).values_list(node_field, 'count')
+            for node_id, count in counts:
+                computed[node_id][counter] = count
+        return computed
+
+    def get_for_nodes(self, nodes):
+        """Returns {node.id: NodeCounters} for many nodes at once. Nodes without stored counters
+        (created before counters were, until reconcile_node_counters backfills them) get unsaved
+        ones computed together.
+        """
+        node_ids = [node.id for node in nodes]
+        counters = {node_counters.node_id: node_counters for node_counters in self.filter(node_id__in=node_ids)}
+        missing = [node_id for node_id in node_ids if node_id not in counters]
+        if missing:
+            for node_id, counts in self.compute(missing).items():
+                counters[node_id] = self.model(node_id=node_id, **counts)
+        return counters
+
+    def get_for_node(self, node):
+        return self.get_for_nodes([node])[node.id]
+
+    def add(self, node_id, counter, delta):
+        """Adds `delta` to one of a node's counters. Nodes without stored counters are left alone,
+        theirs are computed from scratch when they are backfilled.
+        """
+        if node_id and delta:
+            self.filter(node_id=node_id).update(**{counter: F(counter) + delta})
+
+    def recount(self, node_id, counter):
+        """Recomputes one of a node's counters, for rows that can be soft-deleted or otherwise
+        stop counting without being deleted.
+        """
+        if node_id:
+            self.filter(node_id=node_id).update(**{counter: self.compute([node_id], [counter])[node_id][counter]})
+
+    def reconcile(self, node_ids):
+        """Recomputes the counters of `node_ids` and fixes any that drifted.
+        Returns the ids of the nodes that were corrected.
+        """
+        computed = self.compute(node_ids)
+        drifted = [
+            node_counters.node_id for node_counters in self.filter(node_id__in=computed.keys())
+            if any(getattr(node_counters, counter) != count for counter, count in computed[node_counters.node_id].items())
+        ]
+        for node_id in drifted:
+            self.filter(node_id=node_id).update(**computed[node_id])
+        return drifted
+
+    def create_missing(self, node_ids):
+        """Inserts zeroed counters for those of `node_ids` that have none, to be counted with
+        `reconcile` once committed. Returns the ids of the nodes that got them.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO osf_nodecounters (node_id, {counters})
+                SELECT node_id, {zeros} FROM unnest(%s::int[]) AS nodes (node_id)
+                ON CONFLICT (node_id) DO NOTHING
+                RETURNING node_id;
+                """.format(counters=', '.join(self.COUNTERS), zeros=', '.join(['0'] * len(self.COUNTERS))),
+                [list(node_ids)],
+            )
+            return [node_id for node_id, in cursor.fetchall()]
+
+
+class NodeCounters(models.Model):
+    """Counts of a node's logs, contributors, forks, wiki pages, comments and node links.
+
+    Created with the node and kept up to date by the signal receivers below (connected in `osf.apps`)
+    as those rows are created and deleted, so reading them never aggregates over all of a node's rows.
+    Comments are counted whether or not they are deleted; forks and wiki pages only while they are not.
+    The reconcile_node_counters command periodically fixes any drift and backfills the counters of
+    nodes created before them.
+    """
+    node = models.OneToOneField('AbstractNode', related_name='_counters', on_delete=models.CASCADE)
+    log_count = models.IntegerField(default=0)
+    contributor_count = models.IntegerField(default=0)
+    fork_count = models.IntegerField(default=0)
+    wiki_page_count = models.IntegerField(default=0)
+    comment_count = models.IntegerField(default=0)
+    node_link_count = models.IntegerField(default=0)
+
+    objects = NodeCountersManager()
+
+    def __unicode__(self):
+        return 'node={}, logs={}, contributors={}, forks={}'.format(
+            self.node_id, self.log_count, self.contributor_count, self.fork_count)
+
+
+def _delta(signal, created):
+    if signal is post_delete:
+        return -1
+    return 1 if created else 0
+
+
+def count_logs(sender, instance, signal, created=False, **kwargs):
+    NodeCounters.objects.add(instance.node_id, 'log_count', _delta(signal, created))
+
+
+def count_contributors(sender, instance, signal, created=False, **kwargs):
+    NodeCounters.objects.add(instance.node_id, 'contributor_count', _delta(signal, created))
+
+
+def count_comments(sender, instance, signal, created=False, **kwargs):
+    NodeCounters.objects.add(instance.node_id, 'comment_count', _delta(signal, created))
+
+
+def count_node_links(sender, instance, signal, created=False, **kwargs):
+    if instance.is_node_link:
+        NodeCounters.objects.add(instance.parent_id, 'node_link_count', _delta(signal, created))
+
+
+def recount_forks(sender, instance, **kwargs):
+    # Forks stop counting when they are deleted, which only sets is_deleted
+    NodeCounters.objects.recount(instance.forked_from_id, 'fork_count')
+
+
+def recount_wiki_pages(sender, instance, **kwargs):
+    NodeCounters.objects.recount(instance.node_id, 'wiki_page_count')
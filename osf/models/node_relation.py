@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import connection, models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 from .base import BaseModel, ObjectIDMixin
 
@@ -25,3 +27,83 @@ class NodeRelation(ObjectIDMixin, BaseModel):
         index_together = (
             ('is_node_link', 'child', 'parent'),
         )
+
+
+class NodeClosureQuerySet(models.QuerySet):
+
+    def ancestor_ids(self, node_id):
+        """Ids of all component ancestors of ``node_id``, nearest first"""
+        return self.filter(descendant_id=node_id).order_by('depth').values_list('ancestor_id', flat=True)
+
+    def descendant_ids(self, node_id):
+        """Ids of all component descendants of ``node_id``, nearest first"""
+        return self.filter(ancestor_id=node_id).order_by('depth').values_list('descendant_id', flat=True)
+
+
+class NodeClosure(models.Model):
+    """Transitive closure of the component (non node-link) hierarchy.
+
+    One row exists for every (ancestor, descendant) pair, where ``depth`` is the number
+    of NodeRelations between them. Rows are maintained by the NodeRelation signal handlers
+    below, so descendant and ancestor lookups are a single indexed query instead of a
+    recursive CTE over osf_noderelation. Nodes do not have a row for themselves.
+    """
+    ancestor = models.ForeignKey('AbstractNode', related_name='_descendant_closures', on_delete=models.CASCADE)
+    descendant = models.ForeignKey('AbstractNode', related_name='_ancestor_closures', on_delete=models.CASCADE)
+    depth = models.PositiveIntegerField()
+
+    objects = NodeClosureQuerySet.as_manager()
+
+    class Meta:
+        unique_together = ('ancestor', 'descendant')
+        index_together = (
+            ('descendant', 'ancestor', 'depth'),
+        )
+
+    def __unicode__(self):
+        return 'ancestor={}, descendant={}, depth={}'.format(self.ancestor_id, self.descendant_id, self.depth)
+
+
+# Every ancestor of the parent (and the parent itself) becomes an ancestor of
+# every descendant of the child (and the child itself)
+CLOSURE_SUBTREES_SQL = """
+    (
+        SELECT ancestor_id, depth FROM osf_nodeclosure WHERE descendant_id = %(parent_id)s
+        UNION ALL
+        SELECT %(parent_id)s, 0
+    ) AS A
+    CROSS JOIN (
+        SELECT descendant_id, depth FROM osf_nodeclosure WHERE ancestor_id = %(child_id)s
+        UNION ALL
+        SELECT %(child_id)s, 0
+    ) AS D
+"""
+
+INSERT_CLOSURE_SQL = """
+    INSERT INTO osf_nodeclosure (ancestor_id, descendant_id, depth)
+    SELECT A.ancestor_id, D.descendant_id, A.depth + D.depth + 1
+    FROM {subtrees}
+    ON CONFLICT (ancestor_id, descendant_id) DO NOTHING;
+""".format(subtrees=CLOSURE_SUBTREES_SQL)
+
+DELETE_CLOSURE_SQL = """
+    DELETE FROM osf_nodeclosure
+    WHERE (ancestor_id, descendant_id) IN (
+        SELECT A.ancestor_id, D.descendant_id
+        FROM {subtrees}
+    );
+""".format(subtrees=CLOSURE_SUBTREES_SQL)
+
+
+@receiver(post_save, sender=NodeRelation)
+def add_node_closure(sender, instance, created, **kwargs):
+    if created and not instance.is_node_link:
+        with connection.cursor() as cursor:
+            cursor.execute(INSERT_CLOSURE_SQL, {'parent_id': instance.parent_id, 'child_id': instance.child_id})
+
+
+@receiver(post_delete, sender=NodeRelation)
+def remove_node_closure(sender, instance, **kwargs):
+    if not instance.is_node_link:
+        with connection.cursor() as cursor:
+            cursor.execute(DELETE_CLOSURE_SQL, {'parent_id': instance.parent_id, 'child_id': instance.child_id})
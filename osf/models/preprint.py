@@ -13,7 +13,7 @@ from django.contrib.contenttypes.fields import GenericRelation
 from django.core.exceptions import ValidationError
 from django.dispatch import receiver
 from guardian.models import GroupObjectPermissionBase, UserObjectPermissionBase
-from guardian.shortcuts import get_objects_for_user, get_group_perms
+from guardian.shortcuts import get_objects_for_user
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth.models import AnonymousUser
 from django.db.models.signals import post_save
@@ -32,6 +32,7 @@ from osf.utils.workflows import DefaultStates, ReviewStates
 from osf.utils import sanitize
 from osf.utils.permissions import ADMIN, WRITE
 from osf.utils.requests import get_request_and_user_id, string_type_request_headers
+from osf.utils import permission_cache
 from website.notifications.emails import get_user_subscriptions
 from website.notifications import utils
 from website.identifiers.clients import CrossRefClient, ECSArXivCrossRefClient
@@ -784,7 +785,7 @@ class Preprint(DirtyFieldsMixin, GuidMixin, IdentifierMixin, ReviewableMixin, Ba
         if isinstance(user, AnonymousUser):
             return []
         perms = ['read_preprint', 'write_preprint', 'admin_preprint']
-        user_perms = sorted(set(get_group_perms(user, self)).intersection(perms), key=perms.index)
+        user_perms = sorted(set(permission_cache.get_group_perms(user, self)).intersection(perms), key=perms.index)
         return [perm.split('_')[0] for perm in user_perms]
 
     def set_privacy(self, permissions, auth=None, log=True, save=True, check_addons=False):
@@ -1,5 +1,54 @@
+import copy
+import itertools
+import json
+
+from django.conf import settings as django_settings
+from django.core.cache import caches
+from django.db import connection
+from django.utils import timezone
+
 from osf.models.base import BaseModel, ObjectIDMixin
-from osf.utils.datetime_aware_jsonfield import DateTimeAwareJSONField
+from osf.utils.datetime_aware_jsonfield import DateTimeAwareJSONEncoder, DateTimeAwareJSONField
+from website import settings
+
+# Updates only the changed keys of `data`, so concurrent requests writing different keys don't clobber each other
+UPDATE_DATA_SQL = """
+    UPDATE osf_session
+    SET data = (data || %s::jsonb) - %s::text[], modified = %s
+    WHERE id = %s;
+"""
+INVALIDATE_CHUNK_SIZE = 1000
+PROCESS_LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def _cache_key(session_id):
+    return 'osf_session:{}'.format(session_id)
+
+
+def _local_cache():
+    return caches[django_settings.OSF_SESSION_LOCAL_CACHE_NAME]
+
+
+def _shared_cache():
+    """The session cache shared by all processes, or None if none is configured. Process-local backends
+    don't count: deleting a session from them wouldn't log it out of the other processes.
+    """
+    config = django_settings.CACHES.get(django_settings.OSF_SESSION_CACHE_NAME)
+    if not config or config['BACKEND'] in PROCESS_LOCAL_CACHE_BACKENDS:
+        return None
+    return caches[django_settings.OSF_SESSION_CACHE_NAME]
+
+
+def _caches():
+    """The process-local session cache and the cache shared by all processes, if any, in lookup order"""
+    tiers = [(_local_cache(), settings.OSF_SESSION_LOCAL_CACHE_TIMEOUT)]
+    shared_cache = _shared_cache()
+    if shared_cache is not None:
+        tiers.append((shared_cache, settings.OSF_SESSION_CACHE_TIMEOUT))
+    return tiers
 
 
 class Session(ObjectIDMixin, BaseModel):
@@ -12,3 +61,74 @@ class Session(ObjectIDMixin, BaseModel):
     @property
     def is_external_first_login(self):
         return 'auth_user_external_first_login' in self.data
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(Session, cls).from_db(db, field_names, values)
+        instance._snapshot_data()
+        return instance
+
+    @classmethod
+    def load(cls, q, select_for_update=False):
+        """Read-through: sessions are looked up in the local cache, then the shared cache if any,
+        then the database, and filled into the caches they were missing from.
+        """
+        if select_for_update or not isinstance(q, basestring):
+            return super(Session, cls).load(q, select_for_update=select_for_update)
+
+        key = _cache_key(q)
+        missed = []
+        session = None
+        for cache, timeout in _caches():
+            session = cache.get(key)
+            if session is not None:
+                break
+            missed.append((cache, timeout))
+        else:
+            session = super(Session, cls).load(q)
+            if session is None:
+                return None
+
+        for cache, timeout in missed:
+            cache.set(key, session, timeout)
+        session._snapshot_data()
+        return session
+
+    @classmethod
+    def invalidate(cls, session_ids):
+        """Drop sessions from the caches. Call whenever sessions are deleted from the database."""
+        session_ids = iter(session_ids)
+        while True:
+            keys = [_cache_key(session_id) for session_id in itertools.islice(session_ids, INVALIDATE_CHUNK_SIZE)]
+            if not keys:
+                break
+            for cache, _ in _caches():
+                cache.delete_many(keys)
+
+    def _snapshot_data(self):
+        self._saved_data = copy.deepcopy(self.data)
+
+    def save(self, *args, **kwargs):
+        saved_data = getattr(self, '_saved_data', None)
+        if saved_data is None or not self.pk or args or kwargs:
+            ret = super(Session, self).save(*args, **kwargs)
+        else:
+            # Write only the keys that changed since the session was loaded or last saved
+            changed = {key: value for key, value in self.data.items() if key not in saved_data or saved_data[key] != value}
+            removed = [key for key in saved_data if key not in self.data]
+            self.modified = timezone.now()
+            with connection.cursor() as cursor:
+                cursor.execute(UPDATE_DATA_SQL, [
+                    json.dumps(changed, cls=DateTimeAwareJSONEncoder), removed, self.modified, self.pk
+                ])
+                updated = cursor.rowcount
+            # Deleted since it was loaded, write it back in full like Model.save would
+            ret = None if updated else super(Session, self).save()
+        self._snapshot_data()
+        for cache, timeout in _caches():
+            cache.set(_cache_key(self._id), self, timeout)
+        return ret
+
+    def delete(self, *args, **kwargs):
+        Session.invalidate([self._id])
+        return super(Session, self).delete(*args, **kwargs)
@@ -0,0 +1,102 @@
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Sum
+
+
+class StorageUsageManager(models.Manager):
+
+    def tracks(self, target):
+        """Usage is only counted for nodes and registrations, not preprints or quickfiles"""
+        AbstractNode = apps.get_model('osf.AbstractNode')
+        return isinstance(target, AbstractNode) and not target.is_quickfiles
+
+    def compute(self, target_ids):
+        """Sums the sizes of all versions of all active OSFStorage files for each of `target_ids`,
+        in one grouped query. Returns a dict of {target_id: bytes}.
+        """
+        AbstractNode = apps.get_model('osf.AbstractNode')
+        OsfStorageFile = apps.get_model('osf.OsfStorageFile')
+        target_ids = list(target_ids)
+        totals = OsfStorageFile.objects.filter(
+            target_content_type=ContentType.objects.get_for_model(AbstractNode),
+            target_object_id__in=target_ids,
+            versions__size__gt=0,
+        ).values('target_object_id').annotate(total=Sum('versions__size')).values_list('target_object_id', 'total')
+        usage = dict.fromkeys(target_ids, 0)
+        usage.update({target_id: int(total) for target_id, total in totals})
+        return usage
+
+    def get_file_size(self, file_ids):
+        """Sums the sizes of all versions of the files with `file_ids`"""
+        FileVersion = apps.get_model('osf.FileVersion')
+        if not file_ids:
+            return 0
+        total = FileVersion.objects.filter(
+            basefilenode__id__in=file_ids,
+            size__gt=0,
+        ).aggregate(total=Sum('size'))['total']
+        return int(total or 0)
+
+    def get_for_targets(self, targets):
+        """Returns {target.id: bytes} for many nodes at once. Nodes without a counter yet are
+        computed together and get one.
+        """
+        target_ids = [target.id for target in targets if self.tracks(target)]
+        usage = dict(self.filter(target_id__in=target_ids).values_list('target_id', 'total'))
+        missing = [target_id for target_id in target_ids if target_id not in usage]
+        if missing:
+            computed = self.compute(missing)
+            self._create_counters(computed)
+            usage.update(computed)
+        return usage
+
+    def get_for_target(self, target):
+        return self.get_for_targets([target]).get(target.id)
+
+    def add(self, target, delta):
+        """Adds `delta` bytes to `target`'s usage. A node without a counter gets one computed
+        from scratch, which already includes the change.
+        """
+        if not delta or not self.tracks(target):
+            return
+        if not self.filter(target_id=target.id).update(total=F('total') + delta):
+            self._create_counters(self.compute([target.id]))
+
+    def reconcile(self, target_ids):
+        """Recomputes usage for `target_ids` and fixes any counters that drifted.
+        Returns the ids of the targets that were corrected.
+        """
+        computed = self.compute(target_ids)
+        drifted = [
+            target_id for target_id, total in self.filter(target_id__in=computed.keys()).values_list('target_id', 'total')
+            if computed[target_id] != total
+        ]
+        for target_id in drifted:
+            self.filter(target_id=target_id).update(total=computed[target_id])
+        return drifted
+
+    def _create_counters(self, usage):
+        for target_id, total in usage.items():
+            try:
+                with transaction.atomic():
+                    self.create(target_id=target_id, total=total)
+            except IntegrityError:
+                # Created concurrently, its total is just as good
+                pass
+
+
+class StorageUsage(models.Model):
+    """Total bytes of OSFStorage file versions stored on a node.
+
+    Kept up to date with deltas as versions are uploaded and files are trashed, restored,
+    moved or copied between nodes, so reading it never aggregates over all of a node's files.
+    The reconcile_storage_usage command periodically fixes any drift.
+    """
+    target = models.OneToOneField('AbstractNode', related_name='_storage_usage', on_delete=models.CASCADE)
+    total = models.BigIntegerField(default=0)
+
+    objects = StorageUsageManager()
+
+    def __unicode__(self):
+        return 'target={}, total={}'.format(self.target_id, self.total)
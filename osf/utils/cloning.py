@@ -0,0 +1,99 @@
+"""
+Set-based copying of rows, for cloning the children of forks and registrations.
+
+`bulk_clone` copies every row of a queryset with one ``INSERT ... SELECT``, so none of them are loaded
+into Python. Object ids (``_id``) of the copies are generated in SQL and timestamps are set to now,
+like saving each copy would.
+"""
+from django.db import connection
+from django.utils import timezone
+
+# An ObjectId-like id: the current time in seconds, then 64 random bits
+OBJECT_ID_SQL = (
+    "lpad(to_hex(floor(extract(epoch FROM now()))::bigint), 8, '0')"
+    ' || substr(md5(random()::text || clock_timestamp()::text), 1, 16)'
+)
+
+
+def _is_object_id(field):
+    from osf.models.base import generate_object_id
+    return field.attname == '_id' and field.default is generate_object_id
+
+
+def _is_auto_timestamp(field):
+    return getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+
+
+def bulk_clone(queryset, overrides=None, keep=(), key=None):
+    """Copy the rows of `queryset` with a single INSERT ... SELECT.
+
+    :param QuerySet queryset: Rows to copy
+    :param dict overrides: Values of every copy, by field attname, e.g. ``{'node_id': fork.id}``
+    :param tuple keep: attnames of auto_now(_add) fields to copy from the originals instead of setting to now
+    :param str key: Column that is unique among the copies, e.g. ``'_id'``. If given, the copies are mapped
+        to their originals by it.
+    :return: ``{original pk: copy pk}`` if `key` is given, otherwise the number of rows copied
+    """
+    model = queryset.model
+    overrides = overrides or {}
+    now = timezone.now()
+    qn = connection.ops.quote_name
+
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    columns, selects, params = [], [], []
+    for field in fields:
+        columns.append(qn(field.column))
+        if field.attname in overrides:
+            selects.append('%s')
+            params.append(field.get_db_prep_save(overrides[field.attname], connection))
+        elif _is_object_id(field):
+            selects.append(OBJECT_ID_SQL)
+        elif _is_auto_timestamp(field) and field.attname not in keep:
+            selects.append('%s')
+            params.append(field.get_db_prep_save(now, connection))
+        else:
+            selects.append('S.{}'.format(qn(field.column)))
+
+    source = queryset.order_by('pk').values_list('pk', *[field.attname for field in fields])
+    source_sql, source_params = source.query.sql_with_params()
+    params.extend(source_params)
+    source_columns = ', '.join([qn('source_pk')] + columns)
+    table = qn(model._meta.db_table)
+
+    with connection.cursor() as cursor:
+        if key is None:
+            cursor.execute(
+                'INSERT INTO {table} ({columns}) SELECT {selects} FROM ({source}) AS S ({source_columns})'.format(
+                    table=table,
+                    columns=', '.join(columns),
+                    selects=', '.join(selects),
+                    source=source_sql,
+                    source_columns=source_columns,
+                ),
+                params,
+            )
+            return cursor.rowcount
+
+        key_column = qn(model._meta.get_field(key).column)
+        cursor.execute(
+            """
+            WITH copies AS (
+                SELECT S.{source_pk}, {aliased_selects} FROM ({source}) AS S ({source_columns})
+            ), inserted AS (
+                INSERT INTO {table} ({columns}) SELECT {columns} FROM copies
+                RETURNING {pk}, {key}
+            )
+            SELECT copies.{source_pk}, inserted.{pk} FROM copies JOIN inserted ON inserted.{key} = copies.{key}
+            """.format(
+                source_pk=qn('source_pk'),
+                aliased_selects=', '.join('{} AS {}'.format(select, column) for select, column in zip(selects, columns)),
+                source=source_sql,
+                source_columns=source_columns,
+                table=table,
+                columns=', '.join(columns),
+                pk=qn(model._meta.pk.column),
+                key=key_column,
+            ),
+            params,
+        )
+        return dict(cursor.fetchall())
@@ -0,0 +1,174 @@
+"""
+A request-scoped cache of permission lookups.
+
+Serializers, permission classes and templates ask for the same (user, object) permissions many times
+while handling a request. Lookups made through this module are stored on the current Django or Flask
+request, so only the first one hits the database. Outside of requests nothing is cached.
+
+The whole cache is dropped whenever group memberships, group object permissions or the component
+hierarchy change (see `osf.apps`), so a request sees its own permission changes.
+"""
+import collections
+import logging
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from guardian.shortcuts import get_group_perms as guardian_get_group_perms
+from guardian.utils import get_group_obj_perms_model
+
+from osf.utils.permissions import ADMIN_NODE, READ_NODE
+from osf.utils.requests import DummyRequest, get_current_request
+
+logger = logging.getLogger(__name__)
+
+# Lookups without a user, e.g. all admins of a node
+NO_USER = None
+
+
+def get_cache():
+    """The current request's permission cache, or None outside of requests."""
+    request = get_current_request()
+    if isinstance(request, DummyRequest):
+        return None
+    cache = getattr(request, '_permission_cache', None)
+    if cache is None:
+        cache = {'entries': {}, 'hits': 0, 'misses': 0}
+        request._permission_cache = cache
+    return cache
+
+
+def _key(user_id, obj, perm):
+    if obj is None:
+        return (user_id, None, None, perm)
+    return (user_id, obj._meta.concrete_model, obj.pk, perm)
+
+
+def cached(user_id, obj, perm, compute):
+    """Return the cached value for (`user_id`, `obj`, `perm`), calling `compute` to fill it in on a miss.
+    `obj` is None for values that only depend on the user.
+    """
+    cache = get_cache()
+    if cache is None:
+        return compute()
+    key = _key(user_id, obj, perm)
+    try:
+        value = cache['entries'][key]
+    except KeyError:
+        cache['misses'] += 1
+        value = cache['entries'][key] = compute()
+    else:
+        cache['hits'] += 1
+    return value
+
+
+def get_group_perms(user, obj):
+    """Cached `guardian.shortcuts.get_group_perms`: codenames of the permissions `user` has on `obj`
+    through contributorship or group membership.
+    """
+    return cached(user.id, obj, 'group_perms', lambda: list(guardian_get_group_perms(user, obj)))
+
+
+def _readable_node_ids(user):
+    AbstractNode = apps.get_model('osf.AbstractNode')
+    NodeClosure = apps.get_model('osf.NodeClosure')
+    NodeGroupObjectPermission = apps.get_model('osf.NodeGroupObjectPermission')
+    NodeUserObjectPermission = apps.get_model('osf.NodeUserObjectPermission')
+
+    group_perms = NodeGroupObjectPermission.objects.filter(group__user=user)
+    readable = group_perms.filter(permission__codename=READ_NODE).values_list('content_object_id', flat=True)
+    user_readable = NodeUserObjectPermission.objects.filter(
+        user=user,
+        permission__codename=READ_NODE,
+    ).values_list('content_object_id', flat=True)
+    # Admins on a project can read all of its components
+    admin_descendants = NodeClosure.objects.filter(
+        ancestor_id__in=AbstractNode.objects.filter(
+            type='osf.node',
+            id__in=group_perms.filter(permission__codename=ADMIN_NODE).values('content_object_id'),
+        ).values('id'),
+    ).values_list('descendant_id', flat=True)
+    return readable.union(user_readable, admin_descendants)
+
+
+def get_readable_node_ids(user):
+    """A queryset of the ids of every node `user` can read through contributorship, group membership or
+    by being an admin on one of its parents. Filter with it as a subquery, e.g. ``Q(id__in=...)``; the
+    unevaluated queryset is cached for the request.
+    """
+    return cached(user.id, None, 'readable_node_ids', lambda: _readable_node_ids(user))
+
+
+def prefetch_group_perms(user, objs):
+    """Fill the cache with `user`'s group permissions on each of `objs` at once, e.g. for every node on
+    a list page. Nodes also get whether `user` is an admin on any of their parents.
+    """
+    cache = get_cache()
+    if cache is None or not user or user.is_anonymous or not objs:
+        return
+    AbstractNode = apps.get_model('osf.AbstractNode')
+    NodeClosure = apps.get_model('osf.NodeClosure')
+    NodeGroupObjectPermission = apps.get_model('osf.NodeGroupObjectPermission')
+
+    by_model = collections.defaultdict(list)
+    for obj in objs:
+        by_model[obj._meta.concrete_model].append(obj)
+
+    for model, model_objs in by_model.items():
+        group_perms_model = get_group_obj_perms_model(model)
+        if group_perms_model.objects.is_generic():
+            continue
+        ids = [obj.pk for obj in model_objs]
+        perms = collections.defaultdict(list)
+        rows = group_perms_model.objects.filter(
+            content_object_id__in=ids,
+            permission__content_type=ContentType.objects.get_for_model(model),
+            group__user=user,
+        ).values_list('content_object_id', 'permission__codename')
+        for obj_id, codename in rows:
+            perms[obj_id].append(codename)
+        for obj in model_objs:
+            cache['entries'][_key(user.id, obj, 'group_perms')] = perms[obj.pk]
+
+        if issubclass(model, AbstractNode):
+            admin_parent_ids = set(NodeClosure.objects.filter(
+                descendant_id__in=ids,
+                ancestor_id__in=NodeGroupObjectPermission.objects.filter(
+                    permission__codename=ADMIN_NODE,
+                    group__user=user,
+                ).values('content_object_id'),
+            ).values_list('descendant_id', flat=True))
+            for obj in model_objs:
+                cache['entries'][_key(user.id, obj, 'admin_parent')] = obj.pk in admin_parent_ids
+
+
+def clear():
+    """Drop everything cached for the current request."""
+    cache = get_cache()
+    if cache is not None:
+        cache['entries'].clear()
+
+
+def clear_on_change(sender, **kwargs):
+    """Signal receiver, see `osf.apps`."""
+    clear()
+
+
+def stats():
+    """Hits and misses of the current request's cache."""
+    cache = get_cache()
+    if cache is None:
+        return {'hits': 0, 'misses': 0}
+    return {'hits': cache['hits'], 'misses': cache['misses']}
+
+
+def permission_cache_teardown_request(error=None):
+    cache = get_cache()
+    if cache is not None:
+        if cache['hits'] or cache['misses']:
+            logger.debug('Permission cache: {} hits, {} misses'.format(cache['hits'], cache['misses']))
+        cache['entries'].clear()
+
+
+handlers = {
+    'teardown_request': permission_cache_teardown_request,
+}
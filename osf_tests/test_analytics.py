@@ -13,7 +13,8 @@ from datetime import datetime
 
 from addons.osfstorage.models import OsfStorageFile
 from framework import analytics
-from osf.models import PageCounter
+from framework.analytics.tasks import flush_user_activity_counters
+from osf.models import BaseFileNode, PageCounter, PageCounterDay, UserActivityCounter
 
 from tests.base import OsfTestCase
 from osf_tests.factories import UserFactory, ProjectFactory
@@ -41,6 +42,29 @@ class TestAnalytics(OsfTestCase):
         analytics.increment_user_activity_counters(user._id, 'project_created', date.isoformat())
         assert_equal(user.get_activity_points(), 1)
 
+    def test_flush_user_activity_counters(self):
+        user = UserFactory()
+        date = timezone.now()
+
+        analytics.increment_user_activity_counters(user._id, 'project_created', date.isoformat())
+        analytics.increment_user_activity_counters(user._id, 'project_created', date.isoformat())
+        analytics.increment_user_activity_counters(user._id, 'wiki_updated', date.isoformat())
+        assert_equal(flush_user_activity_counters(), 3)
+        assert_equal(flush_user_activity_counters(), 0)
+
+        counter = UserActivityCounter.objects.get(_id=user._id)
+        assert_equal(counter.total, 3)
+        assert_equal(
+            set(counter.days.values_list('action', 'date', 'total')),
+            {('project_created', date.date(), 2), ('wiki_updated', date.date(), 1)}
+        )
+
+        analytics.increment_user_activity_counters(user._id, 'project_created', date.isoformat())
+        assert_equal(user.get_activity_points(), 4)
+        flush_user_activity_counters()
+        assert_equal(counter.days.get(action='project_created').total, 3)
+        assert_equal(user.get_activity_points(), 4)
+
 
 @pytest.fixture()
 def user():
@@ -96,12 +120,16 @@ class TestPageCounter:
         page_counter_id = 'download:{}:{}'.format(project._id, file_node.id)
 
         PageCounter.update_counter(page_counter_id, {})
+        assert PageCounter.flush_increments() == 1
 
         page_counter = PageCounter.objects.get(_id=page_counter_id)
         assert page_counter.total == 1
         assert page_counter.unique == 1
+        assert page_counter.action == 'download'
+        assert page_counter.resource == project.guids.first()
 
         PageCounter.update_counter(page_counter_id, {})
+        PageCounter.flush_increments()
 
         page_counter.refresh_from_db()
         assert page_counter.total == 2
@@ -113,15 +141,59 @@ class TestPageCounter:
         page_counter_id = 'download:{}:{}'.format(project._id, file_node.id)
 
         PageCounter.update_counter(page_counter_id, {'contributors': project.contributors})
+        PageCounter.flush_increments()
         page_counter = PageCounter.objects.get(_id=page_counter_id)
         assert page_counter.total == 0
         assert page_counter.unique == 0
 
         PageCounter.update_counter(page_counter_id, {'contributors': project.contributors})
+        PageCounter.flush_increments()
 
         page_counter.refresh_from_db()
         assert page_counter.total == 0
         assert page_counter.unique == 0
+        # Contributors still count towards the day's visits
+        day = page_counter.days.get()
+        assert day.total == 2
+        assert day.unique == 1
+
+    @mock.patch('osf.models.analytics.session')
+    def test_get_basic_counters_includes_pending(self, mock_session, project, file_node):
+        mock_session.data = {}
+        page_counter_id = 'download:{}:{}'.format(project._id, file_node.id)
+        assert PageCounter.get_basic_counters(page_counter_id) == (None, None)
+
+        PageCounter.update_counter(page_counter_id, {})
+        assert PageCounter.get_basic_counters(page_counter_id) == (1, 1)
+
+        PageCounter.flush_increments()
+        PageCounter.update_counter(page_counter_id, {})
+        assert PageCounter.get_basic_counters(page_counter_id) == (1, 2)
+        assert PageCounter.get_totals('download:{}:'.format(project._id)) == {page_counter_id: 2}
+        assert PageCounter.get_page_totals([page_counter_id, 'download:{}:none'.format(project._id)]) == {page_counter_id: 2}
+
+    @mock.patch('osf.models.analytics.session')
+    def test_get_download_counts(self, mock_session, file_node, file_node2, django_assert_num_queries):
+        mock_session.data = {}
+        PageCounter.update_counter(file_node.get_page_counter_id('download'), {})
+        PageCounter.flush_increments()
+        PageCounter.update_counter(file_node.get_page_counter_id('download'), {})
+
+        with django_assert_num_queries(2):
+            counts = BaseFileNode.get_download_counts([file_node, file_node2])
+        assert counts == {file_node.pk: 2, file_node2.pk: 0}
+        assert counts[file_node.pk] == file_node.get_download_count()
+
+    @mock.patch('osf.models.analytics.session')
+    def test_flush_increments_in_batches(self, mock_session, project, file_node, file_node2):
+        mock_session.data = {}
+        for node in (file_node, file_node2, file_node):
+            PageCounter.update_counter('download:{}:{}'.format(project._id, node.id), {})
+
+        assert PageCounter.flush_increments(batch_size=2) == 2
+        assert PageCounter.flush_increments(batch_size=2) == 1
+        assert PageCounter.flush_increments(batch_size=2) == 0
+        assert PageCounter.objects.get(_id='download:{}:{}'.format(project._id, file_node.id)).total == 2
 
     def test_get_all_downloads_on_date(self, page_counter, page_counter2):
         """
@@ -137,6 +209,12 @@ class TestPageCounter:
 
         assert total_downloads == 45
 
+    def test_get_all_downloads_on_date_includes_days(self, page_counter, page_counter2):
+        date = datetime(2018, 2, 4)
+        PageCounterDay.objects.create(page_counter=page_counter2, date=date.date(), total=5, unique=2)
+
+        assert PageCounter.get_all_downloads_on_date(date) == 50
+
     def test_get_all_downloads_on_date_exclude_versions(self, page_counter, page_counter2, page_counter_for_individual_version):
         """
         This method tests that individual version counts for file node's aren't "double counted" in the totals
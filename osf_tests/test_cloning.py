@@ -0,0 +1,80 @@
+import pytest
+
+from addons.wiki.models import WikiPage
+from framework.auth import Auth
+from osf.models import NodeLog
+from osf.utils.cloning import bulk_clone
+from osf.utils.permissions import ADMIN, WRITE
+from osf_tests.factories import AuthUserFactory, NodeLogFactory, ProjectFactory, RegistrationFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def user():
+    return AuthUserFactory()
+
+@pytest.fixture()
+def project(user):
+    return ProjectFactory(creator=user)
+
+@pytest.fixture()
+def other_project(user):
+    return ProjectFactory(creator=user)
+
+
+class TestBulkClone:
+
+    def test_copies_rows(self, project, other_project, django_assert_num_queries):
+        NodeLogFactory(node=project, action='made_public', params={'foo': 'bar'})
+        count = project.logs.count()
+
+        with django_assert_num_queries(1):
+            assert bulk_clone(project.logs.all(), overrides={'node_id': other_project.id}) == count
+
+        copy = other_project.logs.get(action='made_public')
+        original = project.logs.get(action='made_public')
+        assert copy.params == {'foo': 'bar'}
+        assert copy.date == original.date
+        assert copy._id != original._id
+        assert len(copy._id) == 24
+        assert copy.created > original.created
+
+    def test_maps_originals_to_copies(self, project, other_project):
+        log_ids = list(project.logs.values_list('id', flat=True))
+
+        mapping = bulk_clone(project.logs.all(), overrides={'node_id': other_project.id}, key='_id')
+        assert sorted(mapping.keys()) == sorted(log_ids)
+        for original_id, copy_id in mapping.items():
+            original, copy = NodeLog.objects.get(id=original_id), NodeLog.objects.get(id=copy_id)
+            assert copy.node == other_project
+            assert copy.action == original.action
+
+    def test_keep_timestamps(self, project, other_project):
+        original = project.logs.first()
+        mapping = bulk_clone(project.logs.filter(id=original.id), overrides={'node_id': other_project.id}, keep=('created',), key='_id')
+        assert NodeLog.objects.get(id=mapping[original.id]).created == original.created
+
+
+class TestCloningNodes:
+
+    def test_fork_copies_logs_contributors_and_wikis(self, project, user):
+        contrib = AuthUserFactory()
+        project.add_contributor(contrib, permissions=WRITE, visible=False, auth=Auth(user), save=True)
+        page = WikiPage.objects.create_for_node(project, 'notes', 'first', Auth(user))
+        page.update(user, 'second')
+
+        fork = project.fork_node(Auth(user))
+
+        # The original's logs, and the fork's own
+        assert fork.logs.count() == project.logs.count() + 1
+        assert fork.counters.log_count == fork.logs.count()
+        forked_page = WikiPage.objects.get_for_node(fork, 'notes')
+        assert list(forked_page.versions.order_by('created').values_list('content', flat=True)) == ['first', 'second']
+        assert forked_page.get_version().html(fork) == '<p>second</p>'
+
+        registration = RegistrationFactory(project=project)
+        assert registration.has_permission(contrib, WRITE)
+        assert not registration.has_permission(contrib, ADMIN)
+        assert not registration.get_visible(contrib)
+        assert registration.counters.contributor_count == 2
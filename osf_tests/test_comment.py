@@ -1,5 +1,6 @@
 import pytest
 from collections import OrderedDict
+from django.utils import timezone
 
 from addons.box.models import BoxFile
 from addons.dropbox.models import DropboxFile
@@ -450,6 +451,23 @@ class TestCommentModel:
         n_unread = Comment.find_n_unread(user=user, node=project, page='node')
         assert n_unread == 0
 
+    def test_find_unread_for_nodes(self):
+        user = AuthUserFactory()
+        project, other_project, private_project = ProjectFactory(), ProjectFactory(), ProjectFactory()
+        project.add_contributor(user, save=True)
+        other_project.add_contributor(user, save=True)
+        CommentFactory(node=project, user=project.creator)
+        CommentFactory(node=project, user=project.creator)
+        CommentFactory(node=project, user=user)
+        CommentFactory(node=other_project, user=other_project.creator)
+        CommentFactory(node=private_project, user=private_project.creator)
+        user.comments_viewed_timestamp[other_project._id] = timezone.now()
+        user.save()
+
+        n_unread = Comment.find_n_unread_for_nodes(user, [project, other_project, private_project])
+        assert n_unread == {project.id: 2, other_project.id: 0, private_project.id: 0}
+        assert n_unread[project.id] == Comment.find_n_unread(user=user, node=project, page='node')
+
 
 # copied from tests/test_comments.py
 class FileCommentMoveRenameTestMixin(object):
@@ -669,6 +687,27 @@ class FileCommentMoveRenameTestMixin(object):
         file_comments = Comment.objects.filter(root_target=self.guid.pk)
         assert file_comments.count() == 1
 
+    def test_comment_counts_move_when_file_moved_from_project_to_component(self, project, component, user):
+        source = {
+            'path': '/file.txt',
+            'node': project,
+            'provider': self.provider
+        }
+        destination = {
+            'path': '/file.txt',
+            'node': component,
+            'provider': self.provider
+        }
+        self._create_file_with_comment(node=source['node'], path=source['path'], user=user)
+        assert project.counters.comment_count == 1
+        assert component.counters.comment_count == 0
+
+        payload = self._create_payload('move', user, source, destination, self.file._id)
+        update_file_guid_referent(self=None, target=destination['node'], event_type='addon_file_moved', payload=payload)
+
+        assert project.counters.comment_count == 0
+        assert component.counters.comment_count == 1
+
     def test_comments_move_when_file_moved_from_component_to_project(self, project, component, user):
         source = {
             'path': '/file.txt',
@@ -980,6 +1019,28 @@ class TestOsfstorageFileCommentMoveRename(FileCommentMoveRenameTestMixin):
         file_comments = Comment.objects.filter(root_target=self.guid.pk)
         assert file_comments.count() == 1
 
+    def test_comment_counts_move_when_file_moved_from_project_to_component(self, project, component, user):
+        source = {
+            'path': '/file.txt',
+            'node': project,
+            'provider': self.provider
+        }
+        destination = {
+            'path': '/file.txt',
+            'node': component,
+            'provider': self.provider
+        }
+        self._create_file_with_comment(node=source['node'], path=source['path'], user=user)
+        assert project.counters.comment_count == 1
+        assert component.counters.comment_count == 0
+
+        self.file.move_under(destination['node'].get_addon(self.provider).get_root())
+        payload = self._create_payload('move', user, source, destination, self.file._id)
+        update_file_guid_referent(self=None, target=destination['node'], event_type='addon_file_moved', payload=payload)
+
+        assert project.counters.comment_count == 0
+        assert component.counters.comment_count == 1
+
     def test_comments_move_when_file_moved_from_component_to_project(self, project, component, user):
         source = {
             'path': '/file.txt',
@@ -1401,6 +1401,42 @@ class TestSearchMigration(OsfTestCase):
         res = self.es.search(index=settings.ELASTIC_INDEX, doc_type='collectionSubmission', search_type='count', body=count_query)
         assert res['hits']['total'] == 2
 
+@pytest.mark.django_db
+class TestPrefetchForSearch:
+
+    @pytest.fixture()
+    def user(self):
+        return factories.UserFactory()
+
+    def test_prefetched_node_serializes_the_same(self, user):
+        parent = factories.ProjectFactory(creator=user, is_public=True)
+        node = factories.NodeFactory(parent=parent, creator=user, is_public=True)
+        node.add_contributor(factories.UserFactory(), visible=False, save=True)
+        node.add_contributor(factories.UserFactory(), visible=True, save=True)
+        node.add_tag('Mushroom', auth=Auth(user), save=True)
+        node.affiliated_institutions.add(factories.InstitutionFactory())
+
+        expected = elastic_search.serialize_node(node, 'component')
+        prefetched = elastic_search.prefetch_nodes_for_search(
+            type(node).objects.filter(id__in=[node.id, parent.id])
+        ).get(id=node.id)
+
+        assert elastic_search.serialize_node(prefetched, 'component') == expected
+        assert expected['parent_id'] == parent._id
+        assert len(expected['contributors']) == 2
+
+    def test_prefetched_preprint_serializes_the_same(self, user):
+        preprint = factories.PreprintFactory(creator=user)
+        preprint.add_contributor(factories.UserFactory(), visible=False, save=True)
+        preprint.add_tag('Mushroom', auth=Auth(user), save=True)
+
+        expected = elastic_search.serialize_preprint(preprint, 'preprint')
+        prefetched = elastic_search.prefetch_preprints_for_search(Preprint.objects.filter(id=preprint.id)).get()
+
+        assert elastic_search.serialize_preprint(prefetched, 'preprint') == expected
+        assert expected['tags'] == ['Mushroom']
+
+
 @pytest.mark.enable_search
 @pytest.mark.enable_enqueue_task
 class TestSearchFiles(OsfTestCase):
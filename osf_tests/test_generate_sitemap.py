@@ -4,15 +4,23 @@ import pytest
 import mock
 import shutil
 import tempfile
-import xml
+import xml.etree.ElementTree
 import urlparse
 
+from osf.models import OSFUser
 from scripts import generate_sitemap
 from osf_tests.factories import (AuthUserFactory, ProjectFactory, RegistrationFactory, CollectionFactory,
                                  PreprintFactory, PreprintProviderFactory, EmbargoFactory, UnconfirmedUserFactory)
 from website import settings
 
 
+def parse_sitemap_urls(file_path):
+    with open(file_path) as f:
+        tree = xml.etree.ElementTree.parse(f)
+    namespace = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+    return [element.text for element in tree.iter(namespace + 'loc')]
+
+
 def get_all_sitemap_urls():
     # Create temporary directory for the sitemaps to be generated
 
@@ -175,3 +183,42 @@ class TestGenerateSitemap:
             urls = get_all_sitemap_urls()
 
         assert urlparse.urljoin(settings.DOMAIN, project_deleted.url) not in urls
+
+    def test_sitemap_split_across_files(self, all_included_links, create_tmp_directory):
+
+        with mock.patch('website.settings.STATIC_FOLDER', create_tmp_directory), \
+                mock.patch('website.settings.SITEMAP_URL_MAX', 4), \
+                mock.patch('website.settings.SITEMAP_QUERY_BATCH_SIZE', 1):
+            generate_sitemap.main()
+            sitemap_dir = os.path.join(settings.STATIC_FOLDER, 'sitemaps')
+            index_urls = parse_sitemap_urls(os.path.join(sitemap_dir, 'sitemap_index.xml'))
+            file_names = sorted(name for name in os.listdir(sitemap_dir) if name.endswith('.xml') and name != 'sitemap_index.xml')
+            urls = []
+            for file_name in file_names:
+                file_urls = parse_sitemap_urls(os.path.join(sitemap_dir, file_name))
+                assert len(file_urls) <= 4
+                assert os.path.exists(os.path.join(sitemap_dir, file_name + '.gz'))
+                urls.extend(file_urls)
+
+        shutil.rmtree(create_tmp_directory)
+
+        assert len(file_names) == len(index_urls) > 1
+        assert len(urls) == len(all_included_links)
+        assert set(urls) == set(all_included_links)
+
+    def test_sharding_is_rejected_in_daemonic_processes(self, create_tmp_directory):
+        with mock.patch('website.settings.STATIC_FOLDER', create_tmp_directory), \
+                mock.patch('multiprocessing.current_process', return_value=mock.Mock(daemon=True)), \
+                mock.patch('multiprocessing.Pool') as mock_pool:
+            with pytest.raises(ValueError):
+                generate_sitemap.Sitemap().generate(processes=2)
+        shutil.rmtree(create_tmp_directory)
+
+        assert not mock_pool.called
+
+    def test_iterate_keyset(self, user_admin_project_public, user_admin_project_private):
+        users = OSFUser.objects.filter(id__in=[user_admin_project_public.id, user_admin_project_private.id])
+        rows = list(generate_sitemap.iterate_keyset(users, ['guids___id'], batch_size=1))
+
+        assert [row['pk'] for row in rows] == sorted(users.values_list('id', flat=True))
+        assert set(row['guids___id'] for row in rows) == {user_admin_project_public._id, user_admin_project_private._id}
@@ -1,7 +1,10 @@
+import mock
 import pytest
+from django.http import HttpResponse
 from nose.tools import assert_raises
 
 from framework.celery_tasks import handlers
+from framework.postcommit_tasks import handlers as postcommit_handlers
 from website.project.tasks import on_node_updated
 
 
@@ -40,3 +43,63 @@ class TestCeleryHandlers:
                 'website.project.tasks.on_node_updated',
                 predicate=lambda task: task.kwargs['node_id'] == 'woop'
             )
+
+
+def record_call(calls, value):
+    calls.append(value)
+
+
+class TestPostcommitHandlers:
+
+    @pytest.fixture(autouse=True)
+    def request_context(self):
+        postcommit_handlers.postcommit_before_request()
+        # Queue tasks as outside of the test app, where they'd run immediately
+        with mock.patch.object(postcommit_handlers, 'context_stack', mock.Mock(top=None)):
+            yield
+
+    def test_tasks_run_on_shared_pool(self):
+        calls = []
+        postcommit_handlers.enqueue_postcommit_task(record_call, (calls, 1), {})
+        postcommit_handlers.enqueue_postcommit_task(record_call, (calls, 2), {})
+
+        postcommit_handlers.postcommit_after_request(HttpResponse())
+
+        assert sorted(calls) == [1, 2]
+        assert postcommit_handlers.postcommit_pool() is postcommit_handlers.postcommit_pool()
+        assert [name for name, _ in postcommit_handlers.postcommit_stats()['timings']] == [
+            'osf_tests.test_handlers.record_call',
+            'osf_tests.test_handlers.record_call',
+        ]
+
+    def test_duplicate_tasks_are_counted(self):
+        calls = []
+        for _ in range(3):
+            postcommit_handlers.enqueue_postcommit_task(record_call, (calls, 1), {})
+
+        postcommit_handlers.postcommit_after_request(HttpResponse())
+
+        assert calls == [1]
+        assert postcommit_handlers.postcommit_stats()['deduplicated'] == 2
+
+    def test_tasks_not_run_on_error(self):
+        calls = []
+        postcommit_handlers.enqueue_postcommit_task(record_call, (calls, 1), {})
+
+        postcommit_handlers.postcommit_after_request(HttpResponse(status=500))
+
+        assert calls == []
+
+    @mock.patch('framework.postcommit_tasks.handlers.group')
+    @mock.patch('framework.postcommit_tasks.handlers.settings.POSTCOMMIT_CELERY_CHUNK_SIZE', 2)
+    @mock.patch('framework.postcommit_tasks.handlers.settings.USE_CELERY', True)
+    def test_celery_tasks_published_in_chunks(self, mock_group):
+        for node_id in ['a', 'b', 'c']:
+            postcommit_handlers.postcommit_celery_queue().update({
+                node_id: on_node_updated.si(node_id, 'user', False, ['title'])
+            })
+
+        postcommit_handlers.postcommit_after_request(HttpResponse())
+
+        assert [len(call[0][0]) for call in mock_group.call_args_list] == [2, 1]
+        assert mock_group.return_value.apply_async.call_count == 2
@@ -33,6 +33,7 @@ from osf.models import (
     RegistrationSchema,
     Sanction,
     NodeRelation,
+    NodeClosure,
     Registration,
     DraftRegistration,
     DraftRegistrationApproval,
@@ -40,6 +41,7 @@ from osf.models import (
 
 from addons.wiki.models import WikiPage, WikiVersion
 from osf.models.node import AbstractNodeQuerySet
+from osf.management.commands.populate_node_closure import populate_node_closure
 from osf.models.spam import SpamStatus
 from osf.exceptions import ValidationError, ValidationValueError, UserStateError
 from osf.utils.workflows import DefaultStates
@@ -455,6 +457,63 @@ class TestParentNode:
         assert project.parent_node is None
 
 
+class TestNodeClosure:
+
+    def test_closure_rows_created_for_components(self):
+        root = ProjectFactory()
+        child = NodeFactory(parent=root)
+        grandchild = NodeFactory(parent=child)
+
+        assert list(NodeClosure.objects.ancestor_ids(grandchild.id)) == [child.id, root.id]
+        assert list(NodeClosure.objects.descendant_ids(root.id)) == [child.id, grandchild.id]
+        assert NodeClosure.objects.get(ancestor=root, descendant=grandchild).depth == 2
+
+    def test_node_links_not_in_closure(self):
+        root = ProjectFactory()
+        linked = ProjectFactory()
+        root.add_node_link(linked, auth=Auth(root.creator), save=True)
+
+        assert not NodeClosure.objects.filter(ancestor=root).exists()
+        assert 0 == Node.objects.get_children(root).count()
+
+    def test_closure_rows_removed_with_relation(self):
+        root = ProjectFactory()
+        child = NodeFactory(parent=root)
+        grandchild = NodeFactory(parent=child)
+        other_root = ProjectFactory()
+        NodeFactory(parent=other_root)
+
+        NodeRelation.objects.get(parent=root, child=child).delete()
+
+        assert not NodeClosure.objects.filter(ancestor=root).exists()
+        assert list(NodeClosure.objects.ancestor_ids(grandchild.id)) == [child.id]
+        assert NodeClosure.objects.filter(ancestor=other_root).count() == 1
+
+    def test_populate_node_closure(self):
+        root = ProjectFactory()
+        child = NodeFactory(parent=root)
+        grandchild = NodeFactory(parent=child)
+        NodeClosure.objects.all().delete()
+
+        populate_node_closure()
+
+        assert NodeClosure.objects.filter(descendant=grandchild).count() == 2
+        assert list(Node.objects.get_children(child)) == [grandchild]
+
+    def test_parent_admin_users_through_closure(self):
+        root = ProjectFactory()
+        admin = root.creator
+        other = UserFactory()
+        child = NodeFactory(parent=root, creator=other)
+        grandchild = NodeFactory(parent=child, creator=other)
+
+        assert admin._id in grandchild.parent_admin_user_ids
+        assert admin._id in grandchild.parent_admin_contributor_ids
+        assert other._id not in grandchild.parent_admin_user_ids
+        assert grandchild.is_admin_parent(admin)
+        assert not grandchild.is_admin_parent(UserFactory())
+
+
 class TestRoot:
     @pytest.fixture()
     def project(self, user):
@@ -0,0 +1,125 @@
+import pytest
+
+from addons.wiki.tests.factories import WikiFactory
+from framework.auth import Auth
+from osf.management.commands.reconcile_node_counters import backfill_node_counters, reconcile_node_counters
+from osf.models import NodeCounters, NodeLog
+from osf_tests.factories import (
+    AuthUserFactory,
+    CommentFactory,
+    NodeFactory,
+    NodeLogFactory,
+    ProjectFactory,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def user():
+    return AuthUserFactory()
+
+@pytest.fixture()
+def project(user):
+    return ProjectFactory(creator=user)
+
+@pytest.fixture()
+def other_project(user):
+    return ProjectFactory(creator=user)
+
+
+class TestNodeCounters:
+
+    def test_counters_created_with_node(self, project):
+        counters = NodeCounters.objects.get(node=project)
+        assert counters.log_count == project.logs.count()
+        assert counters.contributor_count == 1
+
+    def test_missing_counters_computed_without_saving(self, project, user):
+        project.add_contributor(AuthUserFactory(), auth=Auth(user), save=True)
+        NodeCounters.objects.filter(node=project).delete()
+
+        counters = project.counters
+        assert counters.log_count == project.logs.count()
+        assert counters.contributor_count == 2
+        assert not NodeCounters.objects.filter(node=project).exists()
+
+    def test_logs(self, project):
+        log_count = project.counters.log_count
+        log = NodeLogFactory(node=project)
+        assert project.counters.log_count == log_count + 1
+
+        log.delete()
+        assert project.counters.log_count == log_count
+
+    def test_contributors(self, project, user):
+        contrib = AuthUserFactory()
+        assert project.counters.contributor_count == 1
+
+        project.add_contributor(contrib, auth=Auth(user), save=True)
+        assert project.counters.contributor_count == 2
+
+        project.remove_contributor(contrib, auth=Auth(user))
+        assert project.counters.contributor_count == 1
+
+    def test_forks(self, project, user):
+        assert project.counters.fork_count == 0
+        fork = project.fork_node(Auth(user))
+        assert project.counters.fork_count == 1
+
+        fork.remove_node(Auth(user))
+        assert project.counters.fork_count == 0
+
+    def test_wiki_pages(self, project, user):
+        assert project.counters.wiki_page_count == 0
+        wiki = WikiFactory(node=project, user=user, page_name='notes')
+        assert project.counters.wiki_page_count == 1
+
+        wiki.delete(Auth(user))
+        assert project.counters.wiki_page_count == 0
+
+    def test_comments(self, project, user):
+        assert project.counters.comment_count == 0
+        CommentFactory(node=project, user=user)
+        assert project.counters.comment_count == 1
+
+    def test_node_links(self, project, other_project, user):
+        assert project.counters.node_link_count == 0
+        project.add_node_link(other_project, auth=Auth(user))
+        assert project.counters.node_link_count == 1
+
+        project.rm_node_link(other_project, auth=Auth(user))
+        assert project.counters.node_link_count == 0
+
+    def test_get_for_nodes(self, project, other_project, django_assert_num_queries):
+        child = NodeFactory(parent=project)
+        NodeCounters.objects.filter(node=project).delete()
+
+        counters = NodeCounters.objects.get_for_nodes([project, other_project, child])
+        assert counters[project.id].log_count == project.logs.count()
+        assert counters[other_project.id].contributor_count == 1
+        with django_assert_num_queries(1):
+            NodeCounters.objects.get_for_nodes([other_project, child])
+
+    def test_backfill(self, project, other_project):
+        NodeCounters.objects.filter(node__in=[project, other_project]).delete()
+
+        assert backfill_node_counters(dry_run=True) == 2
+        assert not NodeCounters.objects.filter(node=project).exists()
+
+        assert backfill_node_counters(batch_size=1) == 2
+        counters = NodeCounters.objects.get(node=project)
+        assert counters.log_count == project.logs.count()
+        assert counters.contributor_count == 1
+        assert backfill_node_counters() == 0
+
+    def test_reconcile(self, project, other_project):
+        project.counters
+        other_project.counters
+        NodeCounters.objects.filter(node=project).update(log_count=1000)
+
+        assert reconcile_node_counters(dry_run=True) == 1
+        assert NodeCounters.objects.get(node=project).log_count == 1000
+
+        assert reconcile_node_counters() == 1
+        assert NodeCounters.objects.get(node=project).log_count == NodeLog.objects.filter(node=project).count()
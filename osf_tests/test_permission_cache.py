@@ -0,0 +1,85 @@
+import pytest
+
+from framework.auth import Auth
+from osf.models import AbstractNode, NodeRelation
+from osf.utils import permission_cache
+from osf.utils.permissions import ADMIN, READ, WRITE
+from osf_tests.factories import AuthUserFactory, NodeFactory, ProjectFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def user():
+    return AuthUserFactory()
+
+
+@pytest.fixture()
+def project(user):
+    return ProjectFactory(creator=user)
+
+
+@pytest.mark.usefixtures('request_context')
+class TestPermissionCache:
+
+    def test_permissions_are_cached(self, user, project, django_assert_num_queries):
+        assert project.has_permission(user, ADMIN)
+        hits = permission_cache.stats()['hits']
+        with django_assert_num_queries(0):
+            assert project.has_permission(user, WRITE)
+            assert project.get_permissions(user) == [READ, WRITE, ADMIN]
+        assert permission_cache.stats()['hits'] == hits + 2
+
+    def test_contributor_changes_clear_the_cache(self, user, project):
+        contrib = AuthUserFactory()
+        assert not project.has_permission(contrib, READ)
+        project.add_contributor(contrib, permissions=WRITE, save=True)
+        assert project.has_permission(contrib, WRITE)
+        project.set_permissions(contrib, READ, save=True)
+        assert not project.has_permission(contrib, WRITE)
+        project.remove_contributor(contrib, auth=Auth(user))
+        assert not project.has_permission(contrib, READ)
+
+    def test_new_parent_clears_the_cache(self, user, project):
+        node = NodeFactory()
+        assert not node.has_permission(user, READ)
+        NodeRelation.objects.create(parent=project, child=node)
+        # Admins on a parent can read its components
+        assert node.has_permission(user, READ)
+
+    def test_prefetch_group_perms(self, user, project, django_assert_num_queries):
+        child = NodeFactory(parent=project)
+        other = NodeFactory()
+        permission_cache.prefetch_group_perms(user, [project, child, other])
+        with django_assert_num_queries(0):
+            assert project.has_permission(user, ADMIN)
+            assert child.has_permission(user, READ)
+            assert not other.has_permission(user, READ)
+
+    def test_readable_node_ids(self, user, project, django_assert_num_queries):
+        component = NodeFactory(parent=project, creator=AuthUserFactory())
+        private = ProjectFactory()
+        readable_ids = set(permission_cache.get_readable_node_ids(user))
+        # Admins on a parent can read its components
+        assert {project.id, component.id} <= readable_ids
+        assert private.id not in readable_ids
+        with django_assert_num_queries(0):
+            permission_cache.get_readable_node_ids(user)
+
+        private.add_contributor(user, permissions=READ, save=True)
+        assert private.id in set(permission_cache.get_readable_node_ids(user))
+
+    def test_can_view_filters_on_a_subquery(self, user, project, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            assert project in AbstractNode.objects.can_view(user)
+        sql = str(AbstractNode.objects.can_view(user).query)
+        assert 'UNION' in sql
+
+
+class TestPermissionCacheOutsideRequests:
+
+    def test_nothing_is_cached(self, user, project, django_assert_num_queries):
+        project.has_permission(user, ADMIN)
+        with django_assert_num_queries(1):
+            project.has_permission(user, ADMIN)
+        assert permission_cache.stats() == {'hits': 0, 'misses': 0}
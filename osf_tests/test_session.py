@@ -1,9 +1,17 @@
+import time
+
+import mock
 import pytest
+from django.conf import settings as django_settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import override_settings
 
 from framework.sessions import utils
 from tests.base import DbTestCase
 from osf_tests.factories import SessionFactory, UserFactory
 from osf.models import OSFUser, Session
+from osf.models.session import _caches, _shared_cache
+from website import settings as website_settings
 
 @pytest.mark.django_db
 class TestSession:
@@ -30,6 +38,69 @@ class TestSession:
         Session.objects.filter(data__auth_user_id='123ab').delete()
         assert Session.objects.count() == 1
 
+    @pytest.mark.django_assert_num_queries
+    def test_load_is_cached(self, django_assert_num_queries):
+        session = Session(data={'auth_user_id': 'abc12'})
+        session.save()
+
+        with django_assert_num_queries(0):
+            loaded = Session.load(session._id)
+        assert loaded.data == {'auth_user_id': 'abc12'}
+
+    def test_load_reads_through_to_database(self):
+        session = Session(data={'auth_user_id': 'abc12'})
+        session.save()
+        Session.invalidate([session._id])
+
+        assert Session.load(session._id).data == {'auth_user_id': 'abc12'}
+        assert Session.load('notasession') is None
+
+    def test_save_only_writes_changed_keys(self):
+        session = Session(data={'auth_user_id': 'abc12', 'auth_user_fullname': 'Freddie', 'remove_me': True})
+        session.save()
+
+        loaded = Session.load(session._id)
+        # Changed by another request since this one loaded the session
+        Session.objects.filter(id=session.id).update(data={'auth_user_id': 'abc12', 'auth_user_fullname': 'Freddie', 'remove_me': True, 'other': 1})
+
+        loaded.data['auth_user_fullname'] = 'Brian'
+        del loaded.data['remove_me']
+        loaded.save()
+
+        assert Session.objects.get(id=session.id).data == {'auth_user_id': 'abc12', 'auth_user_fullname': 'Brian', 'other': 1}
+
+    def test_remove_session_invalidates_cache(self):
+        session = Session(data={'auth_user_id': 'abc12'})
+        session.save()
+        assert Session.load(session._id)
+
+        utils.remove_session(session)
+        assert Session.load(session._id) is None
+
+    def test_remove_session_reaches_other_processes(self):
+        session = Session(data={'auth_user_id': 'abc12'})
+        session.save()
+        # The local cache of another process, which remove_session can't clear
+        other_process_cache = LocMemCache('other_process', {})
+        with mock.patch('osf.models.session._local_cache', return_value=other_process_cache):
+            assert Session.load(session._id)
+
+        utils.remove_session(session)
+
+        expired = time.time() + website_settings.OSF_SESSION_LOCAL_CACHE_TIMEOUT + 1
+        with mock.patch('osf.models.session._local_cache', return_value=other_process_cache):
+            with mock.patch('time.time', return_value=expired):
+                assert Session.load(session._id) is None
+
+    def test_process_local_shared_cache_is_not_used(self, tmpdir):
+        process_local = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+        with override_settings(CACHES=dict(django_settings.CACHES, **{django_settings.OSF_SESSION_CACHE_NAME: process_local})):
+            assert _shared_cache() is None
+            assert len(_caches()) == 1
+        shared = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': str(tmpdir)}
+        with override_settings(CACHES=dict(django_settings.CACHES, **{django_settings.OSF_SESSION_CACHE_NAME: shared})):
+            assert len(_caches()) == 2
+
 
 class SessionUtilsTestCase(DbTestCase):
     def setUp(self, *args, **kwargs):
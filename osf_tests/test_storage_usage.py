@@ -0,0 +1,106 @@
+import pytest
+
+from addons.osfstorage import settings as osfstorage_settings
+from api_tests.utils import create_test_file
+from osf.management.commands.reconcile_storage_usage import reconcile_storage_usage
+from osf.models import StorageUsage, QuickFilesNode
+from osf_tests.factories import ProjectFactory, UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def user():
+    return UserFactory()
+
+@pytest.fixture()
+def project(user):
+    return ProjectFactory(creator=user)
+
+@pytest.fixture()
+def other_project(user):
+    return ProjectFactory(creator=user)
+
+
+class TestStorageUsage:
+
+    def test_counter_created_on_first_read(self, project, user):
+        create_test_file(project, user, 'one', size=100)
+        StorageUsage.objects.filter(target=project).delete()
+
+        assert project.storage_usage == 100
+        assert StorageUsage.objects.get(target=project).total == 100
+
+    def test_new_versions_are_added(self, project, user):
+        assert project.storage_usage == 0
+        create_test_file(project, user, 'one', size=100)
+        create_test_file(project, user, 'two', size=50)
+
+        assert project.storage_usage == 150
+
+    def test_unknown_sizes_are_ignored(self, project, user):
+        create_test_file(project, user, 'one', size=-1)
+
+        assert project.storage_usage == 0
+
+    def test_delete_and_restore(self, project, user):
+        folder = project.get_addon('osfstorage').get_root().append_folder('folder')
+        folder.append_file('one').create_version(user, {
+            'object': '06d80e',
+            'service': 'cloud',
+            osfstorage_settings.WATERBUTLER_RESOURCE: 'osf',
+        }, {'size': 100})
+        create_test_file(project, user, 'two', size=50)
+        assert project.storage_usage == 150
+
+        trashed = folder.delete(user=user)
+        assert project.storage_usage == 50
+
+        trashed.restore()
+        assert project.storage_usage == 150
+
+    def test_move_between_projects(self, project, other_project, user):
+        test_file = create_test_file(project, user, 'one', size=100)
+        assert other_project.storage_usage == 0
+
+        test_file.move_under(other_project.get_addon('osfstorage').get_root())
+
+        assert project.storage_usage == 0
+        assert other_project.storage_usage == 100
+
+    def test_copy_between_projects(self, project, other_project, user):
+        test_file = create_test_file(project, user, 'one', size=100)
+
+        test_file.copy_under(other_project.get_addon('osfstorage').get_root())
+
+        assert project.storage_usage == 100
+        assert other_project.storage_usage == 100
+
+    def test_get_for_targets(self, project, other_project, user):
+        create_test_file(project, user, 'one', size=100)
+        StorageUsage.objects.filter(target=project).delete()
+
+        assert StorageUsage.objects.get_for_targets([project, other_project]) == {
+            project.id: 100,
+            other_project.id: 0,
+        }
+
+    @pytest.mark.enable_quickfiles_creation
+    def test_quickfiles_are_not_counted(self, user):
+        quickfiles = QuickFilesNode.objects.get_for_user(user)
+        create_test_file(quickfiles, user, 'one', size=100)
+
+        assert quickfiles.storage_usage is None
+        assert not StorageUsage.objects.filter(target=quickfiles).exists()
+
+    def test_reconcile(self, project, other_project, user):
+        create_test_file(project, user, 'one', size=100)
+        create_test_file(other_project, user, 'two', size=50)
+        StorageUsage.objects.filter(target=project).update(total=12)
+
+        assert reconcile_storage_usage(dry_run=True) == 1
+        assert StorageUsage.objects.get(target=project).total == 12
+
+        assert reconcile_storage_usage() == 1
+        assert StorageUsage.objects.get(target=project).total == 100
+        assert StorageUsage.objects.get(target=other_project).total == 50
@@ -0,0 +1,119 @@
+"""Benchmark for resolving notification subscriptions on a synthetic deep project, comparing
+`website.notifications.emails.compile_subscriptions` with the per-node, per-user recursion it replaced.
+Everything is created inside a transaction that is rolled back afterwards.
+
+    python -m scripts.benchmark_notification_subscriptions [--depth=N] [--subscribers=N]
+"""
+import sys
+import time
+import logging
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from website.app import setup_django
+setup_django()
+from osf.models import AbstractNode, NotificationSubscription
+from osf.utils.permissions import READ
+from osf_tests import factories
+from website.notifications import constants, emails, utils
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+DEFAULT_DEPTH = 8
+DEFAULT_SUBSCRIBERS = 100
+EVENT = 'comments'
+
+
+def legacy_check_node(node, event):
+    node_subscriptions = {key: [] for key in constants.NOTIFICATION_TYPES}
+    if node:
+        subscription = NotificationSubscription.load(utils.to_subscription_key(node._id, event))
+        for notification_type in node_subscriptions:
+            users = getattr(subscription, notification_type, [])
+            if users:
+                for user in users.exclude(date_disabled__isnull=False):
+                    if node.has_permission(user, READ):
+                        node_subscriptions[notification_type].append(user._id)
+    return node_subscriptions
+
+
+def legacy_compile_subscriptions(node, event_type, event=None, level=0):
+    subscriptions = legacy_check_node(node, event_type)
+    if event:
+        subscriptions = legacy_check_node(node, event)
+        parent_subscriptions = legacy_compile_subscriptions(node, event_type, level=level + 1)
+    elif getattr(node, 'parent_id', False):
+        parent_subscriptions = legacy_compile_subscriptions(AbstractNode.load(node.parent_id), event_type, level=level + 1)
+    else:
+        parent_subscriptions = legacy_check_node(None, event_type)
+    for notification_type in parent_subscriptions:
+        p_sub_n = parent_subscriptions[notification_type]
+        p_sub_n.extend(subscriptions[notification_type])
+        for nt in subscriptions:
+            if notification_type != nt:
+                p_sub_n = list(set(p_sub_n).difference(set(subscriptions[nt])))
+        if level == 0:
+            p_sub_n, removed = utils.separate_users(node, p_sub_n)
+        parent_subscriptions[notification_type] = p_sub_n
+    return parent_subscriptions
+
+
+def make_project(depth, subscribers):
+    """A chain of `depth` nodes, with `subscribers` contributors on the root who are subscribed to
+    comments on every level, alternating between notification types.
+    """
+    notification_types = sorted(constants.NOTIFICATION_TYPES)
+    users = [factories.UserFactory() for _ in range(subscribers)]
+    node = factories.ProjectFactory()
+    for user in users:
+        node.add_contributor(user, permissions=READ, log=False, save=False)
+    node.save()
+    for level in range(depth):
+        if level:
+            node = factories.NodeFactory(parent=node, creator=node.creator)
+            for user in users:
+                node.add_contributor(user, permissions=READ, log=False, save=False)
+            node.save()
+        subscription = factories.NotificationSubscriptionFactory(
+            _id=utils.to_subscription_key(node._id, EVENT),
+            node=node,
+            event_name=EVENT
+        )
+        for i, user in enumerate(users):
+            getattr(subscription, notification_types[(i + level) % len(notification_types)]).add(user)
+    return node
+
+
+def measure(compile_subscriptions, node):
+    with CaptureQueriesContext(connection) as queries:
+        start = time.time()
+        result = compile_subscriptions(node, EVENT)
+        elapsed = time.time() - start
+    return {key: sorted(value) for key, value in result.items()}, elapsed, len(queries.captured_queries)
+
+
+def main(depth=DEFAULT_DEPTH, subscribers=DEFAULT_SUBSCRIBERS):
+    with transaction.atomic():
+        logger.info('Creating a project {} levels deep with {} subscribers'.format(depth, subscribers))
+        node = make_project(depth, subscribers)
+
+        legacy, legacy_elapsed, legacy_queries = measure(legacy_compile_subscriptions, node)
+        result, elapsed, queries = measure(emails.compile_subscriptions, node)
+        assert result == legacy, 'Resolved subscriptions differ'
+
+        logger.info('Per-user recursion: {:.3f} seconds, {} queries'.format(legacy_elapsed, legacy_queries))
+        logger.info('Set-based: {:.3f} seconds, {} queries'.format(elapsed, queries))
+        transaction.set_rollback(True)
+
+
+if __name__ == '__main__':
+    kwargs = {}
+    for arg in sys.argv[1:]:
+        if arg.startswith('--depth='):
+            kwargs['depth'] = int(arg.split('=', 1)[1])
+        elif arg.startswith('--subscribers='):
+            kwargs['subscribers'] = int(arg.split('=', 1)[1])
+    main(**kwargs)
@@ -0,0 +1,62 @@
+"""Microbenchmark for building API URLs the way serializers do, with the per-process route templates
+in `api.base.utils.absolute_reverse` against reversing every URL with django.
+
+    python -m scripts.benchmark_url_reversal [--number=N]
+"""
+import sys
+import timeit
+import logging
+
+from website.app import setup_django
+setup_django()
+from api.base import utils as api_utils
+from website import util as website_util
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+DEFAULT_NUMBER = 10000
+# Roughly the links a node in a node list serializes, minus the ones that only differ by view name
+URLS = [
+    ('nodes:node-detail', {'node_id': 'abc12'}, None),
+    ('nodes:node-contributors', {'node_id': 'abc12'}, None),
+    ('nodes:node-contributor-detail', {'node_id': 'abc12', 'user_id': 'xyz98'}, None),
+    ('nodes:node-children', {'node_id': 'abc12'}, {'view_only': 'f00ba4'}),
+    ('nodes:node-storage-providers', {'node_id': 'abc12'}, None),
+    ('users:user-detail', {'user_id': 'xyz98'}, None),
+    ('licenses:license-detail', {'license_id': '563c1cf88c5e4a3877f9e96a'}, None),
+]
+
+
+def django_reverse(view_name, query_kwargs=None, kwargs=None):
+    return website_util.api_v2_url(api_utils.reverse(view_name, kwargs=kwargs), params=query_kwargs, base_prefix='')
+
+
+def build_urls(reverse):
+    for view_name, kwargs, query_kwargs in URLS:
+        url = reverse(view_name, query_kwargs=query_kwargs, kwargs=dict(kwargs, version='v2'))
+        api_utils.extend_querystring_params(url, {'view_only': 'f00ba4'})
+
+
+def main(number=DEFAULT_NUMBER):
+    for view_name, kwargs, query_kwargs in URLS:
+        kwargs = dict(kwargs, version='v2')
+        templated = api_utils.absolute_reverse(view_name, query_kwargs=query_kwargs, kwargs=kwargs)
+        reversed_ = django_reverse(view_name, query_kwargs=query_kwargs, kwargs=kwargs)
+        assert templated == reversed_, '{} != {}'.format(templated, reversed_)
+
+    results = {}
+    for name, reverse in (('django reverse', django_reverse), ('route templates', api_utils.absolute_reverse)):
+        elapsed = min(timeit.repeat(lambda: build_urls(reverse), number=number, repeat=3))
+        results[name] = elapsed
+        logger.info('{}: {:.2f} us per URL'.format(name, elapsed / (number * len(URLS)) * 10 ** 6))
+    logger.info('Speedup: {:.1f}x'.format(results['django reverse'] / results['route templates']))
+
+
+if __name__ == '__main__':
+    number = DEFAULT_NUMBER
+    for arg in sys.argv[1:]:
+        if arg.startswith('--number='):
+            number = int(arg.split('=', 1)[1])
+    main(number=number)
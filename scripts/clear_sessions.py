@@ -29,6 +29,7 @@ def main(dry_run=True):
 
     with transaction.atomic():
         start = time.time()
+        Session.invalidate(old_sessions.values_list('_id', flat=True).iterator())
         sessions_deleted = old_sessions.delete()[1]['osf.Session']
         end = time.time()
 
@@ -1,24 +1,25 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 """Generate a sitemap for osf.io"""
+import argparse
 import boto3
 import datetime
 import gzip
+import multiprocessing
 import os
 import shutil
 import urlparse
-import xml
+from xml.sax.saxutils import escape
 
 import django
 django.setup()
 import logging
 import tempfile
 
+from django.db import connections
 from framework import sentry
 from framework.celery_tasks import app as celery_app
-from django.db.models import Q
-from osf.models import OSFUser, AbstractNode, Preprint, PreprintProvider
-from osf.utils.workflows import DefaultStates
+from osf.models import OSFUser, AbstractNode, Preprint
 from scripts import utils as script_utils
 from website import settings
 from website.app import init_app
@@ -26,19 +27,97 @@ from website.app import init_app
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+SITEMAP_NAMESPACE = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+# Each section is generated independently, so they can be sharded across processes
+SECTIONS = ('static', 'user', 'node', 'preprint')
+
+
+def iterate_keyset(queryset, fields, batch_size=None):
+    """Yield ``values()`` rows of `queryset` in primary key order, fetching one batch at a time.
+
+    Keyset pagination keeps memory flat and every query cheap as the tables grow, without
+    holding a server-side cursor open for the whole run.
+    """
+    batch_size = batch_size or settings.SITEMAP_QUERY_BATCH_SIZE
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk).order_by('pk').values('pk', *fields)[:batch_size])
+        if not batch:
+            return
+        for row in batch:
+            yield row
+        last_pk = batch[-1]['pk']
+
+
+class SitemapWriter(object):
+    """Streams urls into numbered sitemap files named ``<prefix>_<n>.xml``, starting a new
+    file every ``SITEMAP_URL_MAX`` urls. Nothing but the current url is held in memory.
+    """
+    def __init__(self, sitemap, prefix='sitemap'):
+        self.sitemap = sitemap
+        self.prefix = prefix
+        self.file_names = []
+        self.url_count = 0
+        self.total_url_count = 0
+        self._file = None
+        self._file_path = None
+
+    def add_url(self, config):
+        """Adds a url to the current sitemap file"""
+        if self._file is None or self.url_count >= settings.SITEMAP_URL_MAX:
+            self.close()
+            self._open()
+        self._file.write(b'  <url>\n')
+        for k, v in config.items():
+            self._file.write(u'    <{0}>{1}</{0}>\n'.format(k, escape(v)).encode('utf-8'))
+        self._file.write(b'  </url>\n')
+        self.url_count += 1
+        self.total_url_count += 1
+
+    def _open(self):
+        file_name = '{}_{}.xml'.format(self.prefix, len(self.file_names))
+        self._file_path = os.path.join(self.sitemap.sitemap_dir, file_name)
+        self._file = open(self._file_path, 'wb')
+        self._file.write(b'<?xml version="1.0" encoding="utf-8"?>\n')
+        self._file.write('<urlset xmlns="{}">\n'.format(SITEMAP_NAMESPACE).encode('utf-8'))
+        self.file_names.append(file_name)
+        self.url_count = 0
+
+    def close(self):
+        """Finishes the current sitemap file, if any, then gzips and ships it"""
+        if self._file is None:
+            return
+        self._file.write(b'</urlset>\n')
+        self._file.close()
+        self._file = None
+        print('Writing and gzipping `{}`: url_count = {}'.format(self._file_path, str(self.url_count)))
+        self.sitemap.write_doc(self.file_names[-1], self._file_path)
+
+
+def _generate_section(args):
+    """Worker for sharded generation. Returns the files written, the url count and the error count."""
+    section, sitemap_dir = args
+    sitemap = Sitemap(sitemap_dir=sitemap_dir)
+    writer = SitemapWriter(sitemap, prefix='sitemap_{}'.format(section))
+    sitemap.generate_section(section, writer)
+    writer.close()
+    return writer.file_names, writer.total_url_count, sitemap.errors
+
 
 class Sitemap(object):
-    def __init__(self):
-        self.sitemap_count = 0
+    def __init__(self, sitemap_dir=None):
         self.errors = 0
-        self.new_doc()
-        if not settings.SITEMAP_TO_S3:
+        if sitemap_dir:
+            self.sitemap_dir = sitemap_dir
+        elif not settings.SITEMAP_TO_S3:
             self.sitemap_dir = os.path.join(settings.STATIC_FOLDER, 'sitemaps')
             if not os.path.exists(self.sitemap_dir):
                 print('Creating sitemap directory at `{}`'.format(self.sitemap_dir))
                 os.makedirs(self.sitemap_dir)
         else:
             self.sitemap_dir = tempfile.mkdtemp()
+        if settings.SITEMAP_TO_S3:
             assert settings.SITEMAP_AWS_BUCKET, 'SITEMAP_AWS_BUCKET must be set for sitemap files to be sent to S3'
             assert settings.AWS_ACCESS_KEY_ID, 'AWS_ACCESS_KEY_ID must be set for sitemap files to be sent to S3'
             assert settings.AWS_SECRET_ACCESS_KEY, 'AWS_SECRET_ACCESS_KEY must be set for sitemap files to be sent to S3'
@@ -53,44 +132,10 @@ class Sitemap(object):
         if settings.SITEMAP_TO_S3:
             shutil.rmtree(self.sitemap_dir)
 
-    def new_doc(self):
-        """Creates new sitemap document and resets the url_count."""
-        self.doc = xml.dom.minidom.Document()
-        self.urlset = self.doc.createElement('urlset')
-        self.urlset.setAttribute('xmlns', 'http://www.sitemaps.org/schemas/sitemap/0.9')
-        self.doc.appendChild(self.urlset)
-        self.url_count = 0
-
-    def add_tag(self, name, text):
-        """Adds a tag to the current url"""
-        tag = self.doc.createElement(name)
-        self.url.appendChild(tag)
-        tag_text = self.doc.createTextNode(text)
-        tag.appendChild(tag_text)
-
-    def add_url(self, config):
-        """Adds a url to the current urlset"""
-        if self.url_count >= settings.SITEMAP_URL_MAX:
-            self.write_doc()
-            self.new_doc()
-        self.url = self.doc.createElement('url')
-        self.urlset.appendChild(self.url)
-
-        for k, v in config.items():
-            self.add_tag(k, v)
-        self.url_count += 1
-
-    def write_doc(self):
-        """Writes and gzips each sitemap xml file"""
-        file_name = 'sitemap_{}.xml'.format(str(self.sitemap_count))
-        file_path = os.path.join(self.sitemap_dir, file_name)
+    def write_doc(self, file_name, file_path):
+        """Gzips a finished sitemap xml file"""
         zip_file_name = file_name + '.gz'
         zip_file_path = file_path + '.gz'
-        print('Writing and gzipping `{}`: url_count = {}'.format(file_path, str(self.url_count)))
-
-        xml_str = self.doc.toprettyxml(indent='  ', encoding='utf-8')
-        with open(file_path, 'wb') as f:
-            f.write(xml_str)
 
         # Write zipped file
         with open(file_path, 'rb') as f_in, gzip.open(zip_file_path, 'wb') as f_out:
@@ -98,7 +143,6 @@ class Sitemap(object):
         if settings.SITEMAP_TO_S3:
             self.ship_to_s3(file_name, file_path)
             self.ship_to_s3(zip_file_name, zip_file_path)
-        self.sitemap_count += 1
 
     def ship_to_s3(self, name, path):
         data = open(path, 'rb')
@@ -110,33 +154,21 @@ class Sitemap(object):
             sentry.log_message('ERROR: Sitemaps could not be uploaded to s3, see `generate_sitemap` logs')
         data.close()
 
-    def write_sitemap_index(self):
+    def write_sitemap_index(self, file_names):
         """Writes the index file for all of the sitemap files"""
-        doc = xml.dom.minidom.Document()
-        sitemap_index = self.doc.createElement('sitemapindex')
-        sitemap_index.setAttribute('xmlns', 'http://www.sitemaps.org/schemas/sitemap/0.9')
-        doc.appendChild(sitemap_index)
-
-        for f in range(self.sitemap_count):
-            sitemap = doc.createElement('sitemap')
-            sitemap_index.appendChild(sitemap)
-
-            loc = doc.createElement('loc')
-            sitemap.appendChild(loc)
-            loc_text = self.doc.createTextNode(urlparse.urljoin(settings.DOMAIN, 'sitemaps/sitemap_{}.xml'.format(str(f))))
-            loc.appendChild(loc_text)
-
-            datemod = doc.createElement('lastmod')
-            sitemap.appendChild(datemod)
-            datemod_text = self.doc.createTextNode(datetime.datetime.now().strftime('%Y-%m-%d'))
-            datemod.appendChild(datemod_text)
-
         print('Writing `sitemap_index.xml`')
         file_name = 'sitemap_index.xml'
         file_path = os.path.join(self.sitemap_dir, file_name)
-        xml_str = doc.toprettyxml(indent='  ', encoding='utf-8')
+        lastmod = datetime.datetime.now().strftime('%Y-%m-%d')
         with open(file_path, 'wb') as f:
-            f.write(xml_str)
+            f.write(b'<?xml version="1.0" encoding="utf-8"?>\n')
+            f.write('<sitemapindex xmlns="{}">\n'.format(SITEMAP_NAMESPACE).encode('utf-8'))
+            for sitemap_file_name in file_names:
+                loc = urlparse.urljoin(settings.DOMAIN, 'sitemaps/{}'.format(sitemap_file_name))
+                f.write(u'  <sitemap>\n    <loc>{}</loc>\n    <lastmod>{}</lastmod>\n  </sitemap>\n'.format(
+                    escape(loc), lastmod
+                ).encode('utf-8'))
+            f.write(b'</sitemapindex>\n')
         if settings.SITEMAP_TO_S3:
             self.ship_to_s3(file_name, file_path)
 
@@ -154,101 +186,134 @@ class Sitemap(object):
             sentry.log_message('ERROR: generate_sitemap stopped execution after reaching 1000 errors. See logs for details.')
             raise Exception('Too many errors generating sitemap.')
 
-    def generate(self):
-        print('Generating Sitemap')
-
-        # Progress bar
+    def static_urls(self):
         progress = script_utils.Progress(precision=0)
-
-        # Static urls
         progress.start(len(settings.SITEMAP_STATIC_URLS), 'STAT: ')
-        for config in settings.SITEMAP_STATIC_URLS:
+        for static_config in settings.SITEMAP_STATIC_URLS:
+            config = static_config.copy()
             config['loc'] = urlparse.urljoin(settings.DOMAIN, config['loc'])
-            self.add_url(config)
+            yield config
             progress.increment()
         progress.stop()
 
-        # User urls
-        objs = OSFUser.objects.filter(is_active=True).exclude(date_confirmed__isnull=True).values_list('guids___id', flat=True)
+    def user_urls(self):
+        objs = OSFUser.objects.filter(is_active=True).exclude(date_confirmed__isnull=True)
+        progress = script_utils.Progress(precision=0)
         progress.start(objs.count(), 'USER: ')
-        for obj in objs:
+        for obj in iterate_keyset(objs, ['guids___id']):
             try:
-                config = settings.SITEMAP_USER_CONFIG
-                config['loc'] = urlparse.urljoin(settings.DOMAIN, '/{}/'.format(obj))
-                self.add_url(config)
+                config = settings.SITEMAP_USER_CONFIG.copy()
+                config['loc'] = urlparse.urljoin(settings.DOMAIN, '/{}/'.format(obj['guids___id']))
             except Exception as e:
-                self.log_errors('USER', obj, e)
+                self.log_errors('USER', obj['guids___id'], e)
+            else:
+                yield config
             progress.increment()
         progress.stop()
 
+    def node_urls(self):
         # AbstractNode urls (Nodes and Registrations, no Collections)
         objs = (AbstractNode.objects
             .filter(is_public=True, is_deleted=False, retraction_id__isnull=True)
-            .exclude(type__in=['osf.collection', 'osf.quickfilesnode'])
-            .values('guids___id', 'modified'))
+            .exclude(type__in=['osf.collection', 'osf.quickfilesnode']))
+        progress = script_utils.Progress(precision=0)
         progress.start(objs.count(), 'NODE: ')
-        for obj in objs:
+        for obj in iterate_keyset(objs, ['guids___id', 'modified']):
             try:
-                config = settings.SITEMAP_NODE_CONFIG
+                config = settings.SITEMAP_NODE_CONFIG.copy()
                 config['loc'] = urlparse.urljoin(settings.DOMAIN, '/{}/'.format(obj['guids___id']))
                 config['lastmod'] = obj['modified'].strftime('%Y-%m-%d')
-                self.add_url(config)
             except Exception as e:
                 self.log_errors('NODE', obj['guids___id'], e)
+            else:
+                yield config
             progress.increment()
         progress.stop()
 
-        # Preprint urls
-
-        objs = (Preprint.objects.can_view()
-                    .select_related('node', 'provider', 'primary_file'))
+    def preprint_urls(self):
+        # Provider fields come back with each row, rather than through `obj.url` and `obj.provider` per preprint
+        objs = Preprint.objects.can_view()
+        fields = ['guids___id', 'modified', 'provider___id', 'provider__domain', 'provider__domain_redirect_enabled']
+        progress = script_utils.Progress(precision=0)
         progress.start(objs.count() * 2, 'PREP: ')
-        osf = PreprintProvider.objects.get(_id='osf')
-        for obj in objs:
+        for obj in iterate_keyset(objs, fields):
+            preprint_id = obj['guids___id']
+            provider_domain = obj['provider__domain']
             try:
-                preprint_date = obj.modified.strftime('%Y-%m-%d')
-                config = settings.SITEMAP_PREPRINT_CONFIG
-                preprint_url = obj.url
-                provider = obj.provider
-                domain = provider.domain if (provider.domain_redirect_enabled and provider.domain) else settings.DOMAIN
-                if provider == osf:
-                    preprint_url = '/preprints/{}/'.format(obj._id)
-                config['loc'] = urlparse.urljoin(domain, preprint_url)
+                preprint_date = obj['modified'].strftime('%Y-%m-%d')
+                use_provider_domain = obj['provider__domain_redirect_enabled'] and provider_domain
+                if obj['provider___id'] == 'osf':
+                    preprint_url = '/preprints/{}/'.format(preprint_id)
+                elif use_provider_domain:
+                    preprint_url = '/{}/'.format(preprint_id)
+                else:
+                    preprint_url = '/preprints/{}/{}/'.format(obj['provider___id'], preprint_id)
+                config = settings.SITEMAP_PREPRINT_CONFIG.copy()
+                config['loc'] = urlparse.urljoin(provider_domain if use_provider_domain else settings.DOMAIN, preprint_url)
                 config['lastmod'] = preprint_date
-                self.add_url(config)
 
                 # Preprint file urls
-                try:
-                    file_config = settings.SITEMAP_PREPRINT_FILE_CONFIG
-                    file_config['loc'] = urlparse.urljoin(
-                        obj.provider.domain or settings.DOMAIN,
-                        os.path.join(
-                            obj._id,
-                            'download',
-                            '?format=pdf'
-                        )
+                file_config = settings.SITEMAP_PREPRINT_FILE_CONFIG.copy()
+                file_config['loc'] = urlparse.urljoin(
+                    provider_domain or settings.DOMAIN,
+                    os.path.join(
+                        preprint_id,
+                        'download',
+                        '?format=pdf'
                     )
-                    file_config['lastmod'] = preprint_date
-                    self.add_url(file_config)
-                except Exception as e:
-                    self.log_errors(obj.primary_file, obj.primary_file._id, e)
+                )
+                file_config['lastmod'] = preprint_date
             except Exception as e:
-                self.log_errors(obj, obj._id, e)
+                self.log_errors('PREPRINT', preprint_id, e)
+            else:
+                yield config
+                yield file_config
             progress.increment(2)
         progress.stop()
 
-        # Final write
-        self.write_doc()
+    def generate_section(self, section, writer):
+        for config in getattr(self, '{}_urls'.format(section))():
+            writer.add_url(config)
+
+    def _generate_sharded(self, processes):
+        if multiprocessing.current_process().daemon:
+            # e.g. a celery prefork worker, whose pool processes may not have children of their own
+            raise ValueError(
+                'The sitemap can only be generated in {} processes from the command line, '
+                'not from a daemonic process such as a celery worker'.format(processes)
+            )
+        # Forked workers must not share the parent's database connection
+        connections.close_all()
+        pool = multiprocessing.Pool(processes)
+        try:
+            results = pool.map(_generate_section, [(section, self.sitemap_dir) for section in SECTIONS])
+        finally:
+            pool.close()
+            pool.join()
+        file_names = [file_name for section_files, _, _ in results for file_name in section_files]
+        self.errors += sum(errors for _, _, errors in results)
+        return file_names, sum(url_count for _, url_count, _ in results)
+
+    def generate(self, processes=1):
+        print('Generating Sitemap')
+        if processes > 1:
+            file_names, url_count = self._generate_sharded(processes)
+        else:
+            writer = SitemapWriter(self)
+            for section in SECTIONS:
+                self.generate_section(section, writer)
+            writer.close()
+            file_names, url_count = writer.file_names, writer.total_url_count
+
         # Create index file
-        self.write_sitemap_index()
+        self.write_sitemap_index(file_names)
 
         # TODO: once the sitemap is validated add a ping to google with sitemap index file location
-        # TODO: server side cursor query wrapper might be useful as the index gets larger.
         # Sitemap indexable limit check
-        if self.sitemap_count > settings.SITEMAP_INDEX_MAX * .90:  # 10% of urls remaining
+        if len(file_names) > settings.SITEMAP_INDEX_MAX * .90:  # 10% of urls remaining
             sentry.log_message('WARNING: Max sitemaps nearly reached.')
-        print('Total url_count = {}'.format((self.sitemap_count - 1) * settings.SITEMAP_URL_MAX + self.url_count))
-        print('Total sitemap_count = {}'.format(str(self.sitemap_count)))
+        print('Total url_count = {}'.format(url_count))
+        print('Total sitemap_count = {}'.format(str(len(file_names))))
         if self.errors:
             sentry.log_message('WARNING: Generate sitemap encountered errors. See logs for details.')
             print('Total errors = {}'.format(str(self.errors)))
@@ -256,12 +321,21 @@ class Sitemap(object):
             print('No errors')
 
 @celery_app.task(name='scripts.generate_sitemap')
-def main():
+def main(processes=1):
     init_app(routes=False)  # Sets the storage backends on all models
     sitemap = Sitemap()
-    sitemap.generate()
+    sitemap.generate(processes=processes)
     sitemap.cleanup()
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate the sitemap for osf.io')
+    parser.add_argument(
+        '--processes',
+        type=int,
+        default=settings.SITEMAP_PROCESSES,
+        help='Generate the static, user, node and preprint sections in this many processes',
+    )
+    args = parser.parse_args()
     init_app(set_backends=True, routes=False)
-    main()
+    # Called directly rather than through celery, so it can start a process pool
+    main(processes=args.processes)
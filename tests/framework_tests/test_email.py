@@ -6,7 +6,7 @@ import mock
 from nose.tools import *  # noqa: F403
 import sendgrid
 
-from framework.email.tasks import send_email, _send_with_sendgrid
+from framework.email.tasks import send_email, _send_with_sendgrid, MailConnectionPool
 from website import settings
 from tests.base import fake
 from osf_tests.factories import fake_email
@@ -76,6 +76,28 @@ class TestEmail(unittest.TestCase):
         )
         assert_false(ret)
 
+    @mock.patch('framework.email.tasks.smtplib.SMTP')
+    def test_connection_pool_reuses_smtp_connection(self, mock_smtp):
+        pool = MailConnectionPool()
+        with mock.patch.object(settings, 'SENDGRID_API_KEY', None), mock.patch.object(settings, 'USE_EMAIL', True):
+            for _ in range(3):
+                assert_true(pool.send_email(fake_email(), fake_email(), subject='no subject',
+                                            message='<h1>Greetings!</h1>', ttls=False, login=False))
+        assert_equal(mock_smtp.call_count, 1)
+        assert_equal(mock_smtp.return_value.sendmail.call_count, 3)
+        assert_false(mock_smtp.return_value.quit.called)
+        pool.close()
+        assert_true(mock_smtp.return_value.quit.called)
+
+    @mock.patch('framework.email.tasks.smtplib.SMTP')
+    def test_connection_pool_reconnects(self, mock_smtp):
+        pool = MailConnectionPool()
+        with mock.patch.object(settings, 'SENDGRID_API_KEY', None), mock.patch.object(settings, 'USE_EMAIL', True):
+            pool.send_email(fake_email(), fake_email(), subject='no subject', message='Hi', ttls=False, login=False)
+            mock_smtp.return_value.sendmail.side_effect = [smtplib.SMTPServerDisconnected, None]
+            assert_true(pool.send_email(fake_email(), fake_email(), subject='no subject', message='Hi', ttls=False, login=False))
+        assert_equal(mock_smtp.call_count, 2)
+
 
 if __name__ == '__main__':
     unittest.main()
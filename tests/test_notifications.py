@@ -1,7 +1,10 @@
 import collections
 import mock
+import smtplib
 from babel import dates, Locale
 from schema import Schema, And, Use, Or
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from nose.tools import *  # noqa PEP8 asserts
@@ -1281,6 +1284,42 @@ class TestCompileSubscriptions(NotificationTestCase):
         subs = emails.compile_subscriptions(node5, 'file_updated')
         assert_equal(subs, {'email_transactional': [], 'email_digest': [self.user_1._id], 'none': []})
 
+    def test_event_subscription_overrides_node_subscription(self):
+        self.shared_sub.email_transactional.add(self.user_1)
+        file_sub = factories.NotificationSubscriptionFactory(
+            _id=self.shared_node._id + '_xyz42_file_updated',
+            node=self.shared_node,
+            event_name='xyz42_file_updated'
+        )
+        file_sub.email_digest.add(self.user_1)
+        subs = emails.compile_subscriptions(self.shared_node, 'file_updated', 'xyz42_file_updated')
+        assert_equal(subs, {'email_transactional': [], 'email_digest': [self.user_1._id], 'none': []})
+
+    def test_parent_admin_can_read_child(self):
+        self.base_project.add_contributor(self.user_4, permissions=permissions.ADMIN)
+        self.private_sub.email_transactional.add(self.user_4)
+        subs = emails.compile_subscriptions(self.private_node, 'file_updated')
+        assert_equal(subs, {'email_transactional': [self.user_4._id], 'email_digest': [], 'none': []})
+
+    def test_disabled_user_not_listed(self):
+        self.base_sub.email_transactional.add(self.user_2)
+        self.user_2.date_disabled = timezone.now()
+        self.user_2.save()
+        subs = emails.compile_subscriptions(self.shared_node, 'file_updated')
+        assert_equal(subs, {'email_transactional': [], 'email_digest': [], 'none': []})
+
+    def test_number_of_queries_does_not_depend_on_depth(self):
+        self.base_sub.email_transactional.add(self.user_1, self.user_2)
+        node = self.shared_node
+        with CaptureQueriesContext(connection) as shallow:
+            emails.compile_subscriptions(node, 'file_updated')
+        for _ in range(4):
+            node = factories.NodeFactory(parent=node, creator=self.user_1)
+        with CaptureQueriesContext(connection) as deep:
+            subs = emails.compile_subscriptions(node, 'file_updated')
+        assert_equal(sorted(subs['email_transactional']), sorted([self.user_1._id, self.user_2._id]))
+        assert_equal(len(shallow.captured_queries), len(deep.captured_queries))
+
 
 class TestMoveSubscription(NotificationTestCase):
     def setUp(self):
@@ -1858,6 +1897,35 @@ class TestSendDigest(OsfTestCase):
         send_users_email(send_type)
         assert_false(mock_send_mail.called)
 
+    @mock.patch('website.mails.send_mail')
+    def test_send_users_email_removes_digests_per_chunk(self, mock_send_mail):
+        send_type = 'email_transactional'
+        user_3 = factories.UserFactory()
+        digests = [
+            factories.NotificationDigestFactory(
+                user=user,
+                send_type=send_type,
+                timestamp=self.timestamp,
+                message='Hello',
+                node_lineage=[self.project._id]
+            ) for user in (self.user_1, self.user_2, user_3)
+        ]
+
+        def send_mail(to_addr, **kwargs):
+            if to_addr == self.user_2.username:
+                raise smtplib.SMTPServerDisconnected
+            # SendGrid error responses and recipients left out by its whitelist aren't raised
+            return to_addr != user_3.username
+        mock_send_mail.side_effect = send_mail
+
+        with mock.patch.object(settings, 'NOTIFICATION_DIGEST_CHUNK_SIZE', 1):
+            send_users_email(send_type)
+        assert_equal(mock_send_mail.call_count, 3)
+        # The digests of the emails that failed are kept for the next run
+        assert_false(NotificationDigest.objects.filter(_id=digests[0]._id).exists())
+        assert_true(NotificationDigest.objects.filter(_id=digests[1]._id).exists())
+        assert_true(NotificationDigest.objects.filter(_id=digests[2]._id).exists())
+
     def test_remove_sent_digest_notifications(self):
         d = factories.NotificationDigestFactory(
             event='comment_replies',
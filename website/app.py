@@ -17,11 +17,13 @@ from framework.celery_tasks import handlers as celery_task_handlers
 from framework.django import handlers as django_handlers
 from framework.csrf import handlers as csrf_handlers
 from framework.flask import add_handlers, app
+from framework.instrumentation import handlers as instrumentation_handlers
 # Import necessary to initialize the root logger
 from framework.logging import logger as root_logger  # noqa
 from framework.postcommit_tasks import handlers as postcommit_handlers
 from framework.sentry import sentry
 from framework.transactions import handlers as transaction_handlers
+from osf.utils import permission_cache
 # Imports necessary to connect signals
 from website.archiver import listeners  # noqa
 from website.mails import listeners  # noqa
@@ -56,9 +58,11 @@ def attach_handlers(app, settings):
     """Add callback handlers to ``app`` in the correct order."""
     # Add callback handlers to application
     add_handlers(app, django_handlers.handlers)
+    add_handlers(app, instrumentation_handlers.handlers)
     add_handlers(app, celery_task_handlers.handlers)
     add_handlers(app, transaction_handlers.handlers)
     add_handlers(app, postcommit_handlers.handlers)
+    add_handlers(app, permission_cache.handlers)
     add_handlers(app, csrf_handlers.handlers)
 
     # Attach handler for checking view-only link keys.
@@ -1,7 +1,10 @@
+import collections
+
 from babel import dates, core, Locale
 
 from osf.models import AbstractNode, OSFUser, NotificationDigest, NotificationSubscription
-from osf.utils.permissions import READ
+from osf.models.node import NodeGroupObjectPermission
+from osf.utils.permissions import ADMIN_NODE, READ, READ_NODE
 from website import mails
 from website.notifications import constants
 from website.notifications import utils
@@ -116,34 +119,100 @@ def store_emails(recipient_ids, notification_type, event, user, node, timestamp,
         digest.save()
 
 
-def compile_subscriptions(node, event_type, event=None, level=0):
-    """Recurse through node and parents for subscriptions.
+def compile_subscriptions(node, event_type, event=None):
+    """Resolve the subscriptions of node and its parents.
+
+    A user's most specific subscription wins: the one to `event` on the node, then `event_type` on the node,
+    then `event_type` on each parent in turn. Subscriptions only count on nodes the user can read, and only
+    users who can read `node` are returned. Runs a fixed number of queries however deep the node is.
 
     :param node: current node
     :param event_type: Generally node_subscriptions_available
     :param event: Particular event such a file_updated that has specific file subs
-    :param level: How deep the recursion is
     :return: a dict of notification types with lists of users.
     """
-    subscriptions = check_node(node, event_type)
+    # Nearest first
+    lineage = [node]
+    if isinstance(node, AbstractNode):
+        lineage.extend(
+            AbstractNode.objects.filter(_descendant_closures__descendant=node).order_by('_descendant_closures__depth')
+        )
+    levels = [(ancestor, utils.to_subscription_key(ancestor._id, event_type)) for ancestor in lineage]
     if event:
-        subscriptions = check_node(node, event)  # Gets particular event subscriptions
-        parent_subscriptions = compile_subscriptions(node, event_type, level=level + 1)  # get node and parent subs
-    elif getattr(node, 'parent_id', False):
-        parent_subscriptions = \
-            compile_subscriptions(AbstractNode.load(node.parent_id), event_type, level=level + 1)
-    else:
-        parent_subscriptions = check_node(None, event_type)
-    for notification_type in parent_subscriptions:
-        p_sub_n = parent_subscriptions[notification_type]
-        p_sub_n.extend(subscriptions[notification_type])
-        for nt in subscriptions:
-            if notification_type != nt:
-                p_sub_n = list(set(p_sub_n).difference(set(subscriptions[nt])))
-        if level == 0:
-            p_sub_n, removed = utils.separate_users(node, p_sub_n)
-        parent_subscriptions[notification_type] = p_sub_n
-    return parent_subscriptions
+        levels.insert(0, (node, utils.to_subscription_key(node._id, event)))
+
+    subscription_ids = dict(
+        NotificationSubscription.objects.filter(_id__in=[key for _, key in levels]).values_list('_id', 'id')
+    )
+    # {subscription id: {notification type: set of user pks}}
+    subscribed = collections.defaultdict(lambda: {key: set() for key in constants.NOTIFICATION_TYPES})
+    if subscription_ids:
+        for notification_type in constants.NOTIFICATION_TYPES:
+            through = getattr(NotificationSubscription, notification_type).through
+            rows = through.objects.filter(
+                notificationsubscription_id__in=subscription_ids.values(),
+                osfuser__date_disabled__isnull=True,
+            ).values_list('notificationsubscription_id', 'osfuser_id')
+            for subscription_id, user_id in rows:
+                subscribed[subscription_id][notification_type].add(user_id)
+
+    candidates = set()
+    for users in subscribed.values():
+        for user_ids in users.values():
+            candidates.update(user_ids)
+    readers = get_readers(lineage, candidates)
+
+    resolved = {key: set() for key in constants.NOTIFICATION_TYPES}
+    # Apply the least specific subscriptions first so the more specific ones override them
+    for level_node, key in reversed(levels):
+        level_subscriptions = {
+            notification_type: user_ids & readers[level_node.id]
+            for notification_type, user_ids in subscribed[subscription_ids.get(key)].items()
+        }
+        for notification_type in resolved:
+            resolved[notification_type] |= level_subscriptions[notification_type]
+            for nt in level_subscriptions:
+                if notification_type != nt:
+                    resolved[notification_type] -= level_subscriptions[nt]
+
+    user_guids = {}
+    resolved_ids = set().union(*resolved.values()) & readers[node.id]
+    if resolved_ids:
+        user_guids = {user.id: user._id for user in OSFUser.objects.filter(id__in=resolved_ids)}
+    return {
+        notification_type: [user_guids[user_id] for user_id in user_ids if user_id in user_guids]
+        for notification_type, user_ids in resolved.items()
+    }
+
+
+def get_readers(lineage, user_ids):
+    """Which of `user_ids` can read each node of `lineage`, the node followed by all of its parents.
+
+    :return: dict of node pk to set of user pks
+    """
+    readers = {lineage_node.id: set() for lineage_node in lineage}
+    if not user_ids:
+        return readers
+    if not isinstance(lineage[0], AbstractNode):
+        users = OSFUser.objects.filter(id__in=user_ids)
+        readers[lineage[0].id] = {user.id for user in users if lineage[0].has_permission(user, READ)}
+        return readers
+
+    # Admins of a node can read it and all of its components, see `AbstractNode.has_permission`
+    admins = collections.defaultdict(set)
+    rows = NodeGroupObjectPermission.objects.filter(
+        content_object_id__in=readers.keys(),
+        permission__codename__in=[READ_NODE, ADMIN_NODE],
+        group__user__in=list(user_ids),
+    ).values_list('content_object_id', 'group__user', 'permission__codename')
+    for node_id, user_id, codename in rows:
+        (admins if codename == ADMIN_NODE else readers)[node_id].add(user_id)
+
+    inherited_admins = set()
+    for lineage_node in reversed(lineage):
+        inherited_admins |= admins[lineage_node.id]
+        readers[lineage_node.id] |= inherited_admins
+    return readers
 
 
 def check_node(node, event):
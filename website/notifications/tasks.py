@@ -1,11 +1,14 @@
 """
 Tasks for making even transactional emails consolidated.
 """
+import Queue
 import itertools
+import threading
 
 from django.db import connection
 
 from framework.celery_tasks import app as celery_app
+from framework.email.tasks import MailConnectionPool
 from framework.sentry import log_exception
 from osf.models import OSFUser, AbstractNode, AbstractProvider
 from osf.models import NotificationDigest
@@ -28,32 +31,98 @@ def send_users_email(send_type):
 def _send_global_and_node_emails(send_type):
     """
     Called by `send_users_email`. Send all global and node-related notification emails.
+
+    Users are streamed from the database in chunks. The emails of a chunk are rendered and sent by
+    NOTIFICATION_DIGEST_WORKERS threads sharing mail connections, then the chunk's sent digests are
+    deleted, so an interrupted run neither resends nor drops more than the chunk it was on.
     """
     grouped_emails = get_users_emails(send_type)
-    for group in grouped_emails:
-        user = OSFUser.load(group['user_id'])
-        if not user:
-            log_exception()
-            continue
-        info = group['info']
-        notification_ids = [message['_id'] for message in info]
-        sorted_messages = group_by_node(info)
-        if sorted_messages:
-            if not user.is_disabled:
-                # If there's only one node in digest we can show it's preferences link in the template.
-                notification_nodes = sorted_messages['children'].keys()
-                node = AbstractNode.load(notification_nodes[0]) if len(
-                    notification_nodes) == 1 else None
-                mails.send_mail(
-                    to_addr=user.username,
-                    mimetype='html',
-                    can_change_node_preferences=bool(node),
-                    node=node,
-                    mail=mails.DIGEST,
-                    name=user.fullname,
-                    message=sorted_messages,
-                )
-            remove_notifications(email_notification_ids=notification_ids)
+    mail_connections = MailConnectionPool()
+    try:
+        while True:
+            chunk = list(itertools.islice(grouped_emails, settings.NOTIFICATION_DIGEST_CHUNK_SIZE))
+            if not chunk:
+                break
+            users = {user._id: user for user in OSFUser.objects.filter(guids___id__in=[group['user_id'] for group in chunk])}
+            digests = []
+            for group in chunk:
+                user = users.get(group['user_id'])
+                if not user:
+                    log_exception()
+                    continue
+                info = group['info']
+                digests.append((user, [message['_id'] for message in info], group_by_node(info)))
+
+            # If there's only one node in digest we can show it's preferences link in the template.
+            node_ids = {
+                sorted_messages['children'].keys()[0]
+                for _, _, sorted_messages in digests
+                if len(sorted_messages['children']) == 1
+            }
+            nodes = {node._id: node for node in AbstractNode.objects.filter(guids___id__in=node_ids)} if node_ids else {}
+
+            def send_digest(digest):
+                user, notification_ids, sorted_messages = digest
+                if sorted_messages:
+                    if not user.is_disabled:
+                        notification_nodes = sorted_messages['children'].keys()
+                        node = nodes.get(notification_nodes[0]) if len(notification_nodes) == 1 else None
+                        try:
+                            sent = mails.send_mail(
+                                to_addr=user.username,
+                                mimetype='html',
+                                can_change_node_preferences=bool(node),
+                                node=node,
+                                mail=mails.DIGEST,
+                                name=user.fullname,
+                                message=sorted_messages,
+                                mailer=mail_connections.send_email,
+                                celery=False,
+                            )
+                        except Exception:
+                            # Keep the digests so they go out with the next run
+                            log_exception()
+                            return []
+                        if sent is False:
+                            # e.g. an error response from SendGrid, which is logged but not raised
+                            return []
+                    return notification_ids
+                return []
+
+            sent = _map_in_threads(send_digest, digests, settings.NOTIFICATION_DIGEST_WORKERS)
+            remove_notifications(email_notification_ids=list(itertools.chain.from_iterable(sent)))
+    finally:
+        mail_connections.close()
+
+
+def _map_in_threads(func, items, workers):
+    """Like `map`, but spread over up to `workers` threads. Each thread closes its database connection when done."""
+    workers = min(workers, len(items))
+    if workers <= 1:
+        return map(func, items)
+
+    results = [None] * len(items)
+    queue = Queue.Queue()
+    for item in enumerate(items):
+        queue.put(item)
+
+    def work():
+        try:
+            while True:
+                try:
+                    index, item = queue.get_nowait()
+                except Queue.Empty:
+                    return
+                results[index] = func(item)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=work) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
 
 
 def _send_reviews_moderator_emails(send_type):
@@ -163,9 +232,15 @@ def get_users_emails(send_type):
     ORDER BY osf_guid.id ASC
     """
 
-    with connection.cursor() as cursor:
+    # Stream the rows through a server-side cursor, a daily digest doesn't fit in memory
+    with connection.chunked_cursor() as cursor:
         cursor.execute(sql, [send_type, ])
-        return itertools.chain.from_iterable(cursor.fetchall())
+        while True:
+            rows = cursor.fetchmany(settings.NOTIFICATION_DIGEST_CHUNK_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                yield row[0]
 
 
 def group_by_node(notifications, limit=15):
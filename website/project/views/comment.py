@@ -4,13 +4,12 @@ import markdown
 from django.utils import timezone
 from flask import request
 
-from api.caching.tasks import ban_url
+from api.caching.tasks import enqueue_ban
 from osf.models import Guid
-from framework.postcommit_tasks.handlers import enqueue_postcommit_task
 from website import settings
 from addons.base.signals import file_updated
 from osf.models import BaseFileNode, TrashedFileNode
-from osf.models import Comment
+from osf.models import Comment, NodeCounters
 from website.notifications.constants import PROVIDERS
 from website.notifications.emails import notify, notify_mentions
 from website.project.decorators import must_be_contributor_or_public
@@ -101,6 +100,9 @@ def find_and_create_file_from_metadata(children, source, destination, destinatio
 
 def update_comment_node(root_target_id, source_node, destination_node):
     Comment.objects.filter(root_target___id=root_target_id).update(node=destination_node)
+    # The update skips the comment counting signal receivers
+    NodeCounters.objects.recount(source_node.id, 'comment_count')
+    NodeCounters.objects.recount(destination_node.id, 'comment_count')
     source_node.save()
     destination_node.save()
 
@@ -179,7 +181,7 @@ def is_reply(target):
 
 def _update_comments_timestamp(auth, node, page=Comment.OVERVIEW, root_id=None):
     if node.is_contributor_or_group_member(auth.user):
-        enqueue_postcommit_task(ban_url, (node, ), {}, celery=False, once_per_request=True)
+        enqueue_ban(node)
         if root_id is not None:
             guid_obj = Guid.load(root_id)
             if guid_obj is not None:
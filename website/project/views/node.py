@@ -707,6 +707,7 @@ def _view_project(node, auth, primary=False,
     addons = list(node.get_addons())
     widgets, configs, js, css = _render_addons(addons)
     redirect_url = node.url + '?view_only=None'
+    counters = node.counters
 
     disapproval_link = ''
     if (node.is_pending_registration and node.has_permission(user, ADMIN)):
@@ -770,14 +771,14 @@ def _view_project(node, auth, primary=False,
             'forked_from_id': node.forked_from._primary_key if node.is_fork else '',
             'forked_from_display_absolute_url': node.forked_from.display_absolute_url if node.is_fork else '',
             'forked_date': iso8601format(node.forked_date) if node.is_fork else '',
-            'fork_count': node.forks.exclude(type='osf.registration').filter(is_deleted=False).count(),
+            'fork_count': counters.fork_count,
             'private_links': [x.to_json() for x in node.private_links_active],
             'link': view_only_link,
             'templated_count': node.templated_list.count(),
             'linked_nodes_count': NodeRelation.objects.filter(child=node, is_node_link=True).exclude(parent__type='osf.collection').count(),
             'anonymous': anonymous,
             'comment_level': node.comment_level,
-            'has_comments': node.comment_set.exists(),
+            'has_comments': counters.comment_count > 0,
             'identifiers': {
                 'doi': node.get_identifier_value('doi'),
                 'ark': node.get_identifier_value('ark'),
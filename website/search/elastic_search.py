@@ -16,19 +16,24 @@ import six
 from django.apps import apps
 from django.core.paginator import Paginator
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Q
+from django.db.models import F, OuterRef, Prefetch, Q, Subquery
 from elasticsearch2 import (ConnectionError, Elasticsearch, NotFoundError,
                            RequestError, TransportError, helpers)
 from framework.celery_tasks import app as celery_app
 from framework.database import paginated
 from osf.models import AbstractNode
+from osf.models import Contributor
+from osf.models import Guid
+from osf.models import NodeRelation
 from osf.models import OSFUser
 from osf.models import BaseFileNode
 from osf.models import Institution
 from osf.models import OSFGroup
 from osf.models import QuickFilesNode
 from osf.models import Preprint
+from osf.models import PreprintContributor
 from osf.models import SpamStatus
+from osf.models import Tag
 from addons.wiki.models import WikiPage
 from osf.models import CollectionSubmission
 from osf.utils.sanitize import unescape_entities
@@ -390,6 +395,47 @@ def update_user_async(self, user_id, index=None):
     except Exception as exc:
         self.retry(exc)
 
+def _visible_contributors(contributors):
+    return contributors.filter(visible=True).select_related('user').annotate(
+        user_guid=F('user__guids___id'),
+    ).order_by('_order')
+
+def prefetch_nodes_for_search(nodes):
+    """Load the related data serialize_node needs for a whole queryset of nodes at once"""
+    parent_guids = Guid.objects.filter(
+        object_id=OuterRef('parent_id'),
+        content_type=ContentType.objects.get_for_model(AbstractNode),
+    ).values('_id')[:1]
+    parents = NodeRelation.objects.filter(
+        child=OuterRef('pk'), is_node_link=False,
+    ).annotate(parent_guid=Subquery(parent_guids)).values('parent_guid')[:1]
+    return nodes.select_related('node_license__node_license').prefetch_related(
+        Prefetch('contributor_set', queryset=_visible_contributors(Contributor.objects), to_attr='search_contributors'),
+        Prefetch('tags', queryset=Tag.objects.filter(system=False), to_attr='search_tags'),
+        'affiliated_institutions',
+    ).annotate(annotated_parent_id=Subquery(parents), search_wiki_page_count=F('_counters__wiki_page_count'))
+
+def prefetch_preprints_for_search(preprints):
+    """Load the related data serialize_preprint needs for a whole queryset of preprints at once"""
+    return preprints.select_related('provider', 'license__node_license').prefetch_related(
+        Prefetch('preprintcontributor_set', queryset=_visible_contributors(PreprintContributor.objects), to_attr='search_contributors'),
+        Prefetch('tags', queryset=Tag.objects.filter(system=False), to_attr='search_tags'),
+    )
+
+def _prefetched_or(obj, attr, queryset):
+    """The objects prefetch_*_for_search stored on `obj` as `attr`, or else `queryset`"""
+    prefetched = getattr(obj, attr, None)
+    return queryset if prefetched is None else prefetched
+
+def serialize_search_contributors(contributors):
+    return [
+        {
+            'fullname': contributor.user.fullname,
+            'url': '/{}/'.format(contributor.user_guid) if contributor.user.is_active else None
+        }
+        for contributor in contributors
+    ]
+
 def serialize_node(node, category):
     elastic_document = {}
     parent_id = node.parent_id
@@ -401,14 +447,9 @@ def serialize_node(node, category):
     normalized_title = unicodedata.normalize('NFKD', normalized_title).encode('ascii', 'ignore')
     elastic_document = {
         'id': node._id,
-        'contributors': [
-            {
-                'fullname': x['fullname'],
-                'url': '/{}/'.format(x['guids___id']) if x['is_active'] else None
-            }
-            for x in node._contributors.filter(contributor__visible=True).order_by('contributor___order')
-            .values('fullname', 'guids___id', 'is_active')
-        ],
+        'contributors': serialize_search_contributors(
+            _prefetched_or(node, 'search_contributors', _visible_contributors(node.contributor_set))
+        ),
         'groups': [
             {
                 'name': x['name'],
@@ -420,7 +461,7 @@ def serialize_node(node, category):
         'normalized_title': normalized_title,
         'category': category,
         'public': node.is_public,
-        'tags': list(node.tags.filter(system=False).values_list('name', flat=True)),
+        'tags': [tag.name for tag in _prefetched_or(node, 'search_tags', node.tags.filter(system=False))],
         'description': node.description,
         'url': node.url,
         'is_registration': node.is_registration,
@@ -434,11 +475,13 @@ def serialize_node(node, category):
         'parent_id': parent_id,
         'date_created': node.created,
         'license': serialize_node_license_record(node.license),
-        'affiliated_institutions': list(node.affiliated_institutions.values_list('name', flat=True)),
+        'affiliated_institutions': [institution.name for institution in node.affiliated_institutions.all()],
         'boost': int(not node.is_registration) + 1,  # This is for making registered projects less relevant
         'extra_search_terms': clean_splitters(node.title),
     }
-    if not node.is_retracted:
+    # Skip looking up the wikis of nodes that prefetch_nodes_for_search counted none on. Nodes that
+    # were not prefetched, or have no counters yet, have no count.
+    if not node.is_retracted and getattr(node, 'search_wiki_page_count', None) != 0:
         for wiki in WikiPage.objects.get_wiki_pages_latest(node):
             # '.' is not allowed in field names in ES2
             elastic_document['wikis'][wiki.wiki_page.page_name.replace('.', ' ')] = wiki.raw_text(node)
@@ -455,21 +498,16 @@ def serialize_preprint(preprint, category):
     normalized_title = unicodedata.normalize('NFKD', normalized_title).encode('ascii', 'ignore')
     elastic_document = {
         'id': preprint._id,
-        'contributors': [
-            {
-                'fullname': x['fullname'],
-                'url': '/{}/'.format(x['guids___id']) if x['is_active'] else None
-            }
-            for x in preprint._contributors.filter(preprintcontributor__visible=True).order_by('preprintcontributor___order')
-            .values('fullname', 'guids___id', 'is_active')
-        ],
+        'contributors': serialize_search_contributors(
+            _prefetched_or(preprint, 'search_contributors', _visible_contributors(preprint.preprintcontributor_set))
+        ),
         'title': preprint.title,
         'normalized_title': normalized_title,
         'category': category,
         'public': preprint.is_public,
         'published': preprint.verified_publishable,
         'is_retracted': preprint.is_retracted,
-        'tags': list(preprint.tags.filter(system=False).values_list('name', flat=True)),
+        'tags': [tag.name for tag in _prefetched_or(preprint, 'search_tags', preprint.tags.filter(system=False))],
         'description': preprint.description,
         'url': preprint.url,
         'date_created': preprint.created,
@@ -516,11 +554,12 @@ def serialize_group(group, category):
     return elastic_document
 
 @requires_search
-def update_node(node, index=None, bulk=False, async_update=False):
+def update_node(node, index=None, bulk=False, async_update=False, update_files=True):
     from addons.osfstorage.models import OsfStorageFile
     index = index or INDEX
-    for file_ in paginated(OsfStorageFile, Q(target_content_type=ContentType.objects.get_for_model(type(node)), target_object_id=node.id)):
-        update_file(file_, index=index)
+    if update_files:
+        for file_ in paginated(OsfStorageFile, Q(target_content_type=ContentType.objects.get_for_model(type(node)), target_object_id=node.id)):
+            update_file(file_, index=index)
 
     is_qa_node = bool(set(settings.DO_NOT_INDEX_LIST['tags']).intersection(node.tags.all().values_list('name', flat=True))) or any(substring in node.title for substring in settings.DO_NOT_INDEX_LIST['titles'])
     if node.is_deleted or not node.is_public or node.archiving or node.is_spam or (node.spam_status == SpamStatus.FLAGGED and settings.SPAM_FLAGGED_REMOVE_FROM_SEARCH) or node.is_quickfiles or is_qa_node:
@@ -534,11 +573,12 @@ def update_node(node, index=None, bulk=False, async_update=False):
             client().index(index=index, doc_type=category, id=node._id, body=elastic_document, refresh=True)
 
 @requires_search
-def update_preprint(preprint, index=None, bulk=False, async_update=False):
+def update_preprint(preprint, index=None, bulk=False, async_update=False, update_files=True):
     from addons.osfstorage.models import OsfStorageFile
     index = index or INDEX
-    for file_ in paginated(OsfStorageFile, Q(target_content_type=ContentType.objects.get_for_model(type(preprint)), target_object_id=preprint.id)):
-        update_file(file_, index=index)
+    if update_files:
+        for file_ in paginated(OsfStorageFile, Q(target_content_type=ContentType.objects.get_for_model(type(preprint)), target_object_id=preprint.id)):
+            update_file(file_, index=index)
 
     is_qa_preprint = bool(set(settings.DO_NOT_INDEX_LIST['tags']).intersection(preprint.tags.all().values_list('name', flat=True))) or any(substring in preprint.title for substring in settings.DO_NOT_INDEX_LIST['titles'])
     if not preprint.verified_publishable or preprint.is_spam or (preprint.spam_status == SpamStatus.FLAGGED and settings.SPAM_FLAGGED_REMOVE_FROM_SEARCH) or is_qa_preprint:
@@ -587,7 +627,21 @@ def bulk_update_nodes(serialize, nodes, index=None, category=None):
                 'doc_as_upsert': True,
             })
     if actions:
-        return helpers.bulk(client(), actions)
+        return bulk_index(actions)
+
+def bulk_index(actions):
+    """Send bulk `actions` to elasticsearch in chunks, from several threads at once.
+    Raises BulkIndexError if any action fails. Returns the number of actions sent.
+    """
+    count = 0
+    for _ in helpers.parallel_bulk(
+        client(),
+        actions,
+        thread_count=settings.ELASTIC_BULK_THREADS,
+        chunk_size=settings.ELASTIC_BULK_CHUNK_SIZE,
+    ):
+        count += 1
+    return count
 
 def serialize_cgm_contributor(contrib):
     return {
@@ -5,13 +5,17 @@ from __future__ import absolute_import
 from math import ceil
 import functools
 import logging
+import multiprocessing
+import time
 
-from django.db import connection
+from django.db import connection, connections
+from django.db.models import Max
 from django.core.paginator import Paginator
 from elasticsearch2 import helpers
 
+import website.search.elastic_search as search_engine
 import website.search.search as search
-from website.search.elastic_search import client
+from website.search.elastic_search import client, bulk_index, prefetch_preprints_for_search
 from website.search_migration import (
     JSON_UPDATE_NODES_SQL, JSON_DELETE_NODES_SQL,
     JSON_UPDATE_FILES_SQL, JSON_DELETE_FILES_SQL,
@@ -69,6 +73,80 @@ def sql_migrate(index, sql, max_id, increment, es_args=None, **kwargs):
         page_start = page_end
     return total_objs
 
+def _serialize_preprint(preprint, index):
+    # Files are reindexed separately by migrate_preprint_files
+    return search_engine.update_preprint(preprint, index=index, bulk=True, update_files=False)
+
+def _serialize_group(group, index):
+    return search_engine.update_group(group, index=index, bulk=True)
+
+# name: (model, function prefetching a queryset's related data, serializer, document type)
+PARALLEL_MIGRATIONS = {
+    'preprints': (Preprint, prefetch_preprints_for_search, _serialize_preprint, 'preprint'),
+    'groups': (OSFGroup, lambda queryset: queryset, _serialize_group, 'group'),
+}
+
+def _bulk_actions(objs, serialize, index, category):
+    for obj in objs:
+        serialized = serialize(obj, index)
+        if serialized:
+            yield {
+                '_op_type': 'update',
+                '_index': index,
+                '_id': obj._id,
+                '_type': category,
+                'doc': serialized,
+                'doc_as_upsert': True,
+            }
+
+def _init_migration_worker():
+    # Don't share the parent's elasticsearch connections with forked workers
+    search_engine.CLIENT = None
+
+def _migrate_batch(args):
+    """Serialize and index one id range of objects. Returns the number of documents indexed."""
+    name, index, start_id, end_id = args
+    model, prefetch, serialize, category = PARALLEL_MIGRATIONS[name]
+    objs = prefetch(model.objects.filter(id__gte=start_id, id__lt=end_id).order_by('id'))
+    return bulk_index(_bulk_actions(objs, serialize, index, category))
+
+def parallel_migrate(name, index, processes=None, batch_size=None):
+    """Reindex every object of one of PARALLEL_MIGRATIONS. Batches of `batch_size` ids are loaded
+    with their related data prefetched and serialized in `processes` worker processes, which stream
+    the documents to elasticsearch in parallel bulk requests.
+
+    :return int: Number of indexed documents
+    """
+    processes = processes or settings.SEARCH_MIGRATION_PROCESSES
+    batch_size = batch_size or settings.SEARCH_MIGRATION_BATCH_SIZE
+    model = PARALLEL_MIGRATIONS[name][0]
+    max_id = model.objects.aggregate(Max('id'))['id__max'] or 0
+    batches = [(name, index, start_id, start_id + batch_size) for start_id in range(0, max_id + 1, batch_size)]
+
+    if processes > 1:
+        # Forked workers must not share the parent's database connection
+        connections.close_all()
+        pool = multiprocessing.Pool(processes, initializer=_init_migration_worker)
+        results = pool.imap_unordered(_migrate_batch, batches)
+    else:
+        pool = None
+        results = (_migrate_batch(batch) for batch in batches)
+
+    total_docs = 0
+    start = time.time()
+    try:
+        for batch_number, count in enumerate(results, 1):
+            total_docs += count
+            elapsed = time.time() - start
+            logger.info('{}: batch {} / {}, {} docs at {:.1f} docs/sec'.format(
+                name, batch_number, len(batches), total_docs, total_docs / elapsed if elapsed else 0
+            ))
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    return total_docs
+
 def migrate_nodes(index, delete, increment=10000):
     logger.info('Migrating nodes to index: {}'.format(index))
     max_nid = AbstractNode.objects.last().id
@@ -93,12 +171,8 @@ def migrate_nodes(index, delete, increment=10000):
 
 def migrate_preprints(index, delete):
     logger.info('Migrating preprints to index: {}'.format(index))
-    preprints = Preprint.objects.all()
-    increment = 100
-    paginator = Paginator(preprints, increment)
-    for page_number in paginator.page_range:
-        logger.info('Updating page {} / {}'.format(page_number, paginator.num_pages))
-        Preprint.bulk_update_search(paginator.page(page_number).object_list, index=index)
+    total_preprints = parallel_migrate('preprints', index)
+    logger.info('{} preprints migrated'.format(total_preprints))
 
 def migrate_preprint_files(index, delete):
     logger.info('Migrating preprint files to index: {}'.format(index))
@@ -112,12 +186,8 @@ def migrate_preprint_files(index, delete):
 
 def migrate_groups(index, delete):
     logger.info('Migrating groups to index: {}'.format(index))
-    groups = OSFGroup.objects.all()
-    increment = 100
-    paginator = Paginator(groups, increment)
-    for page_number in paginator.page_range:
-        logger.info('Updating page {} / {}'.format(page_number, paginator.num_pages))
-        OSFGroup.bulk_update_search(paginator.page(page_number).object_list, index=index)
+    total_groups = parallel_migrate('groups', index)
+    logger.info('{} groups migrated'.format(total_groups))
 
 def migrate_files(index, delete, increment=10000):
     logger.info('Migrating files to index: {}'.format(index))
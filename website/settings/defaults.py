@@ -112,6 +112,12 @@ ELASTIC_KWARGS = {
     # 'client_cert': None,
     # 'client_key': None
 }
+# Bulk indexing: threads sending bulk requests and documents per request
+ELASTIC_BULK_THREADS = 4
+ELASTIC_BULK_CHUNK_SIZE = 500
+# Full reindex: worker processes serializing documents and objects loaded per batch
+SEARCH_MIGRATION_PROCESSES = 4
+SEARCH_MIGRATION_BATCH_SIZE = 1000
 
 # Sessions
 COOKIE_NAME = 'osf'
@@ -119,6 +125,12 @@ COOKIE_NAME = 'osf'
 OSF_COOKIE_DOMAIN = None
 # server-side verification timeout
 OSF_SESSION_TIMEOUT = 30 * 24 * 60 * 60  # 30 days in seconds
+# Seconds a session stays in the shared session cache, if one is configured (see OSF_SESSION_CACHE_NAME
+# in api.base.settings), after it was last read or written
+OSF_SESSION_CACHE_TIMEOUT = 60 * 60
+# Seconds a session stays in a process' local session cache. Another process' logout only takes
+# effect in this process once its copy expires, so keep this short.
+OSF_SESSION_LOCAL_CACHE_TIMEOUT = 5
 # TODO: Override SECRET_KEY in local.py in production
 SECRET_KEY = 'CHANGEME'
 SESSION_COOKIE_SECURE = SECURE_MODE
@@ -158,6 +170,10 @@ SENDGRID_API_KEY = None
 SENDGRID_WHITELIST_MODE = False
 SENDGRID_EMAIL_WHITELIST = []
 
+# Notification digests: users streamed and acknowledged per chunk, and threads rendering and sending them
+NOTIFICATION_DIGEST_CHUNK_SIZE = 500
+NOTIFICATION_DIGEST_WORKERS = 8
+
 # Mailchimp
 MAILCHIMP_API_KEY = None
 MAILCHIMP_WEBHOOK_SECRET_KEY = 'CHANGEME'  # OSF secret key to ensure webhook is secure
@@ -182,6 +198,28 @@ MAILGUN_API_KEY = None
 # Use Celery for file rendering
 USE_CELERY = True
 
+# Request instrumentation, see framework.instrumentation.handlers
+INSTRUMENTATION_ENABLED = True
+# Fraction of requests logged; slow and over-budget requests are always logged
+INSTRUMENTATION_SAMPLE_RATE = 0.01
+INSTRUMENTATION_SLOW_REQUEST_THRESHOLD = 2.0
+# Most queries a view may run per request, keyed by view name (API) or endpoint (Flask)
+QUERY_BUDGETS = {}
+QUERY_BUDGET_DEFAULT = None
+# Raise instead of logging a warning when a view goes over budget
+QUERY_BUDGET_RAISE = False
+
+# Postcommit tasks run on a pool of greenlets shared by all requests, one db connection per greenlet
+POSTCOMMIT_POOL_SIZE = 30
+# Seconds a response waits for its postcommit tasks before raising
+POSTCOMMIT_TIMEOUT = 5.0
+# Log a warning when a request queues more postcommit tasks than this
+POSTCOMMIT_QUEUE_WARNING_DEPTH = 100
+# Log a warning for postcommit tasks that take longer than this many seconds
+POSTCOMMIT_SLOW_TASK_THRESHOLD = 1.0
+# Celery signatures queued by a request are published in groups of this size
+POSTCOMMIT_CELERY_CHUNK_SIZE = 100
+
 # TODO: Override in local.py in production
 DB_HOST = 'localhost'
 DB_PORT = os_env.get('OSF_DB_PORT', 27017)
@@ -407,6 +445,8 @@ class CeleryConfig:
         'scripts.remove_after_use.end_prereg_challenge',
         'osf.management.commands.check_crossref_dois',
         'osf.management.commands.migrate_pagecounter_data',
+        'osf.management.commands.reconcile_storage_usage',
+        'osf.management.commands.reconcile_node_counters',
     }
 
     med_pri_modules = {
@@ -486,6 +526,9 @@ class CeleryConfig:
         'scripts.premigrate_created_modified',
         'scripts.add_missing_identifiers_to_preprints',
         'osf.management.commands.deactivate_requested_accounts',
+        'osf.management.commands.reconcile_storage_usage',
+        'osf.management.commands.reconcile_node_counters',
+        'framework.analytics.tasks',
     )
 
     # Modules that need metrics and release requirements
@@ -613,6 +656,22 @@ class CeleryConfig:
                 'task': 'management.commands.check_crossref_dois',
                 'schedule': crontab(minute=0, hour=4),  # Daily 11:00 p.m.
             },
+            'reconcile_storage_usage': {
+                'task': 'management.commands.reconcile_storage_usage',
+                'schedule': crontab(minute=30, hour=7),  # Daily 2:30 a.m.
+            },
+            'reconcile_node_counters': {
+                'task': 'management.commands.reconcile_node_counters',
+                'schedule': crontab(minute=15, hour=8),  # Daily 3:15 a.m.
+            },
+            'flush_page_counters': {
+                'task': 'framework.analytics.tasks.flush_page_counters',
+                'schedule': crontab(minute='*'),  # Every minute
+            },
+            'flush_user_activity_counters': {
+                'task': 'framework.analytics.tasks.flush_user_activity_counters',
+                'schedule': crontab(minute='*'),  # Every minute
+            },
         }
 
         # Tasks that need metrics and release requirements
@@ -1863,6 +1922,12 @@ SITEMAP_TO_S3 = False
 SITEMAP_AWS_BUCKET = None
 SITEMAP_URL_MAX = 25000
 SITEMAP_INDEX_MAX = 50000
+# Rows fetched per keyset-paginated query while generating the sitemap
+SITEMAP_QUERY_BATCH_SIZE = 5000
+# Processes used to generate the sitemap sections (static, user, node, preprint) when running
+# scripts/generate_sitemap.py from the command line. 1 disables sharding. The scheduled celery task always
+# uses one process, since celery's prefork workers are daemonic and cannot start a process pool.
+SITEMAP_PROCESSES = 1
 SITEMAP_STATIC_URLS = [
     OrderedDict([('loc', ''), ('changefreq', 'yearly'), ('priority', '0.5')]),
     OrderedDict([('loc', 'preprints'), ('changefreq', 'yearly'), ('priority', '0.5')]),